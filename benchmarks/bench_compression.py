@@ -0,0 +1,63 @@
+# -*- coding: utf-8; -*-
+#
+# @file bench_compression.py
+# @brief Benchmark of the compression of the rest responses, size and time by content encoding.
+# @author agent (INRA UMR1095)
+# @date 2026-10-18
+# @copyright Copyright (c) 2026 INRA
+# @license MIT (see LICENSE file)
+# @details Run with : python benchmarks/bench_compression.py
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from django.conf import settings
+
+settings.configure()
+
+import django
+
+django.setup()
+
+from django.test import RequestFactory
+
+from igdectk.rest import Format
+from igdectk.rest.compression import ENCODINGS
+from igdectk.rest.response import HttpResponseRest
+
+
+def make_data(count):
+    # list of records, as a list endpoint gives
+    return {'items': [
+        {'id': i, 'name': 'entity %i' % i, 'code': 'ENT-%06i' % i, 'active': i % 3 == 0, 'parent': i // 10}
+        for i in range(count)]}
+
+
+def bench(count, number=5):
+    factory = RequestFactory()
+    data = make_data(count)
+
+    for data_format in (Format.JSON, Format.XML):
+        for encoding in (None,) + ENCODINGS:
+            for streaming in (False, True):
+                request = factory.get('/', HTTP_ACCEPT_ENCODING=encoding or 'identity')
+                request.format = data_format
+
+                def run():
+                    response = HttpResponseRest(request, data, streaming=streaming)
+                    return b''.join(response.streaming_content) if streaming else response.content
+
+                size = len(run())
+                t = min(timeit.repeat(run, number=number, repeat=3)) / number
+
+                print("%6i records %-4s %-8s %-9s : %9i bytes %8.2f ms" % (
+                    count, data_format.name, encoding or 'identity', 'streaming' if streaming else '',
+                    size, t * 1e3))
+
+
+if __name__ == '__main__':
+    for n in (1000, 10000):
+        bench(n)
@@ -0,0 +1,114 @@
+# -*- coding: utf-8; -*-
+#
+# @file bench_evaluator.py
+# @brief Benchmark of the safe expression evaluator, parsed at each call or compiled once.
+# @author agent (INRA UMR1095)
+# @date 2026-10-18
+# @copyright Copyright (c) 2026 INRA
+# @license MIT (see LICENSE file)
+# @details Run with : python benchmarks/bench_evaluator.py
+
+import ast
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from igdectk.common.evaluator import eval_expr, evaluate_batch, numpy, operators
+
+# scoring formula of imported records
+SCORE_EXPR = "(price * quantity - discount) / 100 if quantity > 0 and price >= 1 else -1"
+
+# number of rows of the batch evaluation
+ROWS = 100000
+
+# some usual settings values and template tags parameters
+EXPRESSIONS = (
+    "'fr'",
+    "42",
+    "3600 * 24 * 7",
+    "('id', 'name', 'code')",
+    "['id', 'name', 'code']",
+    "{'theme': 'dark', 'per_page': 20, 'sizes': (10, 20, 50)}",
+    "-1.5 ** 2 + 2 / 3",
+)
+
+
+def _walk(node):
+    # same work as the previous evaluator, once per evaluation
+    if isinstance(node, ast.Constant):
+        return node.value
+    elif isinstance(node, ast.Tuple):
+        return tuple(map(_walk, node.elts))
+    elif isinstance(node, ast.List):
+        return list(map(_walk, node.elts))
+    elif isinstance(node, ast.Set):
+        return set(map(_walk, node.elts))
+    elif isinstance(node, ast.Dict):
+        return dict((_walk(k), _walk(v)) for k, v in zip(node.keys, node.values))
+    elif isinstance(node, ast.BinOp):
+        return operators[type(node.op)](_walk(node.left), _walk(node.right))
+    elif isinstance(node, ast.UnaryOp):
+        return operators[type(node.op)](_walk(node.operand))
+    else:
+        raise TypeError(node)
+
+
+def eval_uncached(expr):
+    return _walk(ast.parse(expr, mode='eval').body)
+
+
+def bench(number=20000):
+    for expr in EXPRESSIONS:
+        assert eval_uncached(expr) == eval_expr(expr), expr
+
+    def run(evaluate):
+        for expr in EXPRESSIONS:
+            evaluate(expr)
+
+    t_uncached = min(timeit.repeat(lambda: run(eval_uncached), number=number, repeat=3)) / (number * len(EXPRESSIONS))
+    t_compiled = min(timeit.repeat(lambda: run(eval_expr), number=number, repeat=3)) / (number * len(EXPRESSIONS))
+
+    print("parsed %6.2f us/expression, compiled %6.2f us/expression (x%.1f)" % (
+        t_uncached * 1e6, t_compiled * 1e6, t_uncached / t_compiled))
+
+
+def bench_batch(repeat=3):
+    columns = {
+        'price': [(i * 7) % 1000 for i in range(ROWS)],
+        'quantity': [(i * 13) % 50 for i in range(ROWS)],
+        'discount': [(i * 3) % 20 for i in range(ROWS)],
+    }
+
+    def run_rows():
+        names = tuple(columns)
+        return [eval_expr(SCORE_EXPR, dict(zip(names, row))) for row in zip(*columns.values())]
+
+    expected = run_rows()
+    assert evaluate_batch(SCORE_EXPR, columns) == expected
+
+    t_rows = min(timeit.repeat(run_rows, number=1, repeat=repeat))
+
+    # the lists are evaluated row by row, with a single context
+    t_loop = min(timeit.repeat(lambda: evaluate_batch(SCORE_EXPR, columns), number=1, repeat=repeat))
+
+    print("%i rows: eval_expr %6.1f ms, batch loop %6.1f ms (x%.1f)" % (
+        ROWS, t_rows * 1e3, t_loop * 1e3, t_rows / t_loop))
+
+    if numpy is None:
+        print("numpy not available, vectorized batch skipped")
+        return
+
+    arrays = {name: numpy.asarray(column) for name, column in columns.items()}
+    assert numpy.allclose(evaluate_batch(SCORE_EXPR, arrays), expected)
+
+    t_vector = min(timeit.repeat(lambda: evaluate_batch(SCORE_EXPR, arrays), number=1, repeat=repeat))
+
+    print("%i rows: eval_expr %6.1f ms, batch numpy %6.1f ms (x%.1f)" % (
+        ROWS, t_rows * 1e3, t_vector * 1e3, t_rows / t_vector))
+
+
+if __name__ == '__main__':
+    bench()
+    bench_batch()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8; -*-
+#
+# @file bench_header.py
+# @brief Benchmark of the HTTP header parsing, with and without the shared cache.
+# @author agent (INRA UMR1095)
+# @date 2026-10-18
+# @copyright Copyright (c) 2026 INRA
+# @license MIT (see LICENSE file)
+# @details Run with : python benchmarks/bench_header.py
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from django.conf import settings
+
+settings.configure()
+
+import django
+
+django.setup()
+
+from django.test import RequestFactory
+from django.utils.translation.trans_real import parse_accept_lang_header
+
+from igdectk.rest.restmiddleware import HttpHeader, parse_accept_header, parse_content_type
+
+# some usual browsers and clients headers
+HEADERS = (
+    {'HTTP_ACCEPT': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+     'HTTP_ACCEPT_LANGUAGE': 'fr-FR,fr;q=0.8,en-US;q=0.5,en;q=0.3'},
+    {'HTTP_ACCEPT': 'application/json, text/javascript, */*; q=0.01',
+     'HTTP_ACCEPT_LANGUAGE': 'en-US,en;q=0.9',
+     'CONTENT_TYPE': 'application/json; charset=UTF-8'},
+    {'HTTP_ACCEPT': 'application/xml', 'CONTENT_TYPE': 'application/xml'},
+    {'HTTP_ACCEPT': '*/*'},
+)
+
+
+def parse_uncached(request):
+    # same work as the previous HttpHeader, once per request
+    accept = parse_accept_header(request.META.get("HTTP_ACCEPT", ""))
+    types = [t[0] for t in accept]
+    languages = parse_accept_lang_header.__wrapped__(request.META.get("HTTP_ACCEPT_LANGUAGE", ""))
+    codes = [t[0] for t in languages]
+    content_type = parse_content_type(request.META.get("CONTENT_TYPE", ""))
+    return types, codes, content_type
+
+
+def parse_cached(request):
+    header = HttpHeader(request)
+    return header.accepted_types, header.accepted_language_codes, header.content_type
+
+
+def bench(number=20000):
+    factory = RequestFactory()
+    requests = [factory.get('/', **headers) for headers in HEADERS]
+
+    for request in requests:
+        types, codes, content_type = parse_uncached(request)
+        c_types, c_codes, c_content_type = parse_cached(request)
+        assert types == c_types and codes == c_codes and content_type == c_content_type
+
+    def run(parse):
+        for request in requests:
+            parse(request)
+
+    t_uncached = min(timeit.repeat(lambda: run(parse_uncached), number=number, repeat=3)) / (number * len(requests))
+    t_cached = min(timeit.repeat(lambda: run(parse_cached), number=number, repeat=3)) / (number * len(requests))
+
+    print("uncached %6.2f us/request, cached %6.2f us/request (x%.1f)" % (
+        t_uncached * 1e6, t_cached * 1e6, t_uncached / t_cached))
+
+
+if __name__ == '__main__':
+    bench()
@@ -0,0 +1,107 @@
+# -*- coding: utf-8; -*-
+#
+# @file bench_json.py
+# @brief Benchmark of the JSON backends.
+# @author agent (INRA UMR1095)
+# @date 2026-10-18
+# @copyright Copyright (c) 2026 INRA
+# @license MIT (see LICENSE file)
+# @details Run with : python benchmarks/bench_json.py
+
+import decimal
+import json
+import os
+import sys
+import timeit
+import uuid
+
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import django
+from django.conf import settings
+
+settings.configure(USE_I18N=False)
+django.setup()
+
+from django.core import serializers
+from django.db import models
+from django.db.models.query import QuerySet
+from django.utils.functional import Promise
+from django.utils.translation import gettext_lazy
+
+from igdectk.rest.response import JSON_BACKENDS
+
+
+class LegacyEncoder(json.JSONEncoder):
+    """isinstance cascade, as before the type dispatch table."""
+
+    def default(self, obj):
+        if isinstance(obj, QuerySet):
+            return serializers.serialize("python", obj)
+        elif isinstance(obj, models.Model):
+            return serializers.serialize('python', [obj])[0]
+        elif isinstance(obj, date):
+            return obj.isoformat()
+        elif isinstance(obj, datetime):
+            return obj.isoformat()
+        elif isinstance(obj, decimal.Decimal):
+            return str(obj)
+        elif isinstance(obj, Promise):
+            return str(obj)
+        elif isinstance(obj, uuid.UUID):
+            return str(obj)
+        elif hasattr(obj, "__dict__"):
+            return obj.__dict__
+        else:
+            return json.JSONEncoder.default(self, obj)
+
+
+PAYLOADS = {
+    # error or acknowledge of an action
+    'small': {"result": "failed", "cause": gettext_lazy("Missing parameter"), "code": 400, "error": "view_exception"},
+    # page of a list of entities
+    'list': {
+        "page": 1,
+        "items": [{
+            "id": i,
+            "uuid": uuid.UUID(int=i),
+            "name": "Accession %i" % i,
+            "created": datetime(2016, 7, 4, 10, 30, i % 60),
+            "date": date(2016, 7, 4),
+            "value": decimal.Decimal("%i.25" % i),
+            "ratio": i / 3.0,
+            "tags": ["a", "b", "c"],
+            "valid": i % 2 == 0,
+        } for i in range(1000)]
+    },
+    # plain types only
+    'native': {"items": [{"id": i, "name": "Accession %i" % i, "ratio": i / 3.0, "tags": ["a", "b"]} for i in range(1000)]},
+}
+
+
+def bench(label, func, number):
+    t = min(timeit.repeat(func, number=number, repeat=3)) / number
+    print("  %-20s %10.1f us/encode" % (label, t * 1e6))
+    return t
+
+
+if __name__ == '__main__':
+    backends = []
+
+    for name, backend_class in JSON_BACKENDS.items():
+        try:
+            backends.append((name, backend_class()))
+        except ImportError:
+            print("%s backend is not installed" % name)
+
+    for payload_name, payload in PAYLOADS.items():
+        number = 5000 if payload_name == 'small' else 50
+
+        print("payload '%s'" % payload_name)
+        t_ref = bench("legacy", lambda: json.dumps(payload, cls=LegacyEncoder).encode('utf-8'), number)
+
+        for name, backend in backends:
+            t = bench(name, lambda: backend.dumps(payload), number)
+            print("  %-20s %10.1fx" % ("speedup " + name, t_ref / t))
@@ -0,0 +1,78 @@
+# -*- coding: utf-8; -*-
+#
+# @file bench_router.py
+# @brief Benchmark of the URL resolution with and without the rest router.
+# @author agent (INRA UMR1095)
+# @date 2026-10-18
+# @copyright Copyright (c) 2026 INRA
+# @license MIT (see LICENSE file)
+# @details Run with : python benchmarks/bench_router.py
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from django.conf import settings
+
+settings.configure()
+
+import django
+
+django.setup()
+
+from django.conf.urls import url
+from django.urls import URLResolver
+from django.urls.resolvers import RegexPattern
+
+from igdectk.rest.router import RestRouter
+
+
+def view(request, **kwargs):
+    return None
+
+
+def make_patterns(count):
+    # handlers are defined as entity, entity/id and entity/id/sub-entity
+    patterns = []
+
+    for i in range(0, count // 3 + 1):
+        patterns.append(url(r'^entity%i/$' % i, view, name='entity%i' % i))
+        patterns.append(url(r'^entity%i/(?P<id>[0-9]+)/$' % i, view, name='entity%i-id' % i))
+        patterns.append(url(r'^entity%i/(?P<id>[0-9]+)/sub/$' % i, view, name='entity%i-id-sub' % i))
+
+    return patterns[:count]
+
+
+def make_paths(count):
+    # paths spread over the whole list of handlers
+    return ['entity%i/%i/sub/' % (i, i) for i in range(0, count // 3, max(1, count // 30))]
+
+
+def bench(count, number=20):
+    paths = make_paths(count)
+
+    resolver = URLResolver(RegexPattern(r'^'), make_patterns(count))
+
+    router = RestRouter()
+    for url_pattern in make_patterns(count):
+        router.append(url_pattern)
+
+    for path in paths:
+        assert resolver.resolve(path).url_name == router.resolve(path).url_name
+
+    def run(r):
+        for path in paths:
+            r.resolve(path)
+
+    t_resolver = min(timeit.repeat(lambda: run(resolver), number=number, repeat=3)) / (number * len(paths))
+    t_router = min(timeit.repeat(lambda: run(router), number=number, repeat=3)) / (number * len(paths))
+
+    print("%6i handlers : django %9.2f us/resolve, router %7.2f us/resolve (x%.1f)" % (
+        count, t_resolver * 1e6, t_router * 1e6, t_resolver / t_router))
+
+
+if __name__ == '__main__':
+    for n in (50, 500, 5000):
+        bench(n)
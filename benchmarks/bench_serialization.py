@@ -0,0 +1,69 @@
+# -*- coding: utf-8; -*-
+#
+# @file bench_serialization.py
+# @brief Benchmark of the serialization of the models.
+# @author agent (INRA UMR1095)
+# @date 2026-10-18
+# @copyright Copyright (c) 2026 INRA
+# @license MIT (see LICENSE file)
+# @details Run with : python benchmarks/bench_serialization.py
+
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import django
+from django.conf import settings
+
+settings.configure(INSTALLED_APPS=['django.contrib.contenttypes', 'django.contrib.auth', 'django.contrib.sessions'])
+django.setup()
+
+from django.core import serializers
+from django.contrib.auth.models import Permission
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+
+from igdectk.common.serialization import model_to_python
+from igdectk.rest.response import ComplexEncoder, OrjsonBackend, StdJsonBackend
+
+# models without many to many relations, not saved
+MODELS = {
+    'Permission': [Permission(id=i, content_type_id=i % 10, codename='perm_%i' % i, name='Permission %i' % i)
+                   for i in range(10000)],
+    'Session': [Session(session_key='key%i' % i, session_data='data' * 10, expire_date=timezone.now())
+                for i in range(10000)],
+}
+
+
+def bench(label, func, number=3):
+    t = min(timeit.repeat(func, number=number, repeat=3)) / number
+    print("  %-24s %8.2f ms" % (label, t * 1e3))
+    return t
+
+
+if __name__ == '__main__':
+    backend = StdJsonBackend()
+
+    try:
+        fast_backend = OrjsonBackend()
+    except ImportError:
+        fast_backend = None
+
+    for name, objects in MODELS.items():
+        print("%i %s" % (len(objects), name))
+
+        t_ref = bench("serializers.serialize", lambda: [serializers.serialize('python', [obj])[0] for obj in objects])
+        t_plan = bench("model_to_python", lambda: [model_to_python(obj) for obj in objects])
+        print("  %-24s %8.1fx" % ("speedup", t_ref / t_plan))
+
+        t_ref = bench("json (serializer)", lambda: json.dumps(
+            [serializers.serialize('python', [obj])[0] for obj in objects], cls=ComplexEncoder))
+        t_plan = bench("json (plan)", lambda: backend.dumps(objects))
+        print("  %-24s %8.1fx" % ("speedup", t_ref / t_plan))
+
+        if fast_backend:
+            t_plan = bench("orjson (plan)", lambda: fast_backend.dumps(objects))
+            print("  %-24s %8.1fx" % ("speedup", t_ref / t_plan))
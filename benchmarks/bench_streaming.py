@@ -0,0 +1,65 @@
+# -*- coding: utf-8; -*-
+#
+# @file bench_streaming.py
+# @brief Benchmark of the streamed rest responses.
+# @author agent (INRA UMR1095)
+# @date 2026-10-18
+# @copyright Copyright (c) 2026 INRA
+# @license MIT (see LICENSE file)
+# @details Run with : python benchmarks/bench_streaming.py [rows]
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import django
+from django.conf import settings
+
+settings.configure(
+    INSTALLED_APPS=['django.contrib.contenttypes', 'django.contrib.auth'],
+    DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}})
+django.setup()
+
+from django.core.management import call_command
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+
+from igdectk.rest.response import ComplexEncoder, iterencode_json
+
+
+def measure(label, func):
+    tracemalloc.start()
+    t = time.perf_counter()
+    size = func()
+    t = time.perf_counter() - t
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    print("%-24s %8.2f s  peak %8.1f MB  (%d chars)" % (label, t, peak / 1e6, size))
+
+
+def dumps():
+    return len(json.dumps({'items': Permission.objects.all()}, cls=ComplexEncoder))
+
+
+def stream():
+    # consume the chunks as a StreamingHttpResponse would do
+    return sum(len(chunk) for chunk in iterencode_json({'items': Permission.objects.all()}))
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    call_command('migrate', verbosity=0)
+    content_type = ContentType.objects.get_for_model(Permission)
+    Permission.objects.bulk_create(
+        [Permission(content_type=content_type, codename='perm_%i' % i, name='Permission %i' % i)
+         for i in range(rows)], batch_size=500)
+
+    print("JSON of %i rows" % rows)
+    measure("json.dumps", dumps)
+    measure("iterencode_json", stream)
@@ -0,0 +1,70 @@
+# -*- coding: utf-8; -*-
+#
+# @file bench_validator.py
+# @brief Benchmark of the rest content validators.
+# @author agent (INRA UMR1095)
+# @date 2026-10-18
+# @copyright Copyright (c) 2026 INRA
+# @license MIT (see LICENSE file)
+# @details Run with : python benchmarks/bench_validator.py
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import validictory
+
+from igdectk.rest.validator import FastSchema, compile_schema
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string", "minLength": 3, "maxLength": 64},
+        "code": {"type": "string", "maxLength": 32},
+        "type": {"type": "integer", "minimum": 0, "maximum": 10},
+        "state": {"type": "string", "enum": ["draft", "valid", "archived"]},
+        "parent": {"type": ["integer", "null"], "required": False},
+        "descriptors": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "integer"},
+                    "value": {"type": "number"},
+                }
+            }
+        },
+    }
+}
+
+FAST_SCHEMA = dict(SCHEMA, properties=dict(SCHEMA['properties']))
+# the fast path does not support the list of types
+del FAST_SCHEMA['properties']['parent']
+
+DATA = {
+    "name": "Accession 42",
+    "code": "ACC-42",
+    "type": 3,
+    "state": "valid",
+    "descriptors": [{"id": i, "value": i * 1.5} for i in range(10)],
+}
+
+
+def bench(label, func, number=20000):
+    t = min(timeit.repeat(func, number=number, repeat=3)) / number
+    print("%-32s %8.2f us/validation" % (label, t * 1e6))
+    return t
+
+
+if __name__ == '__main__':
+    compiled = compile_schema(SCHEMA)
+    fast = compile_schema(FastSchema(FAST_SCHEMA))
+
+    t_ref = bench("validictory.validate", lambda: validictory.validate(DATA, SCHEMA))
+    t_compiled = bench("compiled (validictory)", lambda: compiled(DATA))
+    t_ref_fast = bench("validictory.validate (subset)", lambda: validictory.validate(DATA, FAST_SCHEMA))
+    t_fast = bench("compiled (fast path)", lambda: fast(DATA))
+
+    print("speedup compiled x%.1f, fast path x%.1f" % (t_ref / t_compiled, t_ref_fast / t_fast))
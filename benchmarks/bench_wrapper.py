@@ -0,0 +1,134 @@
+# -*- coding: utf-8; -*-
+#
+# @file bench_wrapper.py
+# @brief Benchmark of the rest view wrappers.
+# @author agent (INRA UMR1095)
+# @date 2026-10-18
+# @copyright Copyright (c) 2026 INRA
+# @license MIT (see LICENSE file)
+# @details Run with : python benchmarks/bench_wrapper.py
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import django
+from django.conf import settings
+
+settings.configure()
+django.setup()
+
+from django.core.exceptions import PermissionDenied
+
+from igdectk.rest import Format
+from igdectk.rest.handler import RestHandler
+from igdectk.common.helpers import ViewExceptionRest
+
+
+class User(object):
+    is_authenticated = True
+    is_staff = True
+    is_superuser = False
+
+    def has_perm(self, perm):
+        return True
+
+
+class Header(object):
+    content_format = Format.JSON
+
+
+class Request(object):
+    def __init__(self):
+        self.user = User()
+        self.header = Header()
+        self.data = {"name": "a", "code": "b"}
+
+
+def legacy_wrapper(func, data_format, parameters, content):
+    """Wrapper of def_request as written before the factory."""
+    def wrapper(*args, **kwargs):
+        request = args[0]
+
+        request.format = data_format
+        request.parameters = parameters
+
+        data = request.data if hasattr(request, 'data') else request.POST
+
+        if type(content) == tuple:
+            for p in content:
+                if p not in data:
+                    raise ViewExceptionRest("Missing parameter " + p, 400)
+
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def legacy_auth_wrapper(func, data_format, parameters, content, fallback=None, perms=None, staff=None):
+    """Wrapper of def_auth_request as written before the factory, testing every option at each call."""
+    def wrapper(*args, **kwargs):
+        request = args[0]
+
+        request.format = data_format
+        request.parameters = parameters
+
+        if not request.user.is_authenticated:
+            if fallback:
+                return fallback(request)
+            raise ViewExceptionRest("Authenticated users only", 401)
+
+        if staff and (not request.user.is_staff and not request.user.is_superuser):
+            if fallback:
+                return fallback(request)
+            raise PermissionDenied("Superuser and staff only")
+
+        if perms:
+            for k, v in perms.items():
+                if not request.user.has_perm(k):
+                    raise PermissionDenied(v)
+
+        data = request.data if hasattr(request, 'data') else request.POST
+
+        if type(content) == tuple:
+            for p in content:
+                if p not in data:
+                    raise ViewExceptionRest("Missing parameter " + p, 400)
+
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def view(request):
+    return None
+
+
+def bench(label, func, number=200000):
+    t = min(timeit.repeat(func, number=number, repeat=3)) / number
+    print("%-40s %8.3f us/call" % (label, t * 1e6))
+    return t
+
+
+if __name__ == '__main__':
+    request = Request()
+
+    for label, content, options in (
+            ("no check", (), {}),
+            ("content", ("name", "code"), {}),
+            ("auth", (), {'auth': True}),
+            ("auth + staff + perms + content", ("name", "code"), {'auth': True, 'staff': True, 'perms': {'a.b': "no"}})):
+        if options.get('auth'):
+            legacy = legacy_auth_wrapper(view, Format.JSON, (), content, staff=options.get('staff'),
+                                         perms=options.get('perms'))
+        else:
+            legacy = legacy_wrapper(view, Format.JSON, (), content)
+
+        wrapper = RestHandler._make_wrapper(view, Format.JSON, (), content, **options)
+
+        t_legacy = bench("legacy " + label, lambda: legacy(request))
+        t_wrapper = bench("factory " + label, lambda: wrapper(request))
+
+        print("overhead reduced by %.0f%%" % (100.0 * (1.0 - t_wrapper / t_legacy)))
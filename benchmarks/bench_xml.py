@@ -0,0 +1,160 @@
+# -*- coding: utf-8; -*-
+#
+# @file bench_xml.py
+# @brief Benchmark of the XML encoder and decoder.
+# @author agent (INRA UMR1095)
+# @date 2026-10-18
+# @copyright Copyright (c) 2026 INRA
+# @license MIT (see LICENSE file)
+# @details Run with : python benchmarks/bench_xml.py [elements...]
+
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import django
+from django.conf import settings
+
+settings.configure()
+django.setup()
+
+from igdectk.xmlio.decoder import Decoder
+from igdectk.xmlio.encoder import Encoder
+
+
+class LegacyEncoder(Encoder):
+    """Encoder concatenating the strings, as before the streaming encoder."""
+
+    def _List2Xml(self, name, obj):
+        result = ""
+
+        for value in obj:
+            if isinstance(value, dict):
+                result += self._Dict2Xml(name, value)
+            elif isinstance(value, list) or isinstance(value, tuple):
+                result += self._List2Xml(name, value)
+            else:
+                result += self._Value2Xml(name, value)
+
+        return result
+
+    def _Dict2Xml(self, name, obj):
+        result = ""
+        attrs = ""
+        simple = True
+
+        for key, value in obj.items():
+            if isinstance(value, dict):
+                simple = False
+                result += self._Dict2Xml(key, value)
+            elif isinstance(value, list) or isinstance(value, tuple):
+                simple = False
+                result += self._List2Xml(key, value)
+            elif isinstance(value, str) or isinstance(value, int) or isinstance(value, float):
+                attrs += ' %s="%s"' % (key, str(value))
+            else:
+                simple = False
+                result += self._Value2Xml(key, value)
+
+        if name:
+            if simple:
+                return "<%s%s/>" % (name, attrs)
+            else:
+                return "<%s%s>%s</%s>" % (name, attrs, result, name)
+
+        return result
+
+
+class LegacyDecoder(Decoder):
+    """Decoder looking for the siblings of each child, as before the single pass grouping."""
+
+    def _node(self, node):
+        content = {}
+
+        for item in node.items():
+            content[item[0]] = item[1]
+
+        done = set()
+
+        for child in list(node):
+            siblings = node.findall(child.tag)
+
+            if len(siblings) > 1:
+                done.add(child.tag)
+                content[child.tag] = [self._node(s) for s in siblings]
+            elif child.tag not in done:
+                content[child.tag] = self._node(child)
+
+        if not list(node) and node.text:
+            content = node.text
+
+        return content
+
+
+def document(elements):
+    return {'export': {'item': [
+        {'id': i, 'name': 'item %i' % i, 'child': {'value': i * 0.5, 'unit': 'cm'}} for i in range(elements)]}}
+
+
+def legacy(data):
+    return len(LegacyEncoder().encode(data))
+
+
+def encode(data):
+    return len(Encoder().encode(data))
+
+
+def stream(data):
+    # consume the chunks as a StreamingHttpResponse would do
+    return sum(len(chunk) for chunk in Encoder().iterencode(data))
+
+
+def legacy_decode(data):
+    return len(LegacyDecoder().decode(data)['export']['item'])
+
+
+def decode(data):
+    return len(Decoder().decode(data)['export']['item'])
+
+
+def decode_stream(data):
+    return len(Decoder().decode_stream(io.BytesIO(data))['export']['item'])
+
+
+def measure(label, func, data):
+    t = time.perf_counter()
+    size = func(data)
+    t = time.perf_counter() - t
+
+    tracemalloc.start()
+    func(data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    print("%-14s %8.2f s  peak %9.1f MB  (%d)" % (label, t, peak / 1e6, size), flush=True)
+
+
+if __name__ == '__main__':
+    sizes = [int(x) for x in sys.argv[1:]] or [10000, 1000000]
+
+    for elements in sizes:
+        data = document(elements)
+
+        print("XML of %i elements" % elements)
+        measure("legacy", legacy, data)
+        measure("encode", encode, data)
+        measure("iterencode", stream, data)
+
+        # wide document, all the items are siblings
+        data = Encoder().encode(data).encode('utf-8')
+
+        print("Decoding of %i elements" % elements)
+        # the legacy decoder is quadratic
+        if elements <= 1000:
+            measure("legacy", legacy_decode, data)
+        measure("decode", decode, data)
+        measure("decode_stream", decode_stream, data)
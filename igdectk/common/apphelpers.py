@@ -10,12 +10,18 @@
 
 import os
 import sys
+import time
 import logging
 
 from importlib import import_module
 
 from django.conf import settings
 from django.apps import AppConfig
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_migrate, post_save
 
 from igdectk.rest.restmiddleware import ViewExceptionRest
 
@@ -24,6 +30,38 @@ from .evaluator import eval_expr
 logger = logging.getLogger(__name__)
 
 
+# names of the tables of the database, listed once for the startup of all the applications
+_table_names = None
+
+
+def get_table_names():
+    """
+    Returns the set of the names of the tables of the default database. The database is
+    introspected at the first call only, and the result is shared by the startup of the applications.
+    It is introspected again after a migrate or a flush.
+
+    :rtype: set
+    """
+    global _table_names
+
+    if _table_names is None:
+        from django.db import connection
+
+        _table_names = set(connection.introspection.table_names())
+
+    return _table_names
+
+
+def _reset_table_names(sender, **kwargs):
+    global _table_names
+
+    # the tables can have been created or dropped by migrate or flush
+    _table_names = None
+
+
+post_migrate.connect(_reset_table_names, dispatch_uid='igdectk.apphelpers.table_names')
+
+
 def startup(appconfig, app_logger):
     """
     Helper function called by :class:`ApplicationMain` on ready.
@@ -43,9 +81,6 @@ def startup(appconfig, app_logger):
 
     app_logger.info("> Looking for the model settings '%s'..." % (appconfig.settings_model,))
 
-    # first we look for the settings table
-    from django.db import connection
-
     module_name, settings_class = appconfig.settings_model.rsplit('.', 1)
     module = import_module(module_name)
 
@@ -54,15 +89,25 @@ def startup(appconfig, app_logger):
 
     app_logger.info("> Validate defaults settings :")
 
-    if appconfig.settings_table_name in connection.introspection.table_names():
+    if appconfig.settings_table_name in get_table_names():
+        settings_table = appconfig.settings_table
+
+        # the existing settings in a single query
+        existing = {
+            obj.param_name: obj for obj in settings_table.objects.filter(
+                param_name__in=list(appconfig.default_settings))}
+
+        to_insert = []
+        to_update = []
+
         # check or init default and mandatory settings
         for k in appconfig.default_settings:
-            obj = appconfig.settings_table.objects.filter(param_name=k)
-            if obj is None or not obj:
-                obj = appconfig.settings_table()
+            obj = existing.get(k)
+            if obj is None:
+                obj = settings_table()
                 obj.param_name = k
                 obj.value = repr(appconfig.default_settings[k])
-                obj.save()
+                to_insert.append(obj)
 
                 try:
                     value_str = str(appconfig.default_settings[k])
@@ -72,37 +117,43 @@ def startup(appconfig, app_logger):
 
                 app_logger.info("    %s = %s (inserted with default)" % (k, value_str))
 
-            elif obj[0].value is None or not obj[0].value:
-                obj[0].value = repr(appconfig.default_settings[k])
-                obj[0].save()
+            elif obj.value is None or not obj.value:
+                obj.value = repr(appconfig.default_settings[k])
+                to_update.append(obj)
 
                 try:
-                    value_str = str(obj[0].value)
+                    value_str = str(obj.value)
                 except TypeError:
-                    app_logger.fatal('Unable to eval %s' % (obj[0].param_name,))
+                    app_logger.fatal('Unable to eval %s' % (obj.param_name,))
                     raise
 
                 app_logger.info(
                     "    %s = %s (update to default)" % (
-                        obj[0].param_name, value_str))
+                        obj.param_name, value_str))
             else:
                 try:
-                    value_str = str(obj[0].value)
+                    value_str = str(obj.value)
                 except TypeError:
-                    app_logger.fatal('Unable to eval %s' % (obj[0].param_name,))
+                    app_logger.fatal('Unable to eval %s' % (obj.param_name,))
                     raise
 
-                app_logger.info("    %s = %s (found)" % (obj[0].param_name, value_str))
+                app_logger.info("    %s = %s (found)" % (obj.param_name, value_str))
+
+        if to_insert:
+            settings_table.objects.bulk_create(to_insert)
+
+        if to_update:
+            settings_table.objects.bulk_update(to_update, ['value'])
 
         app_logger.info("> All checks passes. Now running...")
     else:
+        app_logger.warning("'%s' table does not exists (maybe you should apply the database migrations)" % (
+            appconfig.settings_table_name,))
+
         # not yet configured
         appconfig.settings_table = None
         appconfig.settings_table_name = ''
 
-        app_logger.warning("'%s' table does not exists (maybe you should apply the database migrations)" % (
-            appconfig.settings_table_name,))
-
 
 def get_app_db_settings(app_short_name):
     """
@@ -137,6 +188,23 @@ def get_app_db_settings(app_short_name):
     return applications[app_short_name]['DB_DEFAULT_SETTINGS']
 
 
+# default delay in seconds between two checks of the version of the settings of an application
+# (DB_SETTINGS_CHECK_INTERVAL setting)
+DB_SETTINGS_CHECK_INTERVAL = 1.0
+
+
+def is_shared_cache(alias='default'):
+    """
+    Returns True if a cache is shared by the processes, that is not a local memory or a dummy cache.
+    The default cache of Django is a local memory cache, so the settings cache of
+    :class:`ApplicationMain` is disabled unless a shared cache is configured.
+
+    :param str alias: Name of the cache into the CACHES setting.
+    :rtype: boolean
+    """
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
+
+
 class ApplicationMain(AppConfig):
     """
     Advanced Django AppConfig.
@@ -184,6 +252,12 @@ class ApplicationMain(AppConfig):
         self.version = (0, 1)
         self.logger = logging.getLogger(self.name)
 
+        # process local cache of the settings table, as (version, raw values), if enabled
+        self.settings_cached = False
+        self._settings_cache = None
+        self._settings_checked = 0.0
+        self.settings_check_interval = DB_SETTINGS_CHECK_INTERVAL
+
     def ready(self):
         """
         Called by Django application manager when the application is loaded.
@@ -229,12 +303,33 @@ class ApplicationMain(AppConfig):
 
         self.logger = logging.getLogger(self.name)
 
+        # the invalidation must be seen by every process
+        self.settings_cached = getattr(settings, 'DB_SETTINGS_CACHE', is_shared_cache())
+        self.settings_check_interval = getattr(settings, 'DB_SETTINGS_CHECK_INTERVAL', DB_SETTINGS_CHECK_INTERVAL)
+
         startup(self, self.logger)
 
+        if self.settings_table:
+            # any change of the settings table invalidates the settings cache of every process
+            post_save.connect(
+                self._settings_changed, sender=self.settings_table, dispatch_uid='%s.settings' % self.name)
+            post_delete.connect(
+                self._settings_changed, sender=self.settings_table, dispatch_uid='%s.settings' % self.name)
+
     def get_setting(self, param_name):
         """
         Get a setting value for this application or None if not exists.
 
+        The settings table is loaded once into a process local cache. The cache is reloaded
+        when the settings version shared by the processes (see :meth:`invalidate_settings`) has
+        changed, checked at most every DB_SETTINGS_CHECK_INTERVAL seconds. The value is evaluated
+        at each call, so a returned list or dict can be modified by the caller.
+
+        The version is stored into the default cache, that must be shared by the processes
+        (as memcached, redis, database or file based caches). With a local memory or a dummy cache
+        the settings are read from the database at each call, unless the DB_SETTINGS_CACHE
+        setting is True (a single process).
+
         :param str param_name: Name of the settings parameters key
 
         :return: Returns the asked value or None if not founds.
@@ -251,17 +346,60 @@ class ApplicationMain(AppConfig):
             # else returns None
             return self.default_settings.get(param_name, None)
 
-        # search for setting in DB
-        setting = self.settings_table.objects.filter(param_name=param_name)
+        if self.settings_cached:
+            value = self._get_settings_cache()[1].get(param_name)
+        else:
+            value = self.settings_table.objects.filter(
+                param_name=param_name).values_list('value', flat=True).first()
 
         # if found in DB eval it and returns, else fallback to the default value
-        if len(setting) >= 1:
-            return eval_expr(setting[0].value)
-        # else:
-        #     raise ViewExceptionRest('Bad configuration.', 500)
+        if value is not None:
+            return eval_expr(value)
 
         return self.default_settings.get(param_name, None)
 
+    def _settings_version_key(self):
+        return 'igdectk.settings:%s:version' % self.name
+
+    def _get_settings_cache(self):
+        settings_cache = self._settings_cache
+        now = time.monotonic()
+
+        if settings_cache is not None and now - self._settings_checked < self.settings_check_interval:
+            return settings_cache
+
+        version = cache.get(self._settings_version_key())
+
+        if settings_cache is None or settings_cache[0] != version:
+            # all the settings in a single query
+            raw_values = dict(self.settings_table.objects.values_list('param_name', 'value'))
+            settings_cache = self._settings_cache = (version, raw_values)
+
+        self._settings_checked = now
+
+        return settings_cache
+
+    def invalidate_settings(self):
+        """
+        Invalidate the cached settings of the application, into this process immediately,
+        and into the others processes at their next check of the settings version.
+
+        It is called once the transaction saving or deleting a row of the settings table is
+        committed, and it must be called after a bulk update of the table.
+        """
+        self._settings_cache = None
+
+        key = self._settings_version_key()
+
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, int(time.time() * 1000), None)
+
+    def _settings_changed(self, sender, using=None, **kwargs):
+        # the others processes must not reload the settings before the change is committed
+        transaction.on_commit(self.invalidate_settings, using=using)
+
     def is_run_mode(self):
         command_list = ("init_fixtures", "migrate", "makemigrations", "help", "")
 
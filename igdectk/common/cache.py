@@ -6,32 +6,144 @@
 # @date 2017-06-06
 # @copyright Copyright (c) 2017 INRA
 # @license MIT (see LICENSE file)
-# @details
+# @details The pages are keyed by view name, generation and arguments. Invalidating a view
+# increments its generation, making unreachable all the cached pages of the previous one.
+
+import hashlib
+import time
+
+from functools import wraps
 
 from django.core.cache import cache
 
+# prefix of the keys of the named cache
+KEY_PREFIX = 'igdectk.view'
+
+# seconds between two checks when waiting for a page generated by another worker
+LOCK_POLL_INTERVAL = 0.05
+
+
+def _generation_key(view_func_name):
+    return '%s:%s:generation' % (KEY_PREFIX, view_func_name)
+
+
+def get_generation(view_func_name):
+    """
+    Returns the current generation of the cached pages of a view.
+
+    A missing generation is initialized with the current time in milliseconds, so that the pages
+    of a previous generation, lost by the cache, cannot be reached again.
+
+    :param str view_func_name: Name of the view function.
+    :rtype: int
+    """
+    key = _generation_key(view_func_name)
+    generation = cache.get(key)
+
+    if generation is None:
+        cache.add(key, int(time.time() * 1000), None)
+        generation = cache.get(key)
+
+    return generation
+
 
-def named_cache_page(cache_timeout):
+def make_key(view_func_name, generation, kwargs):
+    """
+    Returns the cache key of a page, from the view name, its generation and the named arguments
+    of the view. Both the names and the values of the arguments are part of the key.
+    """
+    key = '%s:%s:%s' % (KEY_PREFIX, view_func_name, generation)
+
+    if kwargs:
+        # the repr quotes the values, so a value cannot be read as other arguments
+        params = repr(sorted(kwargs.items()))
+        key += ':' + hashlib.md5(params.encode('utf-8')).hexdigest()
+
+    return key
+
+
+def named_cache_page(cache_timeout, stale_timeout=0, lock_timeout=30):
     """
     Decorator for views that tries getting the page from the cache and
     populates the cache if the page isn't in the cache yet.
 
-    The cache is keyed by view name and arguments.
+    The cache is keyed by view name, generation and arguments. The whole pages of a view
+    are invalidated by :func:`invalidate_cache`.
+
+    Only one worker generates a missing page at a time, the others wait for it, at most
+    during lock_timeout. With a stale_timeout, an expired page is still given during this delay
+    while one worker generates it again.
+
+    Only the successful (200) and non streaming responses are cached.
+
+    :param int cache_timeout: Delay in seconds the page is fresh.
+    :param int stale_timeout: Delay in seconds after the expiration the page can still be given
+        during its regeneration.
+    :param int lock_timeout: Maximum duration in seconds of a page generation.
     """
     def wrapper(func):
-        def foo(*args, **kwargs):
-            key = func.__name__
-            if kwargs:
-                key += ':' + ':'.join([kwargs[key] for key in kwargs])
-
-            response = cache.get(key)
-            if not response:
-                response = func(*args, **kwargs)
-                cache.set(key, response, cache_timeout)
+        view_func_name = func.__name__
+
+        def generate(key, args, kwargs):
+            response = func(*args, **kwargs)
+
+            if response.status_code == 200 and not response.streaming:
+                # a template response must be rendered before to be pickled
+                if callable(getattr(response, 'render', None)):
+                    response.render()
+
+                cache.set(key, (response, time.time() + cache_timeout), cache_timeout + stale_timeout)
+
             return response
+
+        @wraps(func)
+        def foo(*args, **kwargs):
+            key = make_key(view_func_name, get_generation(view_func_name), kwargs)
+            lock_key = key + ':lock'
+
+            entry = cache.get(key)
+
+            if entry is not None:
+                response, fresh_until = entry
+
+                # fresh, or stale and in regeneration by another worker
+                if time.time() < fresh_until or not cache.add(lock_key, 1, lock_timeout):
+                    return response
+            elif not cache.add(lock_key, 1, lock_timeout):
+                # wait for the page generated by another worker
+                deadline = time.time() + lock_timeout
+
+                while time.time() < deadline:
+                    time.sleep(LOCK_POLL_INTERVAL)
+
+                    entry = cache.get(key)
+                    if entry is not None:
+                        return entry[0]
+
+                    if cache.get(lock_key) is None:
+                        break
+
+                return generate(key, args, kwargs)
+
+            try:
+                return generate(key, args, kwargs)
+            finally:
+                cache.delete(lock_key)
+
         return foo
     return wrapper
 
 
 def invalidate_cache(view_func_name):
-    cache.set(view_func_name, None, 0)
+    """
+    Invalidate all the cached pages of a view, whatever their arguments, by incrementing its generation.
+
+    :param str view_func_name: Name of the view function.
+    """
+    key = _generation_key(view_func_name)
+
+    try:
+        cache.incr(key)
+    except ValueError:
+        # no generation yet, so nothing cached
+        get_generation(view_func_name)
@@ -6,68 +6,869 @@
 # @date 2015-04-13
 # @copyright Copyright (c) 2015 INRA
 # @license MIT (see LICENSE file)
-# @details Python expression safe evaluator, supporting basic mathematics and booleans operators.
+# @details Python expression safe evaluator, supporting basic mathematics, comparisons and booleans
+# operators, conditional expressions, variables bound from a context and a whitelist of pure functions.
+# The expressions are compiled once into closures, and the constant parts are folded.
+# With NumPy, an expression can be evaluated on whole columns of numeric values at once.
 
 import ast
 import operator as op
 
+from functools import lru_cache, reduce
+
+try:
+    import numpy
+except ImportError:  # numpy is optional
+    numpy = None
+
+# types of the literal constants
+CONSTANT_TYPES = (str, bytes, bool, int, float, complex, type(None))
+
+# maximum number of distinct expressions kept compiled
+EXPR_CACHE_SIZE = 1024
+
+# maximum number of characters of an expression, checked before its parsing
+EXPR_MAX_CHARS = 1 << 16
+
+# maximum number of nodes (operands, operators, calls...) of an expression
+EXPR_MAX_NODES = 256
+
+# maximum number of bits of an integer computed by a power or a multiplication
+EXPR_MAX_INT_BITS = 65536
+
+# maximum size of a value computed by an addition or a multiplication, or given to the str, sum, max and min functions,
+# counting the characters of the strings and the items of the nested containers
+EXPR_MAX_LENGTH = 1 << 20
+
+
+def _size(value):
+    """
+    Returns the total number of items of a value, counting the characters of the strings and bytes,
+    and recursively the items of the lists, tuples, sets and dicts. A container referenced many
+    times counts each time, as str would repeat it, but it is walked once. The counting stops as
+    soon as the size exceeds EXPR_MAX_LENGTH.
+    """
+    sized = (str, bytes, dict, list, tuple, set, frozenset)
+    sizes = {}
+
+    def size(v):
+        if isinstance(v, (str, bytes)):
+            return len(v)
+
+        key = id(v)
+        if key in sizes:
+            return sizes[key]
+
+        # a container into itself is not counted again
+        sizes[key] = 0
+        total = len(v)
+
+        items = [item for pair in v.items() for item in pair] if isinstance(v, dict) else v
+
+        for item in items:
+            if isinstance(item, sized):
+                total += size(item)
+                if total > EXPR_MAX_LENGTH:
+                    break
+
+        sizes[key] = total
+        return total
+
+    return size(value) if isinstance(value, sized) else 0
+
+
+def _check_size(*args):
+    for arg in args:
+        if _size(arg) > EXPR_MAX_LENGTH:
+            raise ValueError("Value too large")
+
+
+def _safe_pow(a, b):
+    if isinstance(a, int) and isinstance(b, int) and b > 0 and abs(a) > 1:
+        # upper bound of the number of bits of the result
+        if a.bit_length() * b > EXPR_MAX_INT_BITS:
+            raise ValueError("Exponent too large: %s" % b)
+
+    return op.pow(a, b)
+
+
+def _safe_add(a, b):
+    if isinstance(a, (str, bytes, tuple, list)) and isinstance(b, (str, bytes, tuple, list)):
+        if _size(a) + _size(b) > EXPR_MAX_LENGTH:
+            raise ValueError("Sequence too large")
+
+    return op.add(a, b)
+
+
+def _safe_mul(a, b):
+    if isinstance(a, int) and isinstance(b, int):
+        if a.bit_length() + b.bit_length() > EXPR_MAX_INT_BITS:
+            raise ValueError("Integer too large")
+    elif isinstance(a, (str, bytes, tuple, list)) and isinstance(b, int):
+        if _size(a) * b > EXPR_MAX_LENGTH:
+            raise ValueError("Sequence too large")
+    elif isinstance(b, (str, bytes, tuple, list)) and isinstance(a, int):
+        if _size(b) * a > EXPR_MAX_LENGTH:
+            raise ValueError("Sequence too large")
+
+    return op.mul(a, b)
+
+
+def _safe_mod(a, b):
+    if isinstance(a, (str, bytes)):
+        raise TypeError("String formatting is not supported")
+
+    return op.mod(a, b)
+
+
+def _safe_str(value):
+    _check_size(value)
+
+    return str(value)
+
+
+def _safe_sum(iterable, start=0):
+    # the concatenation of sequences is quadratic
+    if not isinstance(start, (int, float, complex)):
+        raise TypeError("sum supports only numbers")
+
+    _check_size(iterable)
+
+    return sum(iterable, start)
+
+
+def _safe_extremum(function):
+    def extremum(*args, **kwargs):
+        _check_size(*args)
+
+        return function(*args, **kwargs)
+
+    return extremum
+
+
+def _safe_round(number, ndigits=None):
+    # rounding an integer computes 10 ** -ndigits
+    if isinstance(ndigits, int) and abs(ndigits) > EXPR_MAX_INT_BITS:
+        raise ValueError("Number of digits too large: %s" % ndigits)
+
+    return round(number, ndigits)
+
+
 # supported operators
-operators = {ast.Add: op.add, ast.Sub: op.sub, ast.Mult: op.mul,
-             ast.Div: op.truediv, ast.Pow: op.pow, ast.BitXor: op.xor,
-             ast.USub: op.neg}
-
-
-def _eval(node_or_string):
-    # if isinstance(node, ast.Num):  # <number>
-    #     return node.n
-    # elif isinstance(node, ast.Str):  # <string>
-    #     return node.s
-    # elif isinstance(node, ast.BinOp):  # <left> <operator> <right>
-    #     return operators[type(node.op)](_eval(node.left), _eval(node.right))
-    # elif isinstance(node, ast.UnaryOp):  # <operator> <operand> e.g., -1
-    #     return operators[type(node.op)](_eval(node.operand))
-    # else:
-    #     raise TypeError(node)
+operators = {ast.Add: _safe_add, ast.Sub: op.sub, ast.Mult: _safe_mul,
+             ast.Div: op.truediv, ast.FloorDiv: op.floordiv, ast.Mod: _safe_mod,
+             ast.Pow: _safe_pow, ast.BitXor: op.xor,
+             ast.USub: op.neg, ast.UAdd: op.pos, ast.Not: op.not_}
+
+# supported comparison operators
+comparators = {ast.Eq: op.eq, ast.NotEq: op.ne, ast.Lt: op.lt, ast.LtE: op.le,
+               ast.Gt: op.gt, ast.GtE: op.ge, ast.Is: op.is_, ast.IsNot: op.is_not,
+               ast.In: lambda a, b: a in b, ast.NotIn: lambda a, b: a not in b}
+
+# supported functions, only pure ones
+functions = {
+    'abs': abs, 'all': all, 'any': any, 'bool': bool, 'float': float, 'int': int, 'len': len,
+    'max': _safe_extremum(max), 'min': _safe_extremum(min), 'round': _safe_round,
+    'str': _safe_str, 'sum': _safe_sum,
+}
+
+
+def _is_immutable(value):
+    if isinstance(value, CONSTANT_TYPES):
+        return True
+    elif type(value) is tuple:
+        return all(_is_immutable(v) for v in value)
+
+    return False
+
+
+def _fold(function, *args, **kwargs):
+    """
+    Returns the compiled constant (True, value) of a function called with constant arguments,
+    or None if the value is mutable or if its computation fails. The errors are then raised
+    at the evaluation, only if this part of the expression is evaluated.
+    """
+    try:
+        value = function(*args, **kwargs)
+    except Exception:
+        return None
+
+    return (True, value) if _is_immutable(value) else None
+
+
+def _as_function(compiled):
+    constant, value = compiled
+
+    if constant:
+        return lambda context: value
+
+    return value
+
+
+def _load(name):
+    def load(context):
+        try:
+            return context[name]
+        except (KeyError, TypeError):
+            raise NameError("name '%s' is not defined" % name)
+
+    return load
+
+
+def _compile(node):
+    """
+    Compile a node of the AST of an expression.
+
+    Returns a pair (constant, value), where value is the value of the node if constant is True,
+    else a function taking the context and computing it. The immutable values (literals, tuples of
+    constants and the operations on constants) are constants, the lists, sets and dicts are
+    created again at each evaluation.
+
+    :raise TypeError: If a type of node is not supported.
+    :raise KeyError: If an operator is not supported.
+    """
+    if isinstance(node, ast.Constant):
+        if not isinstance(node.value, CONSTANT_TYPES):
+            raise TypeError(node)
+        return True, node.value
+
+    elif isinstance(node, ast.Name):
+        return False, _load(node.id)
+
+    elif isinstance(node, (ast.Tuple, ast.List, ast.Set)):
+        elts = [_compile(elt) for elt in node.elts]
+
+        if all(constant for constant, value in elts):
+            values = tuple(value for constant, value in elts)
+
+            if isinstance(node, ast.Tuple):
+                return True, values
+            elif isinstance(node, ast.List):
+                return False, lambda context: list(values)
+            else:
+                return False, lambda context: set(values)
+
+        funcs = tuple(_as_function(elt) for elt in elts)
+        container = tuple if isinstance(node, ast.Tuple) else list if isinstance(node, ast.List) else set
+
+        return False, lambda context: container([func(context) for func in funcs])
+
+    elif isinstance(node, ast.Dict):
+        if any(key is None for key in node.keys):
+            # dict unpacking
+            raise TypeError(None)
+
+        items = [(_compile(k), _compile(v)) for k, v in zip(node.keys, node.values)]
+
+        if all(k[0] and v[0] for k, v in items):
+            pairs = tuple((k[1], v[1]) for k, v in items)
+            return False, lambda context: dict(pairs)
+
+        funcs = tuple((_as_function(k), _as_function(v)) for k, v in items)
+
+        return False, lambda context: {k(context): v(context) for k, v in funcs}
+
+    elif isinstance(node, ast.BinOp):
+        operator = operators[type(node.op)]
+        left, right = _compile(node.left), _compile(node.right)
+
+        if left[0] and right[0]:
+            # constant folding
+            folded = _fold(operator, left[1], right[1])
+            if folded is not None:
+                return folded
+
+        left, right = _as_function(left), _as_function(right)
+
+        return False, lambda context: operator(left(context), right(context))
+
+    elif isinstance(node, ast.UnaryOp):
+        operator = operators[type(node.op)]
+        operand = _compile(node.operand)
+
+        if operand[0]:
+            folded = _fold(operator, operand[1])
+            if folded is not None:
+                return folded
+
+        operand = _as_function(operand)
+
+        return False, lambda context: operator(operand(context))
+
+    elif isinstance(node, ast.Compare):
+        ops = tuple(comparators[type(o)] for o in node.ops)
+        operands = [_compile(node.left)] + [_compile(c) for c in node.comparators]
+
+        funcs = tuple(_as_function(operand) for operand in operands)
+
+        if len(ops) == 1:
+            operator, left, right = ops[0], funcs[0], funcs[1]
+            compare = lambda context: operator(left(context), right(context))
+        else:
+            # chained comparison, each operand evaluated once
+            def compare(context):
+                left = funcs[0](context)
+
+                for operator, func in zip(ops, funcs[1:]):
+                    right = func(context)
+                    result = operator(left, right)
+                    if not result:
+                        return result
+                    left = right
+
+                return result
+
+        if all(constant for constant, value in operands):
+            folded = _fold(compare, None)
+            if folded is not None:
+                return folded
+
+        return False, compare
+
+    elif isinstance(node, ast.BoolOp):
+        values = [_compile(value) for value in node.values]
+        funcs = tuple(_as_function(value) for value in values)
+        is_and = isinstance(node.op, ast.And)
+
+        def boolop(context):
+            for func in funcs:
+                value = func(context)
+                if bool(value) is not is_and:
+                    return value
+
+            return value
+
+        if all(constant for constant, value in values):
+            return True, boolop(None)
+
+        return False, boolop
+
+    elif isinstance(node, ast.IfExp):
+        test, body, orelse = _compile(node.test), _compile(node.body), _compile(node.orelse)
+
+        if test[0]:
+            # only the selected branch is kept
+            return body if test[1] else orelse
+
+        test, body, orelse = _as_function(test), _as_function(body), _as_function(orelse)
+
+        return False, lambda context: body(context) if test(context) else orelse(context)
+
+    elif isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in functions:
+            raise TypeError(node.func)
+
+        if any(isinstance(arg, ast.Starred) for arg in node.args) or any(kw.arg is None for kw in node.keywords):
+            # arguments unpacking
+            raise TypeError(node)
+
+        function = functions[node.func.id]
+        args = [_compile(arg) for arg in node.args]
+        kwargs = [(kw.arg, _compile(kw.value)) for kw in node.keywords]
+
+        if all(a[0] for a in args) and all(v[0] for k, v in kwargs):
+            # the functions are pure
+            folded = _fold(function, *[a[1] for a in args], **{k: v[1] for k, v in kwargs})
+            if folded is not None:
+                return folded
+
+        args = tuple(_as_function(arg) for arg in args)
+        kwargs = tuple((k, _as_function(v)) for k, v in kwargs)
+
+        if kwargs:
+            return False, lambda context: function(
+                *[arg(context) for arg in args], **{k: v(context) for k, v in kwargs})
+
+        return False, lambda context: function(*[arg(context) for arg in args])
+
+    else:
+        raise TypeError(node)
+
+
+# magnitude from which an int64 result is considered overflowed, with a margin for its estimation as a float
+VECTOR_INT_BOUND = 2.0 ** 63 * (1 - 2.0 ** -40)
+
+# largest magnitude of the integers exactly converted to floats
+VECTOR_FLOAT_EXACT = 2 ** 53
+
+# range of the int64 type
+VECTOR_INT_MIN, VECTOR_INT_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+def _number_array(value):
+    """
+    Returns a numeric value as a bool, int64 or float64 array, the types having the same
+    arithmetic as the Python bool, int and float.
+
+    :raise TypeError: If the value is not numeric.
+    :raise OverflowError: If an unsigned integer exceeds the int64 type.
+    """
+    value = numpy.asarray(value)
+    kind = value.dtype.kind
+
+    if kind == 'b':
+        return value
+    elif kind == 'u' and value.size and value.max() > VECTOR_INT_MAX:
+        raise OverflowError("Integer too large")
+    elif kind in 'iu':
+        return value.astype(numpy.int64, copy=False)
+    elif kind == 'f':
+        return value.astype(numpy.float64, copy=False)
+
+    raise TypeError("Not a numeric value")
+
+
+def _operand(value):
+    # the booleans are integers for the arithmetic
+    value = _number_array(value)
+
+    return value.astype(numpy.int64) if value.dtype.kind == 'b' else value
+
+
+def _check_int_overflow(result, estimate):
+    if result.dtype.kind == 'i' and (numpy.abs(estimate) >= VECTOR_INT_BOUND).any():
+        raise OverflowError("Integer overflow")
+
+
+def _check_exact_ints(*values):
+    for value in values:
+        if value.dtype.kind == 'i' and ((value > VECTOR_FLOAT_EXACT) | (value < -VECTOR_FLOAT_EXACT)).any():
+            raise OverflowError("Integer not exact as a float")
+
+
+def _vector_arithmetic(operator):
+    def arithmetic(a, b):
+        a, b = _operand(a), _operand(b)
+        result = operator(a, b)
+
+        if result.dtype.kind == 'i':
+            _check_int_overflow(result, operator(a.astype(numpy.float64), b.astype(numpy.float64)))
+
+        return result
+
+    return arithmetic
+
+
+def _vector_truediv(a, b):
+    a, b = _operand(a), _operand(b)
+
+    # Python divides the integers exactly, before rounding
+    if a.dtype.kind == 'i' and b.dtype.kind == 'i':
+        _check_exact_ints(a, b)
+
+    return a / b
+
+
+def _vector_pow(a, b):
+    a, b = _operand(a), _operand(b)
+
+    if a.dtype.kind == 'i' and b.dtype.kind == 'i':
+        if (b < 0).any():
+            # as for Python, a negative exponent gives a float
+            return numpy.power(a.astype(numpy.float64), b)
+
+        result = numpy.power(a, b)
+        _check_int_overflow(result, numpy.power(a.astype(numpy.float64), b.astype(numpy.float64)))
+
+        return result
+
+    return numpy.power(a, b)
+
+
+def _vector_unary(operator):
+    def unary(a):
+        a = _operand(a)
+
+        # the opposite of the smallest int64 overflows
+        if a.dtype.kind == 'i' and (a == VECTOR_INT_MIN).any():
+            raise OverflowError("Integer overflow")
+
+        return operator(a)
+
+    return unary
+
+
+def _vector_comparator(operator):
+    def compare(a, b):
+        a, b = _number_array(a), _number_array(b)
+
+        # Python compares exactly the integers to the floats
+        if a.dtype.kind == 'f' or b.dtype.kind == 'f':
+            _check_exact_ints(a, b)
+
+        return operator(a, b)
+
+    return compare
+
+
+def _vector_int(a):
+    a = _operand(a)
+
+    if a.dtype.kind == 'f':
+        if not numpy.isfinite(a).all() or (numpy.abs(a) >= VECTOR_INT_BOUND).any():
+            raise OverflowError("Float not convertible to int64")
+
+        return a.astype(numpy.int64)
+
+    return a
+
+
+def _vector_round(a):
+    a = _operand(a)
+
+    # without number of digits, Python rounds half to even, as NumPy
+    return _vector_int(numpy.round(a)) if a.dtype.kind == 'f' else a
+
+
+def _vector_extremum(comparator):
+    def extremum(*args):
+        if len(args) < 2:
+            # extremum of an iterable
+            raise TypeError(comparator)
+
+        # as Python, the first of the extreme values, even if nan
+        result = _number_array(args[0])
+
+        for arg in args[1:]:
+            arg = _number_array(arg)
+            result = numpy.where(comparator(arg, result), arg, result)
+
+        return result
+
+    return extremum
+
+
+if numpy is not None:
+    # supported operators on arrays
+    vector_operators = {ast.Add: _vector_arithmetic(op.add), ast.Sub: _vector_arithmetic(op.sub),
+                        ast.Mult: _vector_arithmetic(op.mul), ast.Div: _vector_truediv,
+                        ast.FloorDiv: _vector_arithmetic(op.floordiv), ast.Mod: _vector_arithmetic(op.mod),
+                        ast.Pow: _vector_pow, ast.BitXor: lambda a, b: op.xor(_number_array(a), _number_array(b)),
+                        ast.USub: _vector_unary(op.neg), ast.UAdd: _vector_unary(op.pos),
+                        ast.Not: numpy.logical_not}
+
+    # supported comparison operators on arrays
+    vector_comparators = {ast.Eq: _vector_comparator(op.eq), ast.NotEq: _vector_comparator(op.ne),
+                          ast.Lt: _vector_comparator(op.lt), ast.LtE: _vector_comparator(op.le),
+                          ast.Gt: _vector_comparator(op.gt), ast.GtE: _vector_comparator(op.ge)}
+
+    # supported functions on arrays
+    vector_functions = {
+        'abs': _vector_unary(numpy.abs),
+        'bool': lambda a: _number_array(a).astype(numpy.bool_),
+        'float': lambda a: _number_array(a).astype(numpy.float64),
+        'int': _vector_int,
+        'max': _vector_extremum(vector_comparators[ast.Gt]),
+        'min': _vector_extremum(vector_comparators[ast.Lt]),
+        'round': _vector_round,
+    }
+else:
+    vector_operators = vector_comparators = vector_functions = {}
+
+
+def _compile_vector(node):
+    """
+    Compile a node of the AST of an expression into a function taking the variables, as NumPy arrays
+    or numeric scalars, and computing the values of the node for all the rows at once.
+
+    The booleans and conditional expressions evaluate all their operands, and select the values
+    of each row using numpy.where.
+
+    :raise TypeError: If a type of node, a constant or a function cannot be vectorized.
+    :raise KeyError: If an operator cannot be vectorized.
+    """
+    if isinstance(node, ast.Constant):
+        if not isinstance(node.value, (bool, int, float)):
+            raise TypeError(node)
+        value = node.value
+        return lambda variables: value
+
+    elif isinstance(node, ast.Name):
+        return _load(node.id)
+
+    elif isinstance(node, ast.BinOp):
+        operator = vector_operators[type(node.op)]
+        left, right = _compile_vector(node.left), _compile_vector(node.right)
+
+        return lambda variables: operator(left(variables), right(variables))
+
+    elif isinstance(node, ast.UnaryOp):
+        operator = vector_operators[type(node.op)]
+        operand = _compile_vector(node.operand)
+
+        return lambda variables: operator(operand(variables))
+
+    elif isinstance(node, ast.Compare):
+        ops = tuple(vector_comparators[type(o)] for o in node.ops)
+        funcs = (_compile_vector(node.left),) + tuple(_compile_vector(c) for c in node.comparators)
+
+        def compare(variables):
+            values = [func(variables) for func in funcs]
+            return reduce(numpy.logical_and, [
+                operator(values[i], values[i + 1]) for i, operator in enumerate(ops)])
+
+        return compare
+
+    elif isinstance(node, ast.BoolOp):
+        funcs = tuple(_compile_vector(value) for value in node.values)
+        is_and = isinstance(node.op, ast.And)
+
+        def boolop(variables):
+            # from the last operand, as (a and (b and c))
+            result = funcs[-1](variables)
+
+            for func in reversed(funcs[:-1]):
+                value = func(variables)
+                truth = numpy.asarray(value).astype(numpy.bool_)
+                result = numpy.where(truth, result, value) if is_and else numpy.where(truth, value, result)
+
+            return result
+
+        return boolop
+
+    elif isinstance(node, ast.IfExp):
+        test, body, orelse = _compile_vector(node.test), _compile_vector(node.body), _compile_vector(node.orelse)
+
+        return lambda variables: numpy.where(
+            numpy.asarray(test(variables)).astype(numpy.bool_), body(variables), orelse(variables))
+
+    elif isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in vector_functions:
+            raise TypeError(node.func)
+
+        if any(isinstance(arg, ast.Starred) for arg in node.args) or any(kw.arg is None for kw in node.keywords):
+            raise TypeError(node)
+
+        function = vector_functions[node.func.id]
+        args = tuple(_compile_vector(arg) for arg in node.args)
+        kwargs = tuple((kw.arg, _compile_vector(kw.value)) for kw in node.keywords)
+
+        return lambda variables: function(
+            *[arg(variables) for arg in args], **{k: v(variables) for k, v in kwargs})
+
+    else:
+        raise TypeError(node)
+
+
+class Expression(object):
+    """
+    Compiled expression, evaluated many times against different contexts.
+
+    :ivar str expr: Text of the expression.
+    :ivar frozenset names: Names of the variables of the expression.
+    :ivar bool constant: True if the expression does not depend on the context.
+    """
+
+    __slots__ = ('expr', 'names', 'constant', '_func', '_tree', '_vector')
+
+    def __init__(self, expr, names, compiled, tree):
+        self.expr = expr
+        self.names = names
+        self.constant = compiled[0]
+        self._func = _as_function(compiled)
+        self._tree = tree
+        self._vector = None
+
+    def evaluate(self, context=None):
+        """
+        Evaluate the expression.
+
+        :param dict context: Values of the variables, by name.
+        :raise NameError: If a variable is not defined by the context.
+
+        :return: According to the expression, return an object of its type.
+        """
+        return self._func(context)
+
+    __call__ = evaluate
+
+    def vectorized(self):
+        """
+        Returns the function evaluating the expression on NumPy arrays, compiled at the first call,
+        or None if NumPy is not available or the expression cannot be vectorized.
+        """
+        if self._vector is None:
+            try:
+                self._vector = _compile_vector(self._tree) if numpy is not None else False
+            except (TypeError, KeyError):
+                self._vector = False
+
+        return self._vector or None
+
+    def __repr__(self):
+        return "Expression(%r)" % self.expr
+
+
+@lru_cache(maxsize=EXPR_CACHE_SIZE)
+def compile_expr(expr):
+    """
+    Compile a Python expression into an :class:`Expression`, evaluated by calling it with
+    an optional context. The compiled expressions are cached by text, so the same expression
+    is parsed once.
+
+    The constant expressions are evaluated at compilation. The lists, sets and dicts are
+    created again at each call, so the result can be modified by the caller.
+
+    :param str expr: Literal expression to compile.
+    :raise TypeError: If a type of the expression or a function is not supported.
+    :raise SyntaxError: If the expression contains an error.
+    :raise ValueError: If the expression has more than EXPR_MAX_CHARS characters or EXPR_MAX_NODES nodes.
+
+    :return: Compiled expression.
+    :rtype: Expression
+    """
+    _check_length(expr)
+
+    body = ast.parse(expr, mode='eval').body
+
+    nodes = [node for node in ast.walk(body) if isinstance(node, ast.expr)]
+    if len(nodes) > EXPR_MAX_NODES:
+        raise ValueError("Expression too large: %i nodes" % len(nodes))
+
+    # the names of the called functions are not variables
+    called = {id(node.func) for node in nodes if isinstance(node, ast.Call)}
+    names = frozenset(node.id for node in nodes if isinstance(node, ast.Name) and id(node) not in called)
+
+    return Expression(expr, names, _compile(body), body)
+
+
+def _check_length(expr):
+    # the parsing itself uses a memory and a time growing with the expression
+    if len(expr) > EXPR_MAX_CHARS:
+        raise ValueError("Expression too long: %i characters" % len(expr))
+
+
+def _eval(node_or_string, context=None):
     if isinstance(node_or_string, str):
+        _check_length(node_or_string)
         node_or_string = ast.parse(node_or_string, mode='eval')
     if isinstance(node_or_string, ast.Expression):
         node_or_string = node_or_string.body
 
-    def _convert(node):
-        if isinstance(node, (ast.Str, ast.Bytes)):
-            return node.s
-        elif isinstance(node, ast.Num):
-            return node.n
-        elif isinstance(node, ast.Tuple):
-            return tuple(map(_convert, node.elts))
-        elif isinstance(node, ast.List):
-            return list(map(_convert, node.elts))
-        elif isinstance(node, ast.Set):
-            return set(map(_convert, node.elts))
-        elif isinstance(node, ast.Dict):
-            return dict((_convert(k), _convert(v)) for k, v
-                        in zip(node.keys, node.values))
-        elif isinstance(node, ast.NameConstant):
-            return node.value
-        elif isinstance(node, ast.BinOp):
-            return operators[type(node.op)](_eval(node.left), _eval(node.right))
-        elif isinstance(node, ast.UnaryOp):
-            return operators[type(node.op)](_eval(node.operand))
-        else:
-            raise TypeError(node)
-    return _convert(node_or_string)
+    return _as_function(_compile(node_or_string))(context)
 
 
-def eval_expr(expr):
+def eval_expr(expr, context=None):
     """
-    Evaluate a Python expression safely. Support unaries and binaries
-    operators, string, numeric, tuple, list, dict, set.
+    Evaluate a Python expression safely. Support unaries, binaries, comparisons and booleans
+    operators, conditional expressions, string, numeric, tuple, list, dict, set, the variables
+    given by the context, and the functions abs, all, any, bool, float, int, len, max, min,
+    round, str and sum.
+
+    The expression is compiled at its first evaluation (see :func:`compile_expr`).
 
     :param str expr: Literal expression to Evaluate
+    :param dict context: Values of the variables, by name.
     :raise TypeError: If a type of the expression is not supported or
         the expression contains an error.
+    :raise NameError: If a variable is not defined by the context.
+    :raise ValueError: If the expression exceeds the size limits.
 
     :return: According to the expression, return an object of its type.
     :rtype: any
     """
-    return _eval(ast.parse(expr, mode='eval').body)
+    return compile_expr(expr)._func(context)
+
+
+def _evaluate_vector(expr, columns, context, size):
+    """
+    Evaluate an expression on whole columns with NumPy, or returns None if the expression, the values
+    or one of the results cannot be computed exactly as by Python.
+    """
+    vector = expr.vectorized()
+    if vector is None:
+        return None
+
+    try:
+        variables = {name: _number_array(value) for name, value in (context or {}).items() if name in expr.names}
+
+        if any(value.ndim != 0 for value in variables.values()):
+            return None
+
+        variables.update(
+            (name, _number_array(column)) for name, column in columns.items() if name in expr.names)
+
+        if any(value.ndim > 1 for value in variables.values()):
+            return None
+
+        # the divisions by zero, the invalid and the overflowed floats raise, as in Python
+        with numpy.errstate(all='raise'):
+            result = numpy.asarray(vector(variables))
+    except (TypeError, ValueError, ArithmeticError):
+        return None
+
+    if result.dtype.kind not in 'bif':
+        return None
+
+    if result.ndim == 0:
+        result = numpy.full(size, result)
+
+    return result if result.shape == (size,) else None
+
+
+def evaluate_batch(expr, columns, context=None):
+    """
+    Evaluate an expression for each row of columns of values, for example to score the
+    records of an import.
+
+    When NumPy is available and a column is a NumPy array, the whole columns are computed at once,
+    if they are numeric and if the expression only uses numeric constants, the arithmetic, comparisons,
+    booleans and conditional operators, and the functions abs, bool, float, int, max, min and round
+    (without number of digits). The columns are computed as bool, int64 or float64 arrays. When an
+    integer would overflow, when a division by zero or an invalid float operation occurs, the
+    expression is evaluated again row by row on the Python values, so the results are the ones of
+    Python, with its exceptions. Only the type of the values may differ, the rows of a result mixing
+    integers and floats being converted to floats.
+
+    Otherwise, and always for lists, the expression is evaluated row by row.
+
+    :param expr: Expression to evaluate, as text or compiled by :func:`compile_expr`.
+    :type expr: str or Expression
+    :param dict columns: Values of the variables for each row, as lists or NumPy arrays of the same
+        length, by variable name.
+    :param dict context: Values of the variables shared by all the rows, by name.
+    :raise ValueError: If the columns have different lengths.
+    :raise NameError: If a variable is neither a column nor defined by the context.
+
+    :return: Values of the expression for each row, as a NumPy array if a column is a NumPy array,
+        else as a list.
+    :rtype: list or numpy.ndarray
+    """
+    if isinstance(expr, str):
+        expr = compile_expr(expr)
+
+    lengths = {len(column) for column in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError("Columns must have the same length")
+
+    size = lengths.pop() if lengths else 0
+    as_array = numpy is not None and any(isinstance(column, numpy.ndarray) for column in columns.values())
+
+    if as_array:
+        result = _evaluate_vector(expr, columns, context, size)
+        if result is not None:
+            return result
+
+    func = expr._func
+    names = tuple(columns)
+
+    # the Python values of the arrays, for the Python arithmetic
+    values = [column.tolist() if as_array and isinstance(column, numpy.ndarray) else column
+              for column in columns.values()]
+
+    # the same context for each row, the compiled expressions do not keep it
+    variables = dict(context or {})
+    results = []
+
+    for row in zip(*values):
+        variables.update(zip(names, row))
+        results.append(func(variables))
+
+    if not as_array:
+        return results
+
+    # the integers out of the int64 type are kept exact
+    if any(type(value) is int and not VECTOR_INT_MIN <= value <= VECTOR_INT_MAX for value in results):
+        return numpy.array(results, dtype=object)
+
+    return numpy.asarray(results)
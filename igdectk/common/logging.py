@@ -1,7 +1,7 @@
 # -*- coding: utf-8; -*-
 #
 # @file logging.py
-# @brief Useful Python logger formatter for VT100 compatibles terminals.
+# @brief Useful Python logger formatter for VT100 compatibles terminals, and background traceback logger.
 # @author Frédéric SCHERMA (INRA UMR1095)
 # @date 2015-04-13
 # @copyright Copyright (c) 2015 INRA
@@ -10,7 +10,11 @@
 
 import logging
 import copy
+import os
+import queue
 import sys
+import threading
+import traceback
 
 
 class ColoredFormatter(logging.Formatter):
@@ -39,3 +43,77 @@ class ColoredFormatter(logging.Formatter):
             return logging.Formatter.format(self, _record)
         else:
             return logging.Formatter.format(self, record)
+
+
+class TracebackLogger(object):
+    """
+    Log the traceback of exceptions from a background thread, in place of formatting it
+    into the thread raising the exception.
+
+    The exceptions are captured as :class:`traceback.TracebackException`, without their frames
+    nor the source lines, and put into a bounded queue. A daemon thread formats their traceback
+    and writes them to the logger at the error level. When the queue is full, only the
+    representation of the exception is logged, without traceback. The thread is started at
+    the first exception, and again into a forked process.
+
+    :param logging.Logger logger: Destination logger.
+    :param int maxsize: Maximum number of exceptions waiting for their traceback.
+    """
+
+    def __init__(self, logger, maxsize=1000):
+        self.logger = logger
+        self.maxsize = maxsize
+
+        self._lock = threading.Lock()
+        self._queue = None
+        self._pid = None
+
+    def _get_queue(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue(self.maxsize)
+
+                    thread = threading.Thread(target=self._run, args=(self._queue,), name='traceback-logger')
+                    thread.daemon = True
+                    thread.start()
+
+                    self._pid = os.getpid()
+
+        return self._queue
+
+    def _run(self, exceptions):
+        while True:
+            exception = exceptions.get()
+
+            try:
+                self.logger.error(''.join(exception.format()))
+            except Exception:
+                # reported as by logging.Handler.handleError, and the thread continues
+                if logging.raiseExceptions and sys.stderr:
+                    sys.stderr.write('--- Traceback logging error ---\n')
+                    traceback.print_exc(file=sys.stderr)
+            finally:
+                exceptions.task_done()
+
+    def log(self, exception):
+        """
+        Queue an exception for its traceback to be logged.
+
+        :param BaseException exception: Raised exception, with its traceback.
+        """
+        # the queue does not keep the frames of the traceback alive
+        captured = traceback.TracebackException(
+            type(exception), exception, exception.__traceback__, lookup_lines=False, capture_locals=False)
+
+        try:
+            self._get_queue().put_nowait(captured)
+        except queue.Full:
+            self.logger.error(repr(exception))
+
+    def join(self):
+        """
+        Wait until all the queued tracebacks are logged.
+        """
+        if self._pid == os.getpid():
+            self._queue.join()
@@ -0,0 +1,155 @@
+# -*- coding: utf-8; -*-
+#
+# @file serialization.py
+# @brief Fast serialization of model instances to Python objects.
+# @author agent (INRA UMR1095)
+# @date 2026-10-18
+# @copyright Copyright (c) 2026 INRA
+# @license MIT (see LICENSE file)
+# @details The fields of a model class are introspected once into a serialization plan,
+# shared by the JSON and XML encoders.
+
+import datetime
+import decimal
+
+from operator import attrgetter
+
+from django.db.models import Field
+
+# types of the values given as is, the others are converted to string (see django.utils.encoding.is_protected_type)
+PROTECTED_TYPES = (type(None), int, float, decimal.Decimal, datetime.datetime, datetime.date, datetime.time)
+
+# fast check of the values not converted, for the fields using the default value_to_string (str)
+PLAIN_EXACT_TYPES = frozenset(PROTECTED_TYPES + (bool, str))
+
+# plan by model class
+_plans = {}
+
+
+class ModelPlan(object):
+    """
+    Serialization plan of a model class, giving the same result as the Django python serializer
+    (without natural keys), that is a dict with the model label, the primary key, and a
+    dict of the fields, the foreign keys by their attname value, and the many to many
+    as a list of primary keys.
+
+    :param model: Model class.
+    """
+
+    def __init__(self, model):
+        self.label = str(model._meta)
+
+        # use the concrete parent class for the fields of the proxy models
+        concrete_model = model._meta.concrete_model
+
+        self.pk = self._field_plan(model._meta.pk)
+
+        # fields and foreign keys are read from their attname
+        fields = [field for field in concrete_model._meta.local_fields if field.serialize]
+
+        self.names = tuple(field.name for field in fields)
+
+        # field instance only when its value_to_string method is overridden
+        self.converters = tuple(
+            None if type(field).value_to_string is Field.value_to_string else field for field in fields)
+
+        if not fields:
+            self.values = lambda obj: ()
+        elif all(type(field).value_from_object is Field.value_from_object for field in fields):
+            getter = attrgetter(*(field.attname for field in fields))
+            self.values = getter if len(fields) > 1 else lambda obj: (getter(obj),)
+        else:
+            self.values = lambda obj: tuple(field.value_from_object(obj) for field in fields)
+
+        # many to many having an automatic through model
+        self.m2m = [field.name for field in concrete_model._meta.many_to_many
+                    if field.serialize and field.remote_field.through._meta.auto_created]
+
+    @staticmethod
+    def _field_plan(field):
+        """
+        Returns (name, attname, field, direct value, direct to string) where the flags are True when
+        the field does not override the default value_from_object or value_to_string methods.
+        """
+        return (
+            field.name,
+            field.attname,
+            field,
+            type(field).value_from_object is Field.value_from_object,
+            type(field).value_to_string is Field.value_to_string)
+
+    @staticmethod
+    def _value(obj, field_plan):
+        name, attname, field, direct_value, direct_string = field_plan
+
+        value = getattr(obj, attname) if direct_value else field.value_from_object(obj)
+
+        if isinstance(value, PROTECTED_TYPES):
+            return value
+
+        return str(value) if direct_string else field.value_to_string(obj)
+
+    def to_python(self, obj):
+        """
+        Serialize a model instance of the class of the plan.
+
+        :rtype: dict
+        """
+        fields = {}
+
+        for name, value, converter in zip(self.names, self.values(obj), self.converters):
+            if converter is None:
+                if type(value) not in PLAIN_EXACT_TYPES and not isinstance(value, PROTECTED_TYPES):
+                    value = str(value)
+            elif not isinstance(value, PROTECTED_TYPES):
+                value = converter.value_to_string(obj)
+
+            fields[name] = value
+
+        for name in self.m2m:
+            manager = getattr(obj, name)
+
+            # prefetched relations are not queried again
+            if name in getattr(obj, '_prefetched_objects_cache', ()):
+                related = manager.all()
+            else:
+                related = manager.iterator()
+
+            fields[name] = [get_plan(type(r)).primary_key(r) for r in related]
+
+        return {'model': self.label, 'pk': self._value(obj, self.pk), 'fields': fields}
+
+    def primary_key(self, obj):
+        """
+        Returns the serialized primary key of a model instance.
+        """
+        return self._value(obj, self.pk)
+
+
+def get_plan(model):
+    """
+    Returns the serialization plan of a model class, created at the first call.
+
+    :rtype: ModelPlan
+    """
+    plan = _plans.get(model)
+
+    if plan is None:
+        plan = _plans[model] = ModelPlan(model)
+
+    return plan
+
+
+def model_to_python(obj):
+    """
+    Serialize a model instance into a dict, as serializers.serialize('python', [obj])[0].
+    """
+    return get_plan(type(obj)).to_python(obj)
+
+
+def queryset_to_python(queryset):
+    """
+    Serialize the model instances of an iterable (QuerySet or list of models) into a list of dicts,
+    as serializers.serialize('python', queryset).
+    """
+    return [get_plan(type(obj)).to_python(obj) for obj in queryset]
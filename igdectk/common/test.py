@@ -0,0 +1,562 @@
+# -*- coding: utf-8; -*-
+#
+# @file test.py
+# @brief common sub-package unit tests.
+# @author agent (INRA UMR1095)
+# @date 2026-10-18
+# @copyright Copyright (c) 2026 INRA
+# @license MIT (see LICENSE file)
+# @details
+
+import datetime
+import decimal
+import io
+import time
+import unittest
+import weakref
+
+from contextlib import contextmanager
+from unittest import mock
+
+from igdectk.testapp import setup
+
+setup()
+
+from django.apps import apps  # noqa
+from django.contrib.auth.models import Group, Permission, User  # noqa
+from django.core import serializers  # noqa
+from django.core.cache import cache  # noqa
+from django.db import transaction  # noqa
+from django.db.models.signals import post_migrate  # noqa
+from django.http import HttpResponse  # noqa
+from django.test import RequestFactory, TestCase  # noqa
+
+from igdectk.testapp.models import Author, Book, Settings  # noqa
+
+from . import apphelpers  # noqa
+from .cache import get_generation, invalidate_cache, make_key, named_cache_page  # noqa
+from .evaluator import compile_expr, eval_expr, evaluate_batch, numpy  # noqa
+from .logging import TracebackLogger  # noqa
+from .serialization import get_plan, model_to_python, queryset_to_python  # noqa
+
+
+class TestEvaluator(unittest.TestCase):
+
+    def test_literals(self):
+        self.assertEqual(eval_expr("'fr'"), 'fr')
+        self.assertEqual(eval_expr("b'fr'"), b'fr')
+        self.assertEqual(eval_expr("None"), None)
+        self.assertEqual(eval_expr("(1, 'a', True)"), (1, 'a', True))
+        self.assertEqual(eval_expr("{'a': [1, 2], 'b': {3}}"), {'a': [1, 2], 'b': {3}})
+
+    def test_operators(self):
+        self.assertEqual(eval_expr("3600 * 24 * 7"), 604800)
+        self.assertEqual(eval_expr("-2 ** 2 + 1 / 4"), -3.75)
+        self.assertEqual(eval_expr("6 ^ 3"), 5)
+        self.assertEqual(eval_expr("[1 + 1, (2 - 1,)]"), [2, (1,)])
+
+    def test_compiled_once(self):
+        self.assertIs(compile_expr("1 + 2"), compile_expr("1 + 2"))
+        self.assertEqual(compile_expr("1 + 2")(), 3)
+
+    def test_mutable_not_shared(self):
+        value = eval_expr("{'a': [1, 2]}")
+        value['b'] = 3
+        self.assertEqual(eval_expr("{'a': [1, 2]}"), {'a': [1, 2]})
+
+        value = eval_expr("[1, 2]")
+        value.append(3)
+        self.assertEqual(eval_expr("[1, 2]"), [1, 2])
+
+    def test_unsupported(self):
+        self.assertRaises(TypeError, eval_expr, "__import__('os')")
+        self.assertRaises(TypeError, eval_expr, "open('f')")
+        self.assertRaises(TypeError, eval_expr, "'a'.upper()")
+        self.assertRaises(TypeError, eval_expr, "'%s' % 1")
+        self.assertRaises(KeyError, eval_expr, "1 << 2")
+        self.assertRaises(SyntaxError, eval_expr, "1 +")
+
+    def test_context(self):
+        expr = compile_expr("price * (1 + rate) if price > 0 else 0")
+        self.assertEqual(expr.names, {'price', 'rate'})
+        self.assertFalse(expr.constant)
+        self.assertEqual(expr({'price': 10, 'rate': 0.5}), 15)
+        self.assertEqual(expr({'price': -1, 'rate': 0.5}), 0)
+        self.assertEqual(eval_expr("[x, x + 1]", {'x': 1}), [1, 2])
+        self.assertRaises(NameError, eval_expr, "a + 1")
+        self.assertRaises(NameError, eval_expr, "a + 1", {'b': 1})
+
+    def test_comparisons(self):
+        self.assertTrue(eval_expr("1 < x <= 3", {'x': 3}))
+        self.assertFalse(eval_expr("1 < x <= 3", {'x': 4}))
+        self.assertTrue(eval_expr("x in ('a', 'b') and not y", {'x': 'a', 'y': False}))
+        self.assertEqual(eval_expr("x or 'default'", {'x': ''}), 'default')
+        self.assertIs(eval_expr("x is None", {'x': None}), True)
+
+    def test_functions(self):
+        self.assertEqual(eval_expr("max(len(s), 2) + round(f, ndigits=1)", {'s': 'abc', 'f': 1.26}), 4.3)
+        self.assertEqual(eval_expr("sum((1, 2, 3)) // 4 % 2"), 1)
+        self.assertTrue(compile_expr("abs(-3) + min(1, 2)").constant)
+
+    def test_folding(self):
+        self.assertTrue(compile_expr("3600 * 24 > 0 and 'a' or 'b'").constant)
+        # not evaluated branch
+        self.assertEqual(eval_expr("1 / x if x else 0", {'x': 0}), 0)
+        self.assertEqual(eval_expr("x and 1 / 0", {'x': 0}), 0)
+        self.assertRaises(ZeroDivisionError, eval_expr, "x and 1 / 0", {'x': 1})
+
+    def test_limits(self):
+        self.assertRaises(ValueError, eval_expr, "9 ** 9 ** 9")
+        self.assertRaises(ValueError, eval_expr, "(2 ** 60000) * (2 ** 60000)")
+        self.assertRaises(ValueError, eval_expr, "'a' * 10 ** 9")
+        self.assertRaises(ValueError, eval_expr, "x ** 100000", {'x': 10})
+        self.assertRaises(ValueError, eval_expr, " + ".join(["1"] * 300))
+        self.assertRaises(ValueError, eval_expr, "3 ** 40000")
+        self.assertRaises(ValueError, eval_expr, "x + x", {'x': 'a' * 1048576})
+        self.assertRaises(ValueError, eval_expr, "x + [0]", {'x': [[0] * 1024] * 1024})
+        self.assertRaises(ValueError, eval_expr, "'%s'" % ('a' * 100000))
+        self.assertEqual(eval_expr("2 ** 64"), 18446744073709551616)
+        self.assertEqual(eval_expr("'a' + x", {'x': 'b'}), 'ab')
+
+    def test_nested_limits(self):
+        self.assertRaises(ValueError, eval_expr, "str([[[0] * 1024] * 1024] * 1024)")
+        self.assertRaises(ValueError, eval_expr, "sum([[1]] * 1048576, [])")
+        self.assertRaises(ValueError, eval_expr, "max([[0] * 1048576] * 1048576)")
+        self.assertRaises(TypeError, eval_expr, "sum([[1]] * 1000, [])")
+        self.assertRaises(ValueError, eval_expr, "str(x)", {'x': [[0] * 1024] * 1025})
+        self.assertRaises(ValueError, eval_expr, "round(10 ** 20, -10 ** 9)")
+        self.assertEqual(eval_expr("len(str([[0] * 10] * 10))"), 320)
+        self.assertEqual(eval_expr("sum([1.5] * 4)"), 6.0)
+        self.assertEqual(eval_expr("max([1, 3], [2])"), [2])
+
+
+class TestEvaluateBatch(unittest.TestCase):
+
+    columns = {'x': [0, 1, 2, 3], 'y': [1.5, 0.0, 2.5, 4.0]}
+
+    def test_batch(self):
+        self.assertEqual(evaluate_batch("x * 2 + y", self.columns), [1.5, 2.0, 6.5, 10.0])
+        self.assertEqual(evaluate_batch(compile_expr("x and y"), self.columns), [0, 0.0, 2.5, 4.0])
+        self.assertEqual(evaluate_batch("x + k", self.columns, {'k': 10}), [10, 11, 12, 13])
+        self.assertEqual(evaluate_batch("'a'", {'x': [1, 2]}), ['a', 'a'])
+        self.assertEqual(evaluate_batch("str(x)", self.columns), ['0', '1', '2', '3'])
+        self.assertEqual(evaluate_batch("x", {'x': []}), [])
+
+    def test_batch_errors(self):
+        self.assertRaises(ValueError, evaluate_batch, "x", {'x': [1], 'y': [1, 2]})
+        self.assertRaises(NameError, evaluate_batch, "x + z", self.columns)
+
+    def test_batch_python(self):
+        # the lists are always evaluated by Python
+        self.assertEqual(evaluate_batch("a * b", {'a': [3037000500], 'b': [3037000500]}), [9223372037000250000])
+        self.assertRaises(ZeroDivisionError, evaluate_batch, "a // b", {'a': [1, 2], 'b': [1, 0]})
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def test_vectorized(self):
+        arrays = {name: numpy.asarray(column) for name, column in self.columns.items()}
+
+        for expr in ("x * 2 + y", "x ** 2 - y / 3", "1 < y <= 3", "x and y", "x or -y", "y if x > 1 else -x",
+                     "max(x, y, 2) + min(x, 0)", "abs(x - y) + round(y) + int(y)", "not x", "42"):
+            self.assertIsNotNone(compile_expr(expr).vectorized(), expr)
+
+            result = evaluate_batch(expr, arrays)
+            self.assertIsInstance(result, numpy.ndarray)
+            self.assertIn(result.dtype.kind, 'bif', expr)
+
+            expected = [eval_expr(expr, {'x': x, 'y': y}) for x, y in zip(self.columns['x'], self.columns['y'])]
+            self.assertEqual(result.tolist(), expected, expr)
+            self.assertEqual(evaluate_batch(expr, self.columns), expected, expr)
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def test_vectorized_as_python(self):
+        def both(expr, columns):
+            arrays = {name: numpy.asarray(column) for name, column in columns.items()}
+
+            try:
+                expected = evaluate_batch(expr, columns)
+            except ArithmeticError as e:
+                self.assertRaises(type(e), evaluate_batch, expr, arrays)
+            else:
+                self.assertEqual(evaluate_batch(expr, arrays).tolist(), expected, expr)
+
+        # integers overflowing the int64 type
+        both("a * b", {'a': [3037000500, 2], 'b': [3037000500, 3]})
+        both("a + b", {'a': [2 ** 62, 1], 'b': [2 ** 62, 1]})
+        both("-a", {'a': [-2 ** 63, 1]})
+        both("a ** b", {'a': [10, 2], 'b': [30, 3]})
+        both("int(a)", {'a': [1e30, 1.5]})
+
+        # divisions by zero
+        both("a // b", {'a': [1, 2], 'b': [1, 0]})
+        both("a % b", {'a': [1, 2], 'b': [1, 0]})
+        both("a / b", {'a': [1.5, 2.5], 'b': [1.0, 0.0]})
+        both("a ** b", {'a': [2, 0], 'b': [-1, -1]})
+
+        # integers not exact as floats, booleans and small integers
+        both("a / b", {'a': [2 ** 60 + 1], 'b': [3]})
+        both("a == b", {'a': [2 ** 60 + 1], 'b': [float(2 ** 60)]})
+        both("a + b - 1", {'a': [True, False], 'b': [True, True]})
+        both("round(a) + round(a, 2)", {'a': [2.675, 0.5]})
+
+        result = evaluate_batch("a * b", {'a': numpy.asarray([3037000500]), 'b': numpy.asarray([3037000500])})
+        self.assertEqual(result.tolist(), [9223372037000250000])
+
+        result = evaluate_batch("x * 100", {'x': numpy.asarray([100, 2], dtype=numpy.int8)})
+        self.assertEqual(result.tolist(), [10000, 200])
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def test_not_vectorized(self):
+        self.assertIsNone(compile_expr("len(x)").vectorized())
+        self.assertIsNone(compile_expr("x in (1, 2)").vectorized())
+        self.assertIsNone(compile_expr("x + 'a'").vectorized())
+
+        arrays = {'x': numpy.asarray(['a', 'b'])}
+        self.assertEqual(evaluate_batch("x * 2", arrays).tolist(), ['aa', 'bb'])
+        self.assertEqual(evaluate_batch("x + k", {'x': numpy.asarray([1])}, {'k': 10 ** 30}).tolist(), [10 ** 30 + 1])
+
+
+class TestSerialization(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        authors = [Author.objects.create(name='First', birth=datetime.date(1950, 1, 2)), Author.objects.create(name='é')]
+
+        for i in range(5):
+            book = Book.objects.create(
+                title='Book %i' % i, price=decimal.Decimal('%i.50' % i),
+                published=datetime.datetime(2020, 1, 1 + i, tzinfo=datetime.timezone.utc),
+                available=i % 2 == 0, author=authors[i % 2])
+
+            book.coauthors.set(authors[:i % 3])
+
+        group = Group.objects.create(name='group')
+        group.permissions.set(Permission.objects.all()[:3])
+
+        user = User.objects.create_user('user', is_staff=True)
+        user.groups.add(group)
+
+    def test_same_as_serializer(self):
+        for queryset in (Book.objects.all(), Author.objects.all(), User.objects.all(), Group.objects.all(),
+                         Permission.objects.all()[:10], Book.objects.prefetch_related('coauthors')):
+            expected = serializers.serialize('python', queryset)
+
+            self.assertEqual(queryset_to_python(queryset), expected)
+            self.assertEqual([model_to_python(obj) for obj in queryset], expected)
+
+    def test_plan(self):
+        self.assertIs(get_plan(Book), get_plan(Book))
+        self.assertEqual(get_plan(Book).label, 'testapp.book')
+        self.assertEqual(get_plan(Book).m2m, ['coauthors'])
+
+
+class TestTracebackLogger(unittest.TestCase):
+
+    class Marker(object):
+        pass
+
+    def setUp(self):
+        self.logger = mock.Mock()
+        self.traceback_logger = TracebackLogger(self.logger)
+
+    def raise_invalid(self, marker):
+        raise ValueError("Invalid")
+
+    def test_log(self):
+        try:
+            self.raise_invalid(self.Marker())
+        except ValueError as e:
+            self.traceback_logger.log(e)
+
+        self.traceback_logger.join()
+
+        message = self.logger.error.call_args[0][0]
+        self.assertTrue(message.startswith("Traceback (most recent call last):"))
+        self.assertIn("raise ValueError(\"Invalid\")", message)
+        self.assertTrue(message.endswith("ValueError: Invalid\n"))
+
+    def test_frames_released(self):
+        marker = self.Marker()
+        ref = weakref.ref(marker)
+
+        try:
+            self.raise_invalid(marker)
+        except ValueError as e:
+            self.traceback_logger.log(e)
+
+        # not kept alive by the queue
+        del marker
+        self.assertIsNone(ref())
+
+        self.traceback_logger.join()
+
+    def test_error(self):
+        self.logger.error.side_effect = RuntimeError("Broken")
+
+        with mock.patch('sys.stderr', new_callable=io.StringIO) as stderr:
+            for i in range(2):
+                try:
+                    self.raise_invalid(None)
+                except ValueError as e:
+                    self.traceback_logger.log(e)
+
+            self.traceback_logger.join()
+
+        # reported, and the thread continues
+        self.assertEqual(stderr.getvalue().count("--- Traceback logging error ---"), 2)
+        self.assertIn("RuntimeError: Broken", stderr.getvalue())
+
+
+class TestNamedCache(unittest.TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+        self.calls = []
+        self.request = RequestFactory().get('/')
+
+        def cached_view(request, status=200, **kwargs):
+            self.calls.append(kwargs)
+            return HttpResponse('%s %i' % (kwargs, len(self.calls)), status=status)
+
+        self.view = cached_view
+        self.cached_view = named_cache_page(60)(cached_view)
+
+    def test_cached(self):
+        first = self.cached_view(self.request, id=1)
+        self.assertEqual(self.cached_view(self.request, id=1).content, first.content)
+        self.assertEqual(self.calls, [{'id': 1}])
+
+        # by arguments
+        self.cached_view(self.request, id=2)
+        self.cached_view(self.request, name=2)
+        self.assertEqual(len(self.calls), 3)
+
+        # a value looking like others arguments
+        self.cached_view(self.request, a='1', b='2')
+        self.cached_view(self.request, a='1&b=2')
+        self.assertEqual(len(self.calls), 5)
+
+        # only the successful responses
+        self.cached_view(self.request, status=404, id=3)
+        self.cached_view(self.request, status=404, id=3)
+        self.assertEqual(len(self.calls), 7)
+
+    def test_make_key(self):
+        self.assertNotEqual(
+            make_key('cached_view', 1, {'a': '1&b=2'}),
+            make_key('cached_view', 1, {'a': '1', 'b': '2'}))
+
+        self.assertEqual(
+            make_key('cached_view', 1, {'a': '1', 'b': '2'}),
+            make_key('cached_view', 1, {'b': '2', 'a': '1'}))
+
+    def test_invalidate(self):
+        generation = get_generation('cached_view')
+
+        self.cached_view(self.request, id=1)
+        self.cached_view(self.request, id=2)
+
+        invalidate_cache('cached_view')
+        self.assertEqual(get_generation('cached_view'), generation + 1)
+
+        self.cached_view(self.request, id=1)
+        self.cached_view(self.request, id=2)
+        self.assertEqual(len(self.calls), 4)
+
+        # nothing cached
+        invalidate_cache('undefined_view')
+        self.assertIsNotNone(get_generation('undefined_view'))
+
+    def test_stale(self):
+        stale_view = named_cache_page(60, stale_timeout=60)(self.view)
+
+        stale_view(self.request, id=1)
+
+        key = make_key('cached_view', get_generation('cached_view'), {'id': 1})
+        response, fresh_until = cache.get(key)
+        cache.set(key, (response, time.time() - 1), 60)
+
+        # regenerated by another worker
+        cache.add(key + ':lock', 1, 60)
+        self.assertEqual(stale_view(self.request, id=1).content, response.content)
+        self.assertEqual(len(self.calls), 1)
+
+        cache.delete(key + ':lock')
+        self.assertNotEqual(stale_view(self.request, id=1).content, response.content)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_lock_timeout(self):
+        locked_view = named_cache_page(60, lock_timeout=0.2)(self.view)
+
+        # generated by a worker that never finishes
+        key = make_key('cached_view', get_generation('cached_view'), {'id': 1})
+        cache.add(key + ':lock', 1, 60)
+
+        locked_view(self.request, id=1)
+        self.assertEqual(len(self.calls), 1)
+
+
+class TestSettings(TestCase):
+
+    def setUp(self):
+        self.app = apps.get_app_config('testapp')
+        self.settings_cached = self.app.settings_cached
+        self.settings_check_interval = self.app.settings_check_interval
+
+    def tearDown(self):
+        self.app.settings_cached = self.settings_cached
+        self.app.settings_check_interval = self.settings_check_interval
+        self.app.invalidate_settings()
+
+    def test_defaults(self):
+        self.assertIs(self.app.settings_table, Settings)
+        self.assertEqual(self.app.get_setting('page_size'), 20)
+        self.assertEqual(self.app.get_setting('columns'), ['name', 'title'])
+        self.assertIsNone(self.app.get_setting('undefined'))
+
+    def test_not_shared(self):
+        for settings_cached in (False, True):
+            self.app.settings_cached = settings_cached
+
+            columns = self.app.get_setting('columns')
+            columns.append('price')
+
+            self.assertEqual(self.app.get_setting('columns'), ['name', 'title'])
+
+    def test_local_cache(self):
+        # not shared by the processes
+        self.assertFalse(self.app.settings_cached)
+
+        Settings.objects.filter(param_name='page_size').update(value='50')
+        self.assertEqual(self.app.get_setting('page_size'), 50)
+
+    def test_invalidation(self):
+        self.app.settings_cached = True
+        self.assertEqual(self.app.get_setting('page_size'), 20)
+
+        Settings.objects.filter(param_name='page_size').update(value='40')
+        self.assertEqual(self.app.get_setting('page_size'), 20)
+
+        # changed by another process
+        key = self.app._settings_version_key()
+        cache.set(key, cache.get(key, 0) + 1, None)
+        self.app.settings_check_interval = 0
+
+        self.assertEqual(self.app.get_setting('page_size'), 40)
+
+        # deleted into this process
+        with self.commit():
+            Settings.objects.get(param_name='page_size').delete()
+
+        self.app.settings_check_interval = 60
+        self.assertEqual(self.app.get_setting('page_size'), 20)
+
+    @contextmanager
+    def commit(self):
+        """
+        Run the on_commit callbacks registered into the block at its exit, as if the transaction
+        of the test case was committed.
+        """
+        connection = transaction.get_connection()
+        count = len(connection.run_on_commit)
+
+        yield
+
+        for callback in connection.run_on_commit[count:]:
+            callback[1]()
+
+    def test_atomic_save(self):
+        self.app.settings_cached = True
+        self.assertEqual(self.app.get_setting('page_size'), 20)
+
+        key = self.app._settings_version_key()
+        version = cache.get(key)
+
+        with self.commit():
+            with transaction.atomic():
+                setting = Settings.objects.get(param_name='page_size')
+                setting.value = '30'
+                setting.save()
+
+            # not invalidated before the commit
+            self.assertEqual(cache.get(key), version)
+            self.assertEqual(self.app.get_setting('page_size'), 20)
+
+        self.assertNotEqual(cache.get(key), version)
+        self.assertEqual(self.app.get_setting('page_size'), 30)
+
+    def test_atomic_rollback(self):
+        self.app.settings_cached = True
+
+        key = self.app._settings_version_key()
+        version = cache.get(key)
+
+        with self.commit():
+            with self.assertRaises(ValueError):
+                with transaction.atomic():
+                    Settings.objects.get(param_name='page_size').delete()
+                    raise ValueError()
+
+        self.assertEqual(cache.get(key), version)
+
+
+class TestStartup(TestCase):
+
+    def setUp(self):
+        self.app = apps.get_app_config('testapp')
+        self.logger = mock.Mock()
+
+    def tearDown(self):
+        self.app.settings_table = Settings
+        self.app.settings_table_name = Settings._meta.db_table
+
+    def messages(self):
+        return [call[0][0] for call in self.logger.info.call_args_list if call[0][0].startswith('    ')]
+
+    def test_defaults(self):
+        Settings.objects.filter(param_name='page_size').delete()
+        Settings.objects.filter(param_name='columns').update(value='')
+        Settings.objects.create(param_name='other', value='1')
+
+        # a single query for the existing settings, one for the inserts and one for the updates
+        with self.assertNumQueries(3):
+            apphelpers.startup(self.app, self.logger)
+
+        self.assertEqual(
+            dict(Settings.objects.values_list('param_name', 'value')),
+            {'page_size': '20', 'columns': "['name', 'title']", 'other': '1'})
+
+        self.assertEqual(sorted(self.messages()), [
+            "    columns = ['name', 'title'] (update to default)",
+            "    page_size = 20 (inserted with default)"])
+
+        # nothing to change
+        self.logger.reset_mock()
+
+        with self.assertNumQueries(1):
+            apphelpers.startup(self.app, self.logger)
+
+        self.assertEqual(sorted(self.messages()), [
+            "    columns = ['name', 'title'] (found)",
+            "    page_size = 20 (found)"])
+
+    def test_no_table(self):
+        with mock.patch.object(apphelpers, 'get_table_names', return_value=set()):
+            with self.assertNumQueries(0):
+                apphelpers.startup(self.app, self.logger)
+
+        self.assertIsNone(self.app.settings_table)
+        self.assertTrue(self.logger.warning.called)
+
+    def test_table_names(self):
+        self.assertIn(Settings._meta.db_table, apphelpers.get_table_names())
+
+        # introspected again after a migration
+        apphelpers._table_names = set()
+        post_migrate.send(sender=self.app, app_config=self.app, verbosity=0, interactive=False, using='default')
+
+        self.assertIn(Settings._meta.db_table, apphelpers.get_table_names())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,296 @@
+# -*- coding: utf-8; -*-
+#
+# @file batch.py
+# @brief Batch endpoint, running many rest requests from a single HTTP request.
+# @author agent (INRA UMR1095)
+# @date 2026-10-18
+# @copyright Copyright (c) 2026 INRA
+# @license MIT (see LICENSE file)
+# @details The sub-requests are dispatched directly to the interceptor of their rest handler,
+# without going again through the middlewares, and their responses are combined into a
+# single JSON response.
+
+import base64
+import copy
+import json
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from io import BytesIO
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import QueryDict
+from django.urls import Resolver404, resolve, get_script_prefix
+
+from igdectk.rest import Format, Method
+from igdectk.rest.handler import RestHandler, async_to_sync
+from igdectk.rest.response import HttpResponseRest
+from igdectk.rest.restmiddleware import HttpHeader, RestMiddleware, ViewExceptionRest, _current_request
+from igdectk.rest.validator import FastSchema, compile_schema
+
+# maximum number of sub-requests of a batch (REST_BATCH_MAX_REQUESTS setting)
+BATCH_MAX_REQUESTS = 50
+
+# number of threads running the sub-requests of the parallel batches (REST_BATCH_MAX_WORKERS setting)
+BATCH_MAX_WORKERS = 4
+
+# conditional and encoding headers of the batch are not given to the sub-requests
+EXCLUDED_META = (
+    'HTTP_ACCEPT_ENCODING', 'HTTP_IF_MATCH', 'HTTP_IF_NONE_MATCH',
+    'HTTP_IF_MODIFIED_SINCE', 'HTTP_IF_UNMODIFIED_SINCE', 'HTTP_RANGE')
+
+# schema of a sub-request, compiled by the fast path, so the type of the query (a string or
+# an object) is checked by validate_sub_request, as a union of types is not supported
+SUB_REQUEST_SCHEMA = FastSchema({
+    "type": "object",
+    "properties": {
+        "method": {"type": "string", "enum": [method.name for method in Method]},
+        "path": {"type": "string"},
+        "query": {"type": "any", "required": False},
+        "body": {"type": "any", "required": False},
+        "accept": {"type": "string", "required": False},
+    }
+})
+
+_validate_sub_request = compile_schema(SUB_REQUEST_SCHEMA)
+
+
+def validate_sub_request(sub):
+    """
+    Validate the description of a sub-request, raising a ValueError if it is invalid.
+
+    :param dict sub: Sub-request description, with method, path, and optional query, body and accept.
+    """
+    _validate_sub_request(sub)
+
+    if not isinstance(sub.get('query', ''), (str, dict)):
+        raise ValueError("The query must be a string or an object")
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Returns the thread pool of the parallel batches, created at the first call.
+    """
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'REST_BATCH_MAX_WORKERS', BATCH_MAX_WORKERS),
+                    thread_name_prefix='rest-batch')
+
+    return _executor
+
+
+def make_sub_request(request, sub, script_prefix):
+    """
+    Make a sub-request from the batch request, sharing its user, session and cookies.
+
+    :param HttpRequest request: Batch request.
+    :param dict sub: Sub-request description, with method, path, and optional query, body and accept.
+    :param str script_prefix: Script prefix of the batch request.
+
+    :rtype: HttpRequest
+    """
+    query = sub.get('query') or ''
+    if isinstance(query, dict):
+        query = urlencode(query, doseq=True)
+
+    body = json.dumps(sub['body']).encode('utf-8') if sub.get('body') is not None else b''
+
+    sub_request = copy.copy(request)
+
+    # cached and decoded attributes of the batch request
+    for attr in ('_post', '_files', 'data', 'resolver_match'):
+        sub_request.__dict__.pop(attr, None)
+
+    sub_request.method = sub['method']
+    sub_request.path_info = sub['path']
+    sub_request.path = script_prefix.rstrip('/') + sub['path']
+
+    meta = {k: v for k, v in request.META.items() if k not in EXCLUDED_META}
+    meta.update({
+        'REQUEST_METHOD': sub['method'],
+        'PATH_INFO': sub['path'],
+        'QUERY_STRING': query,
+        'CONTENT_TYPE': Format.JSON.content_type if body else '',
+        'CONTENT_LENGTH': str(len(body)),
+        'HTTP_ACCEPT': sub.get('accept', Format.JSON.content_type),
+    })
+
+    sub_request.META = meta
+    sub_request.GET = QueryDict(query)
+    sub_request.content_type = Format.JSON.content_type if body else ''
+    sub_request.content_params = {}
+
+    sub_request._body = body
+    sub_request._stream = BytesIO(body)
+    sub_request._read_started = False
+
+    # as for RestMiddleware.process_request
+    sub_request.format = Format.HTML
+    sub_request.parameters = ()
+    sub_request.header = HttpHeader(sub_request)
+
+    return sub_request
+
+
+def run_sub_request(middleware, sub_request):
+    """
+    Run a sub-request through the interceptor of its rest handler, and returns its response.
+    The exceptions are formatted by the middleware as for a request.
+    """
+    token = _current_request.set(sub_request)
+
+    try:
+        try:
+            match = resolve(sub_request.path_info)
+        except Resolver404:
+            match = None
+
+        handler = getattr(match.func, '__self__', None) if match is not None else None
+
+        # only the views of the registered rest handlers
+        if handler is None or RestHandler.handlers.get(getattr(handler, 'regex', None)) is not handler:
+            sub_request.format = sub_request.header.preferred_type
+            raise ViewExceptionRest('Undefined handler for %s' % sub_request.path_info, 404)
+
+        sub_request.resolver_match = match
+
+        if handler.is_async():
+            response = async_to_sync(match.func)(sub_request, *match.args, **match.kwargs)
+        else:
+            response = match.func(sub_request, *match.args, **match.kwargs)
+    except Exception as e:
+        # an HTML error would be added to the messages of the batch request
+        if sub_request.format == Format.HTML:
+            sub_request.format = Format.JSON
+
+        response = middleware.process_exception(sub_request, e)
+    finally:
+        _current_request.reset(token)
+
+    return response
+
+
+def _run_in_thread(middleware, sub_request):
+    try:
+        return run_sub_request(middleware, sub_request)
+    finally:
+        # as at the end of a request
+        close_old_connections()
+
+
+def response_to_python(response):
+    """
+    Returns the status, headers and body of a sub-response. The JSON bodies are decoded.
+    The binary bodies are encoded in base64, and then body_encoding is 'base64'.
+
+    :rtype: dict
+    """
+    if response.streaming:
+        content = b''.join(response.streaming_content)
+    else:
+        content = response.content
+
+    content_type = response.get('Content-Type', '')
+
+    result = {
+        'status': response.status_code,
+        'headers': {k: v for k, v in response.items() if k not in ('Content-Type', 'Content-Length')},
+        'content_type': content_type,
+    }
+
+    if content_type.startswith(Format.JSON.content_type) and content:
+        result['body'] = json.loads(content)
+    else:
+        try:
+            result['body'] = content.decode(response.charset)
+        except UnicodeDecodeError:
+            result['body'] = base64.b64encode(content).decode('ascii')
+            result['body_encoding'] = 'base64'
+
+    return result
+
+
+def batch_view(request):
+    """
+    View running a batch of rest requests, from a JSON body being a list of sub-requests,
+    or an object with the list of sub-requests into 'requests' and an optional 'parallel' flag.
+
+    Each sub-request is an object with :
+
+        * method: HTTP method name (GET, POST...),
+        * path: absolute path of a rest handler URL,
+        * query: optional query string, or object of the query parameters,
+        * body: optional JSON body,
+        * accept: optional accepted media type, default to application/json.
+
+    The sub-requests share the user, the session and the cookies of the batch request.
+    They are directly given to the interceptor of their rest handler, so the middlewares
+    are not run again. Only the URLs of the rest handlers are reachable.
+
+    The response is a JSON object with a 'responses' list, having for each sub-request,
+    in the same order, its status, headers, content_type and body (decoded for JSON, and
+    encoded in base64 with a body_encoding for binary data). The errors of the sub-requests
+    are given in JSON when their format is HTML.
+
+    With parallel, the sub-requests are run on a thread pool of REST_BATCH_MAX_WORKERS threads.
+    They must then be independents, and should not modify the session.
+
+    Usage, into the urls.py of an application::
+
+        url(r'^batch/$', batch_view, name='batch')
+    """
+    request.format = Format.JSON
+
+    if request.method != 'POST':
+        raise ViewExceptionRest('Batch requests must use the POST method', 400)
+
+    data = json.loads(request.body)
+
+    if isinstance(data, dict):
+        subs = data.get('requests')
+        parallel = bool(data.get('parallel', False))
+    else:
+        subs = data
+        parallel = False
+
+    if not isinstance(subs, list):
+        raise ViewExceptionRest('Batch must be a list of requests', 400)
+
+    if len(subs) > getattr(settings, 'REST_BATCH_MAX_REQUESTS', BATCH_MAX_REQUESTS):
+        raise ViewExceptionRest('Too many requests into the batch', 400)
+
+    for sub in subs:
+        validate_sub_request(sub)
+
+    script_prefix = get_script_prefix()
+    sub_requests = [make_sub_request(request, sub, script_prefix) for sub in subs]
+
+    middleware = RestMiddleware()
+
+    if parallel and len(sub_requests) > 1:
+        # the lazy user is resolved once, before being shared by the threads
+        user = getattr(request, 'user', None)
+        if user is not None:
+            user.is_authenticated
+
+        executor = get_executor()
+
+        futures = [
+            executor.submit(copy_context().run, _run_in_thread, middleware, sub_request)
+            for sub_request in sub_requests]
+
+        responses = [future.result() for future in futures]
+    else:
+        responses = [run_sub_request(middleware, sub_request) for sub_request in sub_requests]
+
+    return HttpResponseRest(request, {'responses': [response_to_python(response) for response in responses]})
@@ -0,0 +1,210 @@
+# -*- coding: utf-8; -*-
+#
+# @file compression.py
+# @brief Compression of the rest responses.
+# @author agent (INRA UMR1095)
+# @date 2026-10-18
+# @copyright Copyright (c) 2026 INRA
+# @license MIT (see LICENSE file)
+# @details The content encoding (brotli or gzip) is negotiated from the Accept-Encoding header,
+# and applied to the JSON and XML responses, streamed or not.
+
+import gzip
+import zlib
+
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from igdectk.rest import Format
+
+try:
+    import brotli
+except ImportError:  # brotli is optional
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+# maximum number of distinct raw Accept-Encoding values kept parsed
+ACCEPT_ENCODING_CACHE_SIZE = 256
+
+# minimal size in bytes of a compressed response body (REST_COMPRESSION_MIN_SIZE setting)
+COMPRESSION_MIN_SIZE = 1024
+
+# compression level by format and content encoding (REST_COMPRESSION_LEVELS setting, by format name)
+COMPRESSION_LEVELS = {
+    Format.JSON: {'br': 5, 'gzip': 6},
+    Format.XML: {'br': 5, 'gzip': 6},
+}
+
+# supported content encodings, by order of preference
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+_compression_settings = None
+
+
+def get_compression_settings():
+    """
+    Returns a triplet with the REST_COMPRESSION (default True), REST_COMPRESSION_MIN_SIZE and
+    REST_COMPRESSION_LEVELS settings. The levels setting is a dict by format name (JSON, XML)
+    of dicts by content encoding (br, gzip), overriding the default levels.
+    """
+    global _compression_settings
+
+    if _compression_settings is None:
+        levels = {fmt: dict(by_encoding) for fmt, by_encoding in COMPRESSION_LEVELS.items()}
+
+        for name, by_encoding in getattr(settings, 'REST_COMPRESSION_LEVELS', {}).items():
+            levels.setdefault(Format[name], {}).update(by_encoding)
+
+        _compression_settings = (
+            getattr(settings, 'REST_COMPRESSION', True),
+            getattr(settings, 'REST_COMPRESSION_MIN_SIZE', COMPRESSION_MIN_SIZE),
+            levels)
+
+    return _compression_settings
+
+
+@lru_cache(maxsize=ACCEPT_ENCODING_CACHE_SIZE)
+def negotiate_encoding(accept_encoding):
+    """
+    Select the supported content encoding the most accepted by an Accept-Encoding header value.
+    For the equal qualities, brotli is preferred to gzip.
+
+    :param str accept_encoding: Accept-Encoding string from HTTP header.
+
+    :return: 'br', 'gzip' or None for the identity.
+    :rtype: str
+    """
+    qualities = {}
+
+    for coding in accept_encoding.split(','):
+        parts = coding.split(';')
+        name = parts[0].strip().lower()
+        q = 1.0
+
+        for part in parts[1:]:
+            key, _, value = part.partition('=')
+            if key.strip() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+
+        if name:
+            qualities.setdefault(name, q)
+
+    best = None
+    best_q = 0.0
+
+    for encoding in ENCODINGS:
+        q = qualities.get(encoding, qualities.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+
+    return best
+
+
+def _compress(data, encoding, level):
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+
+    # fixed modification time, the same content gives the same compressed content
+    return gzip.compress(data, level, mtime=0)
+
+
+def _compress_sequence(sequence, encoding, level):
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=level)
+
+        for chunk in sequence:
+            data = compressor.process(chunk)
+            if data:
+                yield data
+
+        yield compressor.finish()
+    else:
+        # gzip header and trailer
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+        for chunk in sequence:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+
+        yield compressor.flush()
+
+
+def compress_response(request, response, data_format):
+    """
+    Compress the body of a response, according to the Accept-Encoding header of the request.
+
+    Only the JSON and XML responses are compressed. A streaming response is always compressed,
+    the others only when their body is at least REST_COMPRESSION_MIN_SIZE bytes, and when
+    the compression reduces it. A strong ETag becomes weak once the body is compressed.
+
+    :param HttpRequest request: Django request object.
+    :param HttpResponse response: Response to compress in place.
+    :param Format data_format: Format of the response.
+
+    :return: The response.
+    """
+    enabled, min_size, levels = get_compression_settings()
+
+    if not enabled or data_format not in levels or response.has_header('Content-Encoding'):
+        return response
+
+    # the content depends on the Accept-Encoding, even if not compressed
+    patch_vary_headers(response, ('Accept-Encoding',))
+
+    encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    if encoding is None:
+        return response
+
+    level = levels[data_format][encoding]
+
+    if response.streaming:
+        response.streaming_content = _compress_sequence(response.streaming_content, encoding, level)
+        del response['Content-Length']
+    else:
+        if len(response.content) < min_size:
+            return response
+
+        compressed = _compress(response.content, encoding, level)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+
+    response['Content-Encoding'] = encoding
+
+    return weaken_etag(request, response)
+
+
+def weaken_etag(request, response):
+    """
+    Make weak the strong ETag of a compressed response. The compressed body is not the same bytes
+    as the identity body, so it cannot have the same strong validator. The If-None-Match
+    comparison being weak, the conditional GET requests still give a 304. The ETag of a 304
+    is also made weak when the request accepts a compressed response, as its cached response.
+
+    It must be called when an ETag is added after the compression, as by the etag option
+    of the rest decorators.
+
+    :param HttpRequest request: Django request object.
+    :param HttpResponse response: Response to modify in place.
+
+    :return: The response.
+    """
+    etag = response.get('ETag')
+
+    if etag and etag.startswith('"'):
+        if response.has_header('Content-Encoding') or (
+                response.status_code == 304 and get_compression_settings()[0] and
+                negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', '')) is not None):
+            response['ETag'] = 'W/' + etag
+
+    return response
@@ -9,26 +9,45 @@
 # @details Easy manage RESTfull urls and views according to the HTTP method and content format.
 
 import json
-import validictory
-
 import logging
 
+from asyncio import iscoroutine
+from calendar import timegm
+from functools import wraps
 from importlib import import_module
+from inspect import iscoroutinefunction
+
+import django
 
 from django.conf.urls import url
-from django.core.exceptions import PermissionDenied
+from django.conf import settings
+from django.core.exceptions import PermissionDenied, RequestDataTooBig
 from django.shortcuts import render, redirect
+from django.utils.cache import get_conditional_response
+from django.utils.functional import SimpleLazyObject
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import condition
 
 import igdectk.xmlio
 
 from igdectk.rest import Format, Method
+from igdectk.rest.compression import weaken_etag
+from igdectk.rest.validator import compile_schema
 from igdectk.common.helpers import *
 
+try:
+    from asgiref.sync import async_to_sync, sync_to_async
+except ImportError:  # asgiref is only required for async views
+    async_to_sync = sync_to_async = None
+
 __date__ = "2015-10-15"
 __author__ = "Frédéric Scherma"
 
 logger = logging.getLogger(__name__)
 
+# minimal version of Django serving the async views
+ASYNC_DJANGO_VERSION = (3, 1)
+
 
 class RestRegistrationException(Exception):
     """
@@ -39,6 +58,180 @@ class RestRegistrationException(Exception):
     pass
 
 
+def check_async_view(func):
+    """
+    Check that an async view can be served, else raise a :exc:`RestRegistrationException`.
+    The async views require asgiref and Django 3.1 or later, the former versions of Django
+    do not await the coroutine returned by the handler.
+    """
+    if sync_to_async is None:
+        raise RestRegistrationException(
+            "asgiref is required for the async view %s" % func.__qualname__)
+
+    if django.VERSION < ASYNC_DJANGO_VERSION:
+        raise RestRegistrationException(
+            "Django %s or later is required for the async view %s" % (
+                '.'.join(str(v) for v in ASYNC_DJANGO_VERSION), func.__qualname__))
+
+
+def async_condition(etag_func=None, last_modified_func=None):
+    """
+    Same as :func:`sync_condition` for a coroutine view function.
+    The validators functions are sync, and called into a thread because they generally
+    query the database.
+    """
+    def decorator(func):
+        def get_validators(request, *args, **kwargs):
+            res_last_modified = None
+            if last_modified_func:
+                dt = last_modified_func(request, *args, **kwargs)
+                if dt:
+                    res_last_modified = timegm(dt.utctimetuple())
+
+            res_etag = etag_func(request, *args, **kwargs) if etag_func else None
+            res_etag = quote_etag(res_etag) if res_etag is not None else None
+
+            return res_etag, res_last_modified
+
+        get_validators_async = sync_to_async(get_validators)
+
+        @wraps(func)
+        async def inner(request, *args, **kwargs):
+            res_etag, res_last_modified = await get_validators_async(request, *args, **kwargs)
+
+            response = get_conditional_response(request, etag=res_etag, last_modified=res_last_modified)
+
+            if response is None:
+                response = await func(request, *args, **kwargs)
+
+                if not response:
+                    raise ViewExceptionRest('No results for %s %s' % (request.path, request.method), 404)
+
+            if request.method in ('GET', 'HEAD'):
+                if res_last_modified and not response.has_header('Last-Modified'):
+                    response['Last-Modified'] = http_date(res_last_modified)
+                if res_etag and not response.has_header('ETag'):
+                    response['ETag'] = res_etag
+
+            return weaken_etag(request, response)
+
+        return inner
+
+    return decorator
+
+
+def sync_condition(etag_func=None, last_modified_func=None):
+    """
+    Same as :func:`django.views.decorators.http.condition`, but the ETag added to a response
+    compressed by :class:`igdectk.rest.response.HttpResponseRest` is weak, as it validates
+    the identity body.
+    """
+    def decorator(func):
+        @wraps(func)
+        def view(request, *args, **kwargs):
+            response = func(request, *args, **kwargs)
+
+            # the headers cannot be added to a missing response
+            if not response:
+                raise ViewExceptionRest('No results for %s %s' % (request.path, request.method), 404)
+
+            return response
+
+        conditional = condition(etag_func, last_modified_func)(view)
+
+        @wraps(func)
+        def inner(request, *args, **kwargs):
+            return weaken_etag(request, conditional(request, *args, **kwargs))
+
+        return inner
+
+    return decorator
+
+
+class DispatchTable(object):
+    """
+    Compiled selection structure of the sub-methods registered for a single HTTP method
+    of a :class:`RestHandler`.
+
+    Sub-methods having 'url__' conditions are indexed by the tuple of their condition keys,
+    and then by the tuple of the expected values. Selecting a candidate is then a dict lookup
+    per distinct set of keys, in place of a test of every condition of every sub-method.
+
+    The selection semantic is kept : the first registered sub-method whose conditions
+    are all satisfied is returned.
+    """
+
+    def __init__(self, submethods):
+        # {(key, ...): {(value, ...): [entry, ...]}}
+        self.indexed = {}
+        # entries without 'url__' conditions
+        self.unindexed = []
+
+        for order, submethod in enumerate(submethods):
+            equals = sorted((c[0], c[1]) for c in submethod[4] if c[2] == 'eq')
+            has = tuple(c[0] for c in submethod[4] if c[2] == 'has')
+            accept = frozenset(c[0] for c in submethod[4] if c[2] == 'accept')
+
+            entry = (order, submethod, has, accept)
+
+            if equals:
+                keys = tuple(k for k, v in equals)
+                values = tuple(v for k, v in equals)
+
+                self.indexed.setdefault(keys, {}).setdefault(values, []).append(entry)
+            else:
+                self.unindexed.append(entry)
+
+    @staticmethod
+    def _match(entry, params, accepted_types):
+        # key in URL (just contains)
+        for key in entry[2]:
+            if key not in params:
+                return False
+
+        # HTTP_ACCEPT (must be one of the accepted types, or accept any)
+        if accepted_types is not None and not entry[3].issubset(accepted_types):
+            return False
+
+        return True
+
+    def select(self, request):
+        """
+        Returns the first registered sub-method matching the request or None.
+        """
+        params = request.GET
+
+        accepted_types = request.header.accepted_types
+        # accept any
+        accepted_types = None if accepted_types == ['*/*'] else frozenset(accepted_types)
+
+        best = None
+
+        for keys, by_values in self.indexed.items():
+            try:
+                values = tuple(params[key] for key in keys)
+            except KeyError:
+                continue
+
+            for entry in by_values.get(values, ()):
+                if best is not None and entry[0] > best[0]:
+                    break
+
+                if self._match(entry, params, accepted_types):
+                    best = entry
+                    break
+
+        for entry in self.unindexed:
+            if best is not None and entry[0] > best[0]:
+                break
+
+            if self._match(entry, params, accepted_types):
+                best = entry
+                break
+
+        return best[1] if best else None
+
+
 class RestForm(object):
     """
     Rest handler to register a form with GET and POST method and HTML format.
@@ -197,6 +390,7 @@ class RestHandler(object, metaclass=RestHandlerMeta):
     application = None
     # classname_prefix = 'Rest'
     methods = {}
+    dispatch_tables = {}
 
     unprocessed_handlers = []  # intermediary list of handles to register
     handlers = {}              # list of registered handlers (by register_urls)
@@ -223,6 +417,7 @@ class RestHandler(object, metaclass=RestHandlerMeta):
             cls.name = base[-1].name + cls.name_separator + cls.suffix
 
         cls.methods = {}
+        cls.dispatch_tables = {}
 
         if app_name:
             cls.app_name = app_name
@@ -251,74 +446,20 @@ class RestHandler(object, metaclass=RestHandlerMeta):
         methods = cls.methods.get(request.method)
 
         if methods:
-            # decode the incoming data (json, xml, form-data, multipart/form-data)
-            if request.header.content_format == Format.JSON and request.body:
-                data = json.loads(request.body.decode())
-            elif request.header.content_format == Format.XML and request.body:
-                data = igdectk.xmlio.loads(request.body.decode())
-            elif request.header.content_format == Format.MULTIPART:
-                data = request.POST  # Form POST encoded
-            else:
-                data = request.POST  # Form POST encoded
-
-            request.data = data
+            # the incoming data are decoded at their first access
+            request.data = cls._lazy_data(request)
 
             # conditioned selection of the handler
-            sub = None
-            fallback = None
-
-            for submethod in methods:
-                sub = submethod
-
-                # fallback method is the one having only the accept condition
-                if len(submethod[4]) == 1 and submethod[4][0][2] is 'accept':
-                    if request.header.accepted_types != ['*/*']:
-                        # compare accept
-                        if submethod[4][0][0] == request.header.accepted_types:
-                            fallback = sub
-                            continue
-
-                for condition in submethod[4]:
-                    # key/value URL parameters (must be equal)
-                    if condition[2] == 'eq':
-                        # compare key
-                        if condition[0] not in request.GET:
-                            sub = None
-                            break
-
-                        # and value
-                        if condition[1] != request.GET[condition[0]]:
-                            sub = None
-                            break
-                    # key in URL (just contains)
-                    elif condition[2] == 'has':
-                        # compare key
-                        if condition[0] not in request.GET:
-                            sub = None
-                            break
-                    # or HTTP_ACCEPT (must be equal)
-                    elif condition[2] == 'accept':
-                        # accept any
-                        if request.header.accepted_types != ['*/*']:
-                            # compare accept
-                            if condition[0] not in request.header.accepted_types:
-                                sub = None
-                                break
-
-                # we have our candidate
-                if sub:
-                    break
-
-            # if no candidate, try to use fallback
-            if sub:
-                method = sub
-            else:
-                method = fallback
+            method = cls._select_method(request)
 
             if method:
                 # call the request function by calling its decorator wrapper
                 result = method[0](request, **kwargs)
 
+                # async view called from a sync context
+                if iscoroutine(result):
+                    result = async_to_sync(RestHandler._await)(result)
+
                 if not result:
                     raise ViewExceptionRest(
                         'No results for %s %s' % (request.path, request.method), 404)
@@ -332,18 +473,162 @@ class RestHandler(object, metaclass=RestHandlerMeta):
         raise ViewExceptionRest(
             'Undefined view for %s %s' % (request.path, request.method), 404)
 
+    @classmethod
+    async def _async_interceptor(cls, request, **kwargs):
+        """
+        Same as :meth:`_interceptor` for the handlers having at least one async view.
+        The sync views are called into a thread using sync_to_async.
+        """
+        methods = cls.methods.get(request.method)
+
+        if methods:
+            request.data = cls._lazy_data(request)
+
+            method = cls._select_method(request)
+
+            if method:
+                if iscoroutinefunction(method[0]):
+                    result = await method[0](request, **kwargs)
+                else:
+                    result = await sync_to_async(method[0])(request, **kwargs)
+
+                if not result:
+                    raise ViewExceptionRest(
+                        'No results for %s %s' % (request.path, request.method), 404)
+                else:
+                    return result
+
+        request.format = request.header.preferred_type
+
+        raise ViewExceptionRest(
+            'Undefined view for %s %s' % (request.path, request.method), 404)
+
     @staticmethod
-    def register_urls():
+    async def _await(awaitable):
+        return await awaitable
+
+    @classmethod
+    def is_async(cls):
+        """
+        Returns True if at least one of the views of the handler is a coroutine function.
+        """
+        for submethods in cls.methods.values():
+            for submethod in submethods:
+                if iscoroutinefunction(submethod[0]):
+                    return True
+
+        return False
+
+    @classmethod
+    def _lazy_data(cls, request):
+        """
+        Returns a lazy object of the data decoded from the request at their first access.
+        The data are decoded only once, and a decoding error is raised again at each access,
+        because the body of an XML content cannot be read twice.
+        """
+        error = []
+
+        def decode():
+            if error:
+                raise error[0]
+
+            try:
+                return cls._decode_data(request)
+            except Exception as e:
+                error.append(e)
+                raise
+
+        return SimpleLazyObject(decode)
+
+    @staticmethod
+    def _decode_data(request):
+        """
+        Decode the incoming data (json, xml, form-data, multipart/form-data).
+        The body bytes are directly given to the parsers.
+
+        The XML content is parsed incrementally while it is read from the request, without
+        materializing the body. The request.body is then no longer readable once the request.data
+        are accessed, and it must be read before when it is needed.
+
+        An invalid JSON or XML content raises a ValueError or a ParseError, both giving
+        a 400 response.
+        """
+        if request.header.content_format == Format.JSON and request.body:
+            return json.loads(request.body)
+        elif request.header.content_format == Format.XML and request.META.get('CONTENT_LENGTH', '0') not in ('', '0'):
+            # same limit as for the body
+            max_size = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+            if max_size is not None and int(request.META['CONTENT_LENGTH']) > max_size:
+                raise RequestDataTooBig('Request body exceeded settings.DATA_UPLOAD_MAX_MEMORY_SIZE.')
+
+            return igdectk.xmlio.load(request)
+        elif request.header.content_format == Format.XML and request.body:
+            return igdectk.xmlio.loads(request.body)
+        elif request.header.content_format == Format.MULTIPART:
+            return request.POST  # Form POST encoded
+        else:
+            return request.POST  # Form POST encoded
+
+    @classmethod
+    def _select_method(cls, request):
+        """
+        Select the sub-method for the request using the compiled dispatch table of its HTTP method.
+        The table is compiled at the first request when the handler was not processed by
+        :meth:`register_urls`, or when a method was registered later.
+        """
+        table = cls.dispatch_tables.get(request.method)
+
+        if table is None:
+            table = DispatchTable(cls.methods.get(request.method, ()))
+            cls.dispatch_tables[request.method] = table
+
+        return table.select(request)
+
+    @classmethod
+    def _compile_methods(cls):
+        """
+        Compile the dispatch table of each registered HTTP method.
+        """
+        cls.dispatch_tables = {
+            method: DispatchTable(submethods) for method, submethods in cls.methods.items()}
+
+    @staticmethod
+    def register_urls(router=False):
         """
         This method must be called once time in the urls.py
+
+        :param boolean router: If True the handlers are appended into a single
+            :class:`igdectk.rest.router.RestRouter` per urls module, in place of one
+            URL pattern per handler into the urlpatterns. Resolving a path then tries only
+            the handlers sharing its first segment. Reverse URLs and names are unchanged.
         """
+        if router:
+            from igdectk.rest.router import RestRouter
+
         for handler in RestHandler.unprocessed_handlers:
             if handler.regex in RestHandler.handlers:
                 raise RestRegistrationException(
                     "Duplicate entry for %s('%s') with '%s'" % (handler.__name__, handler.name, handler.regex))
 
-            handler.urls.urlpatterns.append(
-                url(handler.regex, handler._interceptor, name=handler.name))
+            handler._compile_methods()
+
+            # async interceptor only when needed, to avoid a thread switch for the sync views
+            interceptor = handler._async_interceptor if handler.is_async() else handler._interceptor
+
+            url_pattern = url(handler.regex, interceptor, name=handler.name)
+
+            if router:
+                # a single router per urls module
+                rest_router = getattr(handler.urls, 'rest_router', None)
+
+                if rest_router is None:
+                    rest_router = RestRouter()
+                    handler.urls.rest_router = rest_router
+                    handler.urls.urlpatterns.append(rest_router)
+
+                rest_router.append(url_pattern)
+            else:
+                handler.urls.urlpatterns.append(url_pattern)
 
             # append to registered handlers dict
             RestHandler.handlers[handler.regex] = handler
@@ -391,6 +676,9 @@ class RestHandler(object, metaclass=RestHandlerMeta):
         else:
             cls.methods[method.name] = [(wrapper, data_format, parameters, content, conditions)]
 
+        # the dispatch table of this method must be compiled again
+        cls.dispatch_tables.pop(method.name, None)
+
     @staticmethod
     def _make_conditions(data_format, parameters, kwargs):
         """
@@ -415,8 +703,185 @@ class RestHandler(object, metaclass=RestHandlerMeta):
 
         return conditions
 
+    @staticmethod
+    def _make_wrapper(func, data_format, parameters=(), content=(),
+                      auth=False, admin=False, staff=None, perms=None, fallback=None,
+                      etag=None, last_modified=None):
+        """
+        Make the wrapper of a view function, specialized at decoration time with only the
+        steps needed by the options of the decorator.
+
+        :param func func: Decorated view function.
+        :param igdectk.rest.Format data_format: Format of the response.
+        :param tuple parameters: Mandatory URL parameters.
+        :param content: Mandatory body parameters or validictory schema.
+        :param boolean auth: The user must be authenticated.
+        :param boolean admin: The user must be authenticated and superuser.
+        :param boolean staff: With auth, the user must be staff or superuser.
+        :param dict perms: With auth, permissions as keys and error messages as values.
+        :param func fallback: Optional view called in place of func for an unauthorized user.
+        :param func etag: Optional function computing the ETag of the response.
+        :param func last_modified: Optional function computing the last modification datetime of the response.
+        """
+        if etag is not None or last_modified is not None:
+            # conditional response, computed once the request is granted
+            if iscoroutinefunction(func):
+                check_async_view(func)
+                func = async_condition(etag, last_modified)(func)
+            else:
+                func = sync_condition(etag, last_modified)(func)
+
+        if iscoroutinefunction(func):
+            return RestHandler._make_async_wrapper(
+                func, data_format, parameters, content, auth, admin, staff, perms, fallback)
+
+        # mandatory parameters of the body (dict and flat model)
+        required = content if type(content) == tuple else ()
+
+        # or validictory schema for JSON content (dict and tree model), compiled once
+        validate_content = compile_schema(content) if isinstance(content, dict) else None
+
+        if admin:
+            def wrapper(*args, **kwargs):
+                request = args[0]
+
+                # add the parameters to the request
+                request.format = data_format
+                request.parameters = parameters
+
+                user = request.user
+
+                # check for user authentication
+                if not user.is_authenticated:
+                    if fallback:
+                        return fallback(request)
+                    raise ViewExceptionRest("Authenticated users only", 401)
+
+                # check for super-user authentication
+                if not user.is_superuser:
+                    if fallback:
+                        return fallback(request)
+                    raise PermissionDenied("Superuser only")
+
+                # check for the existence of the values into the encoded body
+                if required:
+                    data = request.data if hasattr(request, 'data') else request.POST
+
+                    for p in required:
+                        if p not in data:
+                            raise ViewExceptionRest("Missing parameter " + p, 400)
+                elif validate_content is not None and request.header.content_format == Format.JSON:
+                    # or do a data validation
+                    validate_content(request.data if hasattr(request, 'data') else request.POST)
+
+                # call the function
+                return func(*args, **kwargs)
+        elif auth:
+            perms = tuple(perms.items()) if perms else ()
+
+            def wrapper(*args, **kwargs):
+                request = args[0]
+
+                request.format = data_format
+                request.parameters = parameters
+
+                user = request.user
+
+                if not user.is_authenticated:
+                    if fallback:
+                        return fallback(request)
+                    raise ViewExceptionRest("Authenticated users only", 401)
+
+                if staff and (not user.is_staff and not user.is_superuser):
+                    if fallback:
+                        return fallback(request)
+                    raise PermissionDenied("Superuser and staff only")
+
+                # simple permissions check
+                if perms:
+                    for k, v in perms:
+                        if not user.has_perm(k):
+                            raise PermissionDenied(v)
+
+                if required:
+                    data = request.data if hasattr(request, 'data') else request.POST
+
+                    for p in required:
+                        if p not in data:
+                            raise ViewExceptionRest("Missing parameter " + p, 400)
+                elif validate_content is not None and request.header.content_format == Format.JSON:
+                    validate_content(request.data if hasattr(request, 'data') else request.POST)
+
+                return func(*args, **kwargs)
+        elif required or validate_content is not None:
+            def wrapper(*args, **kwargs):
+                request = args[0]
+
+                request.format = data_format
+                request.parameters = parameters
+
+                if required:
+                    data = request.data if hasattr(request, 'data') else request.POST
+
+                    for p in required:
+                        if p not in data:
+                            raise ViewExceptionRest("Missing parameter " + p, 400)
+                elif request.header.content_format == Format.JSON:
+                    validate_content(request.data if hasattr(request, 'data') else request.POST)
+
+                return func(*args, **kwargs)
+        else:
+            # nothing to check
+            def wrapper(*args, **kwargs):
+                request = args[0]
+
+                request.format = data_format
+                request.parameters = parameters
+
+                return func(*args, **kwargs)
+
+        wrapper.target_name = func.__module__ + '.' + func.__qualname__
+
+        return wrapper
+
+    @staticmethod
+    def _make_async_wrapper(func, data_format, parameters=(), content=(),
+                            auth=False, admin=False, staff=None, perms=None, fallback=None):
+        """
+        Same as :meth:`_make_wrapper` for a coroutine view function. The checks are done
+        by a sync wrapper, into a thread when the user must be fetched.
+        """
+        check_async_view(func)
+
+        granted = object()
+
+        check = RestHandler._make_wrapper(
+            lambda *args, **kwargs: granted, data_format, parameters, content, auth, admin, staff, perms, fallback)
+
+        if auth or admin:
+            # the user can be lazily loaded from the database
+            check = sync_to_async(check)
+
+            async def wrapper(*args, **kwargs):
+                result = await check(*args, **kwargs)
+
+                if result is not granted:
+                    # response of the fallback
+                    return (await result) if iscoroutine(result) else result
+
+                return await func(*args, **kwargs)
+        else:
+            async def wrapper(*args, **kwargs):
+                check(*args, **kwargs)
+
+                return await func(*args, **kwargs)
+
+        wrapper.target_name = func.__module__ + '.' + func.__qualname__
+
+        return wrapper
+
     @classmethod
-    def def_request(cls, method, data_format, parameters=(), content=(), **kwargs):
+    def def_request(cls, method, data_format, parameters=(), content=(), etag=None, last_modified=None, **kwargs):
         """
         Request function register and wrapper for non auth requests.
 
@@ -432,13 +897,26 @@ class RestHandler(object, metaclass=RestHandlerMeta):
             * method : from the decorator
             * data_format : from the decorator
 
+        The decorated function can be a coroutine function (async def). Its handler is then
+        served by an async interceptor, and the sync views of the same handler are called
+        using sync_to_async. The async views require Django 3.1 or later and asgiref.
+
+        The content is decoded at the first access to request.data. An XML content is parsed while
+        it is read, so request.body is no longer readable after the access to request.data.
+
         :param igdectk.rest.Method method: One of the Method value (GET, POST...) define the accepted method.
         :param igdectk.rest.Format data_format: One of the Format value (JSON, HTML...) defines the format of the http
             response, and the accepted value from HTTP_ACCEPT.
         :param list parameters: A list of strings or an empty list, containing the names of the
             mandatory parameters requested in the URL.
         :param list(str) content: A list of strings or an empty list, containing the names of the
-            mandatory parameters requested in the body, or validictory object.
+            mandatory parameters requested in the body, or validictory object. The validictory schema
+            is compiled once, see :class:`igdectk.rest.validator.FastSchema` for a faster validation.
+        :param func etag: Optional function(request, *args, **kwargs) returning the ETag of the
+            response, or None. A matching If-None-Match gives a 304 response without calling the view.
+        :param func last_modified: Optional function(request, *args, **kwargs) returning the last
+            modification datetime of the response, or None. An If-Modified-Since not older
+            gives a 304 response without calling the view.
         :param string kwargs: The next parameters if theirs names starts with a 'url__' will
             be used as condition expression for the url parameters.
 
@@ -452,35 +930,20 @@ class RestHandler(object, metaclass=RestHandlerMeta):
 
             Only a single free of conditions method per handler can be registered.
             Otherwise a :exc:`RestRegistrationException` exception is raised.
+
+        The validators of the conditional requests (etag, last_modified) are computed after
+        the checks of the request, and they are added to the headers of the GET and HEAD responses,
+        as with :func:`django.views.decorators.http.condition`.
         """
         # create a decorator for the function
         def decorator(func):
-            def wrapper(*args, **kwargs):
-                request = args[0]
-
-                # add the parameters to the request
-                request.format = data_format
-                request.parameters = parameters
-
-                # check for the existence of the values into the encoded body
-                data = request.data if hasattr(request, 'data') else request.POST
-
-                if type(content) == tuple:
-                    for p in content:
-                        if p not in data:
-                            raise ViewExceptionRest("Missing parameter " + p, 400)
-                elif type(content) == dict and request.header.content_type[0] == Format.JSON.content_type:
-                    # or do a data validation
-                    validictory.validate(data, content)
-
-                # call the function
-                return func(*args, **kwargs)
+            wrapper = RestHandler._make_wrapper(
+                func, data_format, parameters, content, etag=etag, last_modified=last_modified)
 
             # target conditions
             conditions = RestHandler._make_conditions(data_format, parameters, kwargs)
 
             # register the wrapper
-            wrapper.target_name = func.__module__ + '.' + func.__qualname__
             cls._register_wrapper(wrapper, method, data_format, parameters, content, conditions)
 
             return wrapper
@@ -488,7 +951,8 @@ class RestHandler(object, metaclass=RestHandlerMeta):
         return decorator
 
     @classmethod
-    def def_auth_request(cls, method, data_format, parameters=(), content=(), fallback=None, perms=None, staff=None, **kwargs):
+    def def_auth_request(cls, method, data_format, parameters=(), content=(), fallback=None, perms=None, staff=None,
+                         etag=None, last_modified=None, **kwargs):
         """
         Same as :meth:`def_request` but in addition the user must be authenticated.
 
@@ -496,50 +960,14 @@ class RestHandler(object, metaclass=RestHandlerMeta):
         """
         # create a decorator for the function
         def decorator(func):
-            def wrapper(*args, **kwargs):
-                request = args[0]
-
-                # add the parameters to the request
-                request.format = data_format
-                request.parameters = parameters
-
-                # check for user authentication
-                if not request.user.is_authenticated:
-                    if fallback:
-                        return fallback(request)
-                    raise ViewExceptionRest("Authenticated users only", 401)
-
-                if staff and (not request.user.is_staff and not request.user.is_superuser):
-                    if fallback:
-                        return fallback(request)
-                    raise PermissionDenied("Superuser and staff only")
-
-                # simple permissions check
-                if perms:
-                    for k, v in perms.items():
-                        if not request.user.has_perm(k):
-                            raise PermissionDenied(v)
-
-                # check for the existence of the values into the encoded body
-                data = request.data if hasattr(request, 'data') else request.POST
-
-                if type(content) == tuple:
-                    # simple existence of a parameter into the body (dict and flat model)
-                    for p in content:
-                        if p not in data:
-                            raise ViewExceptionRest("Missing parameter " + p, 400)
-                elif type(content) == dict and request.header.content_format == Format.JSON:
-                    # or do a data validation for JSON content (dict and tree model)
-                    validictory.validate(data, content)
-
-                # call the function
-                return func(*args, **kwargs)
+            wrapper = RestHandler._make_wrapper(
+                func, data_format, parameters, content, auth=True, staff=staff, perms=perms, fallback=fallback,
+                etag=etag, last_modified=last_modified)
 
             # target conditions
             conditions = RestHandler._make_conditions(data_format, parameters, kwargs)
 
             # register the wrapper
-            wrapper.target_name = func.__module__ + '.' + func.__qualname__
             cls._register_wrapper(wrapper, method, data_format, parameters, content, conditions)
 
             return wrapper
@@ -547,7 +975,8 @@ class RestHandler(object, metaclass=RestHandlerMeta):
         return decorator
 
     @classmethod
-    def def_admin_request(cls, method, data_format, parameters=(), content=(), fallback=None, **kwargs):
+    def def_admin_request(cls, method, data_format, parameters=(), content=(), fallback=None,
+                          etag=None, last_modified=None, **kwargs):
         """
         Same as :meth:`def_request` but in addition the user must be authenticated
         and superuser.
@@ -556,45 +985,14 @@ class RestHandler(object, metaclass=RestHandlerMeta):
         """
         # create a decorator for the function
         def decorator(func):
-            def wrapper(*args, **kwargs):
-                request = args[0]
-
-                # add the parameters to the request
-                request.format = data_format
-                request.parameters = parameters
-
-                # check for user authentication
-                if not request.user.is_authenticated:
-                    if fallback:
-                        return fallback(request)
-                    raise ViewExceptionRest("Authenticated users only", 401)
-
-                # check for super-user authentication
-                if not request.user.is_superuser:
-                    if fallback:
-                        return fallback(request)
-                    raise PermissionDenied("Superuser only")
-
-                # check for the existence of the values into the encoded body
-                data = request.data if hasattr(request, 'data') else request.POST
-
-                if type(content) == tuple:
-                    # simple existence of a parameter into the body (dict and flat model)
-                    for p in content:
-                        if p not in data:
-                            raise ViewExceptionRest("Missing parameter " + p, 400)
-                elif type(content) == dict and request.header.content_format == Format.JSON:
-                    # or do a data validation for JSON content (dict and tree model)
-                    validictory.validate(data, content)
-
-                # call the function
-                return func(*args, **kwargs)
+            wrapper = RestHandler._make_wrapper(
+                func, data_format, parameters, content, admin=True, fallback=fallback,
+                etag=etag, last_modified=last_modified)
 
             # target conditions
             conditions = RestHandler._make_conditions(data_format, parameters, kwargs)
 
             # register the wrapper
-            wrapper.target_name = func.__module__ + '.' + func.__qualname__
             cls._register_wrapper(wrapper, method, data_format, parameters, content, conditions)
 
             return wrapper
@@ -611,7 +1009,8 @@ class InlineRestHandler(object):
         self.version = version
 
 
-def def_inline_request(inline_handler, method, data_format, parameters=(), content=(), **kwargs):
+def def_inline_request(inline_handler, method, data_format, parameters=(), content=(),
+                       etag=None, last_modified=None, **kwargs):
     """
     Request function register and wrapper for non auth requests.
 
@@ -627,13 +1026,21 @@ def def_inline_request(inline_handler, method, data_format, parameters=(), conte
         * method : from the decorator
         * data_format : from the decorator
 
+    The decorated function can be a coroutine function (async def), with Django 3.1 or later.
+
     :param igdectk.rest.Method method: One of the Method value (GET, POST...) define the accepted method.
     :param igdectk.rest.Format data_format: One of the Format value (JSON, HTML...) defines the format of the http
         response, and the accepted value from HTTP_ACCEPT.
     :param list parameters: A list of strings or an empty list, containing the names of the
         mandatory parameters requested in the URL.
     :param list(str) content: A list of strings or an empty list, containing the names of the
-        mandatory parameters requested in the body, or validictory object.
+        mandatory parameters requested in the body, or validictory object. The validictory schema
+        is compiled once, see :class:`igdectk.rest.validator.FastSchema` for a faster validation.
+    :param func etag: Optional function(request, *args, **kwargs) returning the ETag of the
+        response, or None. A matching If-None-Match gives a 304 response without calling the view.
+    :param func last_modified: Optional function(request, *args, **kwargs) returning the last
+        modification datetime of the response, or None. An If-Modified-Since not older
+        gives a 304 response without calling the view.
     :param string kwargs: The next parameters if theirs names starts with a 'url__' will
         be used as condition expression for the url parameters.
 
@@ -650,27 +1057,8 @@ def def_inline_request(inline_handler, method, data_format, parameters=(), conte
         Otherwise a :exc:`RestRegistrationException` exception is raised.
     """
     def decorator(func):
-        def wrapper(*args, **kwargs):
-            request = args[0]
-
-            # add the parameters to the request
-            request.format = data_format
-            request.parameters = parameters
-
-            # check for the existence of the values into the encoded body
-            data = request.data if hasattr(request, 'data') else request.POST
-
-            if type(content) == tuple:
-                # simple existence of a parameter into the body (dict and flat model)
-                for p in content:
-                    if p not in data:
-                        raise ViewExceptionRest("Missing parameter " + p, 400)
-            elif type(content) == dict and request.header.content_format == Format.JSON:
-                # or do a data validation for JSON content (dict and tree model)
-                validictory.validate(data, content)
-
-            # call the function
-            return func(*args, **kwargs)
+        wrapper = RestHandler._make_wrapper(
+            func, data_format, parameters, content, etag=etag, last_modified=last_modified)
 
         # get the default application name from decorated function
         if inline_handler.app_name:
@@ -688,7 +1076,6 @@ def def_inline_request(inline_handler, method, data_format, parameters=(), conte
         conditions = RestHandler._make_conditions(data_format, parameters, kwargs)
 
         # register the wrapper
-        wrapper.target_name = func.__module__ + '.' + func.__qualname__
         _InlineRestHandler._register_wrapper(wrapper, method, data_format, parameters, content, conditions)
 
         return wrapper
@@ -697,51 +1084,17 @@ def def_inline_request(inline_handler, method, data_format, parameters=(), conte
 
 
 def def_inline_auth_request(
-        inline_handler, method, data_format, parameters=(), content=(), fallback=None, perms=None, staff=None, **kwargs):
+        inline_handler, method, data_format, parameters=(), content=(), fallback=None, perms=None, staff=None,
+        etag=None, last_modified=None, **kwargs):
     """
     Same as :func:`def_inline_request` but in addition the user must be authenticated.
 
     :param func fallback: Optional callback function called in case the user is not authenticated.
     """
     def decorator(func):
-        def wrapper(*args, **kwargs):
-            request = args[0]
-
-            # add the parameters to the request
-            request.format = data_format
-            request.parameters = parameters
-
-            # check for user authentication
-            if not request.user.is_authenticated:
-                if fallback:
-                    return fallback(request)
-                raise ViewExceptionRest("Authenticated users only", 401)
-
-            if staff and (not request.user.is_staff and not request.user.is_superuser):
-                if fallback:
-                    return fallback(request)
-                raise PermissionDenied("Superuser and staff only")
-
-            # simple permissions check
-            if perms:
-                for k, v in perms.items():
-                    if not request.user.has_perm(k):
-                        raise PermissionDenied(v)
-
-            # check for the existence of the values into the encoded body
-            data = request.data if hasattr(request, 'data') else request.POST
-
-            if type(content) == tuple:
-                # simple existence of a parameter into the body (dict and flat model)
-                for p in content:
-                    if p not in data:
-                        raise ViewExceptionRest("Missing parameter " + p, 400)
-            elif type(content) == dict and request.header.content_format == Format.JSON:
-                # or do a data validation for JSON content (dict and tree model)
-                validictory.validate(data, content)
-
-            # call the function
-            return func(*args, **kwargs)
+        wrapper = RestHandler._make_wrapper(
+            func, data_format, parameters, content, auth=True, staff=staff, perms=perms, fallback=fallback,
+            etag=etag, last_modified=last_modified)
 
         # get the default application name from decorated function
         if inline_handler.app_name:
@@ -759,7 +1112,6 @@ def def_inline_auth_request(
         conditions = RestHandler._make_conditions(data_format, parameters, kwargs)
 
         # register the wrapper
-        wrapper.target_name = func.__module__ + '.' + func.__qualname__
         _InlineRestHandler._register_wrapper(wrapper, method, data_format, parameters, content, conditions)
 
         return wrapper
@@ -767,46 +1119,17 @@ def def_inline_auth_request(
     return decorator
 
 
-def def_inline_admin_request(inline_handler, method, data_format, parameters=(), content=(), fallback=None, **kwargs):
+def def_inline_admin_request(inline_handler, method, data_format, parameters=(), content=(), fallback=None,
+                             etag=None, last_modified=None, **kwargs):
     """
     Same as :meth:`def_inline_request` but in addition the user must be authenticated.
 
     :param func fallback: Optional callback function called in case the user is not authenticated.
     """
     def decorator(func):
-        def wrapper(*args, **kwargs):
-            request = args[0]
-
-            # add the parameters to the request
-            request.format = data_format
-            request.parameters = parameters
-
-            # check for user authentication
-            if not request.user.is_authenticated:
-                if fallback:
-                    return fallback(request)
-                raise ViewExceptionRest("Authenticated users only", 401)
-
-            # check for super-user authentication
-            if not request.user.is_superuser:
-                if fallback:
-                    return fallback(request)
-                raise PermissionDenied("Superuser only")
-
-            # check for the existence of the values into the encoded body
-            data = request.data if hasattr(request, 'data') else request.POST
-
-            if type(content) == tuple:
-                # simple existence of a parameter into the body (dict and flat model)
-                for p in content:
-                    if p not in data:
-                        raise ViewExceptionRest("Missing parameter " + p, 400)
-            elif type(content) == dict and request.header.content_format == Format.JSON:
-                # or do a data validation for JSON content (dict and tree model)
-                validictory.validate(data, content)
-
-            # call the function
-            return func(*args, **kwargs)
+        wrapper = RestHandler._make_wrapper(
+            func, data_format, parameters, content, admin=True, fallback=fallback,
+            etag=etag, last_modified=last_modified)
 
         # get the default application name from decorated function
         if inline_handler.app_name:
@@ -824,7 +1147,6 @@ def def_inline_admin_request(inline_handler, method, data_format, parameters=(),
         conditions = RestHandler._make_conditions(data_format, parameters, kwargs)
 
         # register the wrapper
-        wrapper.target_name = func.__module__ + '.' + func.__qualname__
         _InlineRestHandler._register_wrapper(wrapper, method, data_format, parameters, content, conditions)
 
         return wrapper
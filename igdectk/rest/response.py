@@ -11,19 +11,34 @@
 import json
 import uuid
 
-from datetime import date, datetime
+from datetime import date
 
-from django.core import serializers
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
 from django.db.models.query import QuerySet
 from django.db import models
 
 import decimal
 import igdectk.xmlio
-from django.utils import six
-from django.utils.functional import Promise
+from igdectk.common.serialization import model_to_python, queryset_to_python
+from django.utils.functional import LazyObject, Promise, empty
 
 from igdectk.rest import Format
+from igdectk.rest.compression import compress_response
+
+
+def _lazy_object(obj):
+    # the wrapped object of a lazy object, as the request data
+    if obj._wrapped is empty:
+        obj._setup()
+    return obj._wrapped
+
+
+def _object_dict(obj):
+    if hasattr(obj, "__dict__"):
+        return obj.__dict__
+
+    raise TypeError("Object of type %s is not JSON serializable" % obj.__class__.__name__)
 
 
 class ComplexEncoder(json.JSONEncoder):
@@ -31,46 +46,318 @@ class ComplexEncoder(json.JSONEncoder):
     """
     Support standard json dumps plus serializers for django
     query set and model object.
+
+    The handler of an object is looked up by its type into :attr:`handlers`, the first
+    of the matching types is used, and it is cached for each concrete type. Objects of others
+    types are encoded as their __dict__.
     """
 
+    # pairs of (type, function(obj) returning a JSON serializable value), in order of priority
+    handlers = [
+        (QuerySet, queryset_to_python),
+        (models.Model, model_to_python),
+        (date, lambda obj: obj.isoformat()),  # date and datetime
+        (decimal.Decimal, str),
+        (Promise, str),
+        (uuid.UUID, str),
+        (LazyObject, _lazy_object),
+    ]
+
+    # handler by concrete type, for each class as a subclass can override the handlers
+    _cache = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._cache = {}
+
+    @classmethod
+    def register(cls, obj_type, handler):
+        """
+        Register a handler for a type, having priority over the previously registered ones.
+        The subclasses not overriding the handlers inherit it.
+
+        :param type obj_type: Type of the objects, including its subclasses.
+        :param func handler: Function taking the object and returning a JSON serializable value.
+        """
+        cls.handlers = [(obj_type, handler)] + cls.handlers
+        cls._clear_cache()
+
+    @classmethod
+    def _clear_cache(cls):
+        cls._cache = {}
+
+        for subclass in cls.__subclasses__():
+            subclass._clear_cache()
+
+    @classmethod
+    def get_handler(cls, obj_type):
+        """
+        Returns the handler function for a type of object.
+        """
+        handler = cls._cache.get(obj_type)
+
+        if handler is None:
+            handler = _object_dict
+
+            for handler_type, type_handler in cls.handlers:
+                if issubclass(obj_type, handler_type):
+                    handler = type_handler
+                    break
+
+            cls._cache[obj_type] = handler
+
+        return handler
+
     def default(self, obj):
-        if isinstance(obj, QuerySet):
-            return serializers.serialize("python", obj)
-        elif isinstance(obj, models.Model):
-            return serializers.serialize('python', [obj])[0]
-        elif isinstance(obj, date):
-            return obj.isoformat()
-        elif isinstance(obj, datetime):
-            return obj.isoformat()
-        elif isinstance(obj, decimal.Decimal):
-            return str(obj)
-        elif isinstance(obj, Promise):
-            return six.text_type(obj)
-        elif isinstance(obj, uuid.UUID):
-            return str(obj)
-        elif hasattr(obj, "__dict__"):
-            return obj.__dict__
+        return self.get_handler(type(obj))(obj)
+
+
+class JsonBackend(object):
+    """
+    Interface of a JSON serializer, using the handlers of :class:`ComplexEncoder` for the
+    types not natively supported.
+    """
+
+    name = None
+
+    def dumps(self, obj):
+        """
+        Encode a Python object to JSON.
+
+        :return: UTF-8 encoded JSON.
+        :rtype: bytes
+        """
+        raise NotImplementedError()
+
+
+class StdJsonBackend(JsonBackend):
+    """
+    Standard json module backend, giving the same output as json.dumps(obj, cls=ComplexEncoder).
+    """
+
+    name = 'json'
+
+    def __init__(self):
+        self.encoder = ComplexEncoder()
+
+    def dumps(self, obj):
+        return self.encoder.encode(obj).encode('utf-8')
+
+
+# message of the orjson error raised for an integer larger than 64 bits
+ORJSON_INTEGER_OVERFLOW = 'Integer exceeds 64-bit range'
+
+
+class OrjsonBackend(JsonBackend):
+    """
+    orjson backend, faster but not giving the same output as the standard backend. The dates,
+    datetimes and dataclasses are given to the handlers of :class:`ComplexEncoder`, as the standard
+    backend does. The output is compact and not ASCII escaped, the NaN and infinite floats are
+    encoded as null, and the data containing an integer larger than 64 bits are encoded using
+    the standard backend. Any others errors of orjson are raised.
+    """
+
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+
+        self.orjson = orjson
+        self.option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+        self.default = ComplexEncoder().default
+        self.fallback = StdJsonBackend()
+
+    def dumps(self, obj):
+        try:
+            return self.orjson.dumps(obj, default=self.default, option=self.option)
+        except self.orjson.JSONEncodeError as e:
+            if ORJSON_INTEGER_OVERFLOW not in str(e):
+                raise
+
+            return self.fallback.dumps(obj)
+
+
+JSON_BACKENDS = {
+    StdJsonBackend.name: StdJsonBackend,
+    OrjsonBackend.name: OrjsonBackend,
+}
+
+_json_backend = None
+
+
+def get_json_backend():
+    """
+    Returns the JSON backend defined by the REST_JSON_BACKEND setting, one of the
+    names of JSON_BACKENDS, 'json' by default, or 'auto' for orjson when it is installed, else json.
+    The output of orjson differs from the standard one, so it must be enabled explicitly.
+    """
+    global _json_backend
+
+    if _json_backend is None:
+        name = getattr(settings, 'REST_JSON_BACKEND', StdJsonBackend.name)
+
+        if name == 'auto':
+            try:
+                _json_backend = OrjsonBackend()
+            except ImportError:
+                _json_backend = StdJsonBackend()
         else:
-            # Let the base class default method raise the TypeError
-            return json.JSONEncoder.default(self, obj)
+            _json_backend = JSON_BACKENDS[name]()
+
+    return _json_backend
+
+
+def register_json_backend(backend_class):
+    """
+    Register a JSON backend class, selectable using its name into the REST_JSON_BACKEND setting.
+    """
+    global _json_backend
+
+    JSON_BACKENDS[backend_class.name] = backend_class
+    _json_backend = None
+
+
+def dumps_json(obj):
+    """
+    Encode a Python object to JSON using the configured backend.
+
+    :rtype: bytes
+    """
+    return get_json_backend().dumps(obj)
+
+
+# size of the chunks of a streamed response, in characters
+STREAM_CHUNK_SIZE = 65536
+
+# number of model objects fetched at once when streaming a QuerySet
+STREAM_QUERYSET_CHUNK_SIZE = 2000
+
+# types of the keys of a dict supported by the JSON encoder
+JSON_KEY_TYPES = (str, int, float, bool, type(None))
+
+
+def _iter_json(encoder, obj):
+    """
+    Recursively yield the JSON encoded parts of a Python object. QuerySets are fetched
+    by chunks and serialized row by row, dicts, lists and tuples are walked to find them, and any
+    other values are encoded at once.
+    """
+    if isinstance(obj, QuerySet):
+        first = True
+
+        yield '['
+
+        for item in obj.iterator(chunk_size=STREAM_QUERYSET_CHUNK_SIZE):
+            if first:
+                first = False
+            else:
+                yield ', '
+
+            yield encoder.encode(model_to_python(item))
+
+        yield ']'
+    elif isinstance(obj, dict):
+        first = True
+
+        yield '{'
 
+        for key, value in obj.items():
+            if first:
+                first = False
+            else:
+                yield ', '
 
-def HttpResponseRest(request, data):
+            # same conversion of the keys as the JSON encoder
+            if not isinstance(key, str):
+                if not isinstance(key, JSON_KEY_TYPES):
+                    raise TypeError("keys must be str, int, float, bool or None, not %s" % key.__class__.__name__)
+
+                key = json.dumps(key)
+
+            yield encoder.encode(key)
+            yield ': '
+            yield from _iter_json(encoder, value)
+
+        yield '}'
+    elif isinstance(obj, (list, tuple)):
+        first = True
+
+        yield '['
+
+        for value in obj:
+            if first:
+                first = False
+            else:
+                yield ', '
+
+            yield from _iter_json(encoder, value)
+
+        yield ']'
+    else:
+        yield encoder.encode(obj)
+
+
+def iterencode_json(data, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Encode a Python object to JSON as a generator of strings, of about chunk_size characters.
+
+    The output is the same as json.dumps(data, cls=ComplexEncoder), but the QuerySets are
+    iterated using QuerySet.iterator() and serialized row by row, so the memory usage
+    does not depends on the size of the result.
+
+    :param data: Python object to encode.
+    :param int chunk_size: Minimal size of the yielded strings, excepted for the last one.
+    """
+    encoder = ComplexEncoder()
+    buffer = []
+    size = 0
+
+    for part in _iter_json(encoder, data):
+        buffer.append(part)
+        size += len(part)
+
+        if size >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+
+    if buffer:
+        yield ''.join(buffer)
+
+
+def HttpResponseRest(request, data, streaming=False):
     """
     Return an Http response into the correct output format (JSON, XML or HTML),
     according of the request.format parameters.
 
     Format is automatically added when using the
     :class:`igdectk.rest.restmiddleware.IGdecTkRestMiddleware` and views decorators.
+
+    :param RequestContext request: Django request object.
+    :param data: Data of the response.
+    :param boolean streaming: If True and if the format is JSON or XML, the data are encoded
+        incrementally into a StreamingHttpResponse (see :func:`iterencode_json` and
+        :func:`igdectk.xmlio.iterdumps`). Useful for large QuerySets.
+
+    The JSON and XML responses are compressed according to the Accept-Encoding of the request
+    (see :func:`igdectk.rest.compression.compress_response`).
     """
     if request.format == Format.JSON:
-        encoded = json.dumps(data, cls=ComplexEncoder)
-        return HttpResponse(encoded, content_type=Format.JSON.content_type)
+        if streaming:
+            response = StreamingHttpResponse(iterencode_json(data), content_type=Format.JSON.content_type)
+        else:
+            response = HttpResponse(dumps_json(data), content_type=Format.JSON.content_type)
+
+        return compress_response(request, response, Format.JSON)
     elif request.format == Format.HTML:
         return HttpResponse(data)
     elif request.format == Format.XML:
-        encoded = igdectk.xmlio.dumps(data)
-        return HttpResponse(encoded, content_type=Format.XML.content_type)
+        if streaming:
+            response = StreamingHttpResponse(igdectk.xmlio.iterdumps(data), content_type=Format.XML.content_type)
+        else:
+            response = HttpResponse(igdectk.xmlio.dumps(data), content_type=Format.XML.content_type)
+
+        return compress_response(request, response, Format.XML)
     elif request.format == Format.TEXT:
         return HttpResponse(data, content_type=Format.TEXT.content_type)
     else:
@@ -11,29 +11,59 @@
 # When a view is decorated by def_request or def_auth_request,
 # this modify the data attached to the request and the format.
 
-import json
 import logging
-import threading
+
+from asyncio import CancelledError
+from contextvars import ContextVar
+
+from xml.etree.ElementTree import ParseError
+
+from functools import lru_cache
 
 from django import http
 from django.core.exceptions import *
-from django.template import RequestContext
-from django.template.loader import render_to_string
+from django.conf import settings
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
 from django.contrib import messages
 from django.urls import resolve
 from django.apps import apps
 from django.utils.translation.trans_real import parse_accept_lang_header
 
-from validictory import FieldValidationError
-
 import igdectk.xmlio
 
-from igdectk.rest.response import ComplexEncoder
+from igdectk.common.logging import TracebackLogger
+
+from igdectk.rest.compression import compress_response
+from igdectk.rest.response import dumps_json
+
+try:
+    from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+except ImportError:  # asgiref < 3.6, or not installed when there is no async views
+    from asyncio import coroutines, iscoroutinefunction
+
+    try:
+        from asgiref.sync import sync_to_async
+    except ImportError:
+        sync_to_async = None
+
+    def markcoroutinefunction(func):
+        func._is_coroutine = coroutines._is_coroutine
+        return func
 
 from . import Format
 
 logger = logging.getLogger(__name__)
 
+# tracebacks of the internal errors are formatted and logged by a background thread
+traceback_logger = TracebackLogger(logger)
+
+# request processed by the current thread or task
+_current_request = ContextVar('current_request', default=None)
+
+# exceptions stopping the processing, propagated without an error response
+UNHANDLED_EXCEPTIONS = (CancelledError, KeyboardInterrupt, SystemExit)
+
 
 class ViewExceptionRest(Exception):
     """
@@ -52,6 +82,113 @@ class HttpResponseUnauthorized(http.HttpResponse):
     status_code = 401
 
 
+class CurrentRequestLocal(object):
+    """
+    Read only replacement of the former thread local storage of :class:`RestMiddleware`, giving
+    the user and the remote address of the current request of the thread or task. As with
+    the thread local storage, the attributes are undefined out of a request.
+
+    Deprecated, use :meth:`RestMiddleware.current_user` and :meth:`RestMiddleware.current_remote_addr`.
+    """
+
+    @property
+    def current_user(self):
+        request = _current_request.get()
+        if request is None:
+            raise AttributeError('current_user')
+
+        return getattr(request, 'user', None)
+
+    @property
+    def current_remote_addr(self):
+        request = _current_request.get()
+        if request is None:
+            raise AttributeError('current_remote_addr')
+
+        return request.META.get('REMOTE_ADDR', '')
+
+
+# maximum number of distinct error responses bodies templates kept formatted
+ERROR_BODY_CACHE_SIZE = 1024
+
+# placeholder of the cause into the templates of the error responses bodies
+ERROR_CAUSE_MARK = 'igdectk.rest.error.cause'
+
+
+def _error_body(fmt, message, code, error):
+    result = {
+        "result": "failed",
+        "cause": message,
+        "code": code,
+        "error": error
+    }
+
+    # JSON format
+    if fmt == Format.JSON:
+        return dumps_json(result)
+
+    # XML format
+    elif fmt == Format.XML:
+        return igdectk.xmlio.dumps(result)
+
+    # TEXT and others formats
+    return "result: %(result)s\ncause: %(cause)s\ncode: %(code)i" % result
+
+
+def _encode_cause(fmt, message):
+    # the cause as encoded into the error body
+    if fmt == Format.JSON:
+        return dumps_json(message)
+    elif fmt == Format.XML:
+        return igdectk.xmlio.dumps({"cause": message})
+
+    return "%s" % (message,)
+
+
+@lru_cache(maxsize=ERROR_BODY_CACHE_SIZE)
+def error_body_template(fmt, code, error):
+    """
+    Returns the parts of the body of an error response before and after its encoded cause,
+    or None if the cause cannot be substituted. The templates are cached by (format, code, error).
+
+    :param Format fmt: Format of the response.
+    :param int code: HTTP code.
+    :param str error: Error code.
+
+    :rtype: tuple
+    """
+    body = _error_body(fmt, ERROR_CAUSE_MARK, code, error)
+    cause = _encode_cause(fmt, ERROR_CAUSE_MARK)
+
+    # the XML encoder gives no body for the simple values of the root
+    if not cause:
+        return None
+
+    before, mark, after = body.partition(cause)
+
+    return (before, after) if mark else None
+
+
+def error_body(fmt, message, code, error):
+    """
+    Format the body of an error response for a non HTML format, from the cached template of
+    the format, code and error, and from the message.
+
+    :param Format fmt: Format of the response.
+    :param message: Message constant string, or a list of messages.
+    :param int code: HTTP code.
+    :param str error: Error code.
+
+    :rtype: str or bytes
+    """
+    template = error_body_template(fmt, code, error) if isinstance(error, str) else None
+
+    if template is None:
+        return _error_body(fmt, message, code, error)
+
+    return template[0] + _encode_cause(fmt, message) + template[1]
+
+
 def parse_content_type(content_type):
     parts = content_type.strip().split(";")
     media_type = parts.pop(0)
@@ -88,10 +225,131 @@ def parse_accept_header(accept):
     return result
 
 
+# maximum number of distinct raw header values kept parsed, per header
+HEADER_CACHE_SIZE = 512
+
+# Format by content type, ANY excepted
+FORMATS_BY_CONTENT_TYPE = {
+    Format.JSON.content_type: Format.JSON,
+    Format.XML.content_type: Format.XML,
+    Format.HTML.content_type: Format.HTML,
+    Format.MULTIPART.content_type: Format.MULTIPART,
+    Format.TEXT.content_type: Format.TEXT,
+}
+
+# Format by accepted media type, with the usual plain text media type
+FORMATS_BY_MEDIA_TYPE = dict(FORMATS_BY_CONTENT_TYPE, **{'text/plain': Format.TEXT})
+
+# formats offered for a wildcard media range, by order of preference
+NEGOTIATED_FORMATS = (Format.TEXT, Format.JSON, Format.XML, Format.HTML, Format.MULTIPART)
+
+# formats offered by media range, */* and type/*
+FORMATS_BY_MEDIA_RANGE = {
+    media_range: tuple(fmt for fmt in NEGOTIATED_FORMATS if media_range in (
+        '*/*', '*', fmt.content_type.split('/', 1)[0] + '/*'))
+    for media_range in ('*/*', '*', 'text/*', 'application/*', 'multipart/*')}
+
+
+def negotiate_format(accept):
+    """
+    Select the Format the most accepted by a parsed Accept header, according to the RFC 7231 :
+    the quality of a format is given by the most specific media range matching it, and a
+    format having a zero quality is not acceptable. For the equal qualities, the first media
+    range of the header wins, and for the wildcards the order of :data:`NEGOTIATED_FORMATS`.
+
+    :param tuple accept: Tuple of (media_type, media_params, q_value) ordered by q values,
+        as returned by :func:`parse_accept_header`.
+
+    :return: The negotiated Format, HTML for an empty header, or TEXT if none is acceptable.
+    :rtype: Format
+    """
+    if not accept:
+        return Format.HTML
+
+    # quality of the most specific media ranges, the first one wins
+    qualities = {}
+    for media_type, media_params, q in accept:
+        qualities.setdefault(media_type.lower(), q)
+
+    def quality(fmt):
+        content_type = fmt.content_type
+        q = qualities.get(content_type)
+        if q is None and fmt is Format.TEXT:
+            q = qualities.get('text/plain')
+        if q is None:
+            q = qualities.get(content_type.split('/', 1)[0] + '/*')
+        if q is None:
+            q = qualities.get('*/*', qualities.get('*', 0.0))
+        return q
+
+    for media_type, media_params, q in accept:
+        if q <= 0.0:
+            break
+
+        media_type = media_type.lower()
+        fmt = FORMATS_BY_MEDIA_TYPE.get(media_type)
+
+        for candidate in ((fmt,) if fmt is not None else FORMATS_BY_MEDIA_RANGE.get(media_type, ())):
+            # a more specific media range can give another quality
+            if quality(candidate) == q:
+                return candidate
+
+    return Format.TEXT
+
+
+@lru_cache(maxsize=HEADER_CACHE_SIZE)
+def cached_accept_header(accept):
+    """
+    Parse and cache an Accept header value, and negotiate its Format.
+    The result is shared between the requests.
+
+    :param str accept: Accept string from HTTP header.
+
+    :return: A triplet with the tuple of (media_type, media_params, q_value) ordered by q values,
+        the tuple of the media types, and the preferred Format.
+    :rtype: tuple
+    """
+    parsed = tuple(parse_accept_header(accept))
+    return parsed, tuple(t[0] for t in parsed), negotiate_format(parsed)
+
+
+@lru_cache(maxsize=HEADER_CACHE_SIZE)
+def cached_accept_language_header(accept_language):
+    """
+    Parse and cache an Accept-Language header value. The result is shared between the requests.
+
+    :param str accept_language: Accept-Language string from HTTP header.
+
+    :return: A pair with the tuple of (language_code, q_value) ordered by q values,
+        and the tuple of the languages codes.
+    :rtype: tuple
+    """
+    parsed = tuple(parse_accept_lang_header(accept_language))
+    return parsed, tuple(t[0] for t in parsed)
+
+
+@lru_cache(maxsize=HEADER_CACHE_SIZE)
+def cached_content_type(content_type):
+    """
+    Parse and cache a Content-Type header value. The result is shared between the requests.
+
+    :param str content_type: Content-Type string from HTTP header.
+
+    :return: A pair with the pair (media_type, media_params) and the Format (ANY if unknown).
+    :rtype: tuple
+    """
+    parsed = parse_content_type(content_type)
+    return parsed, FORMATS_BY_CONTENT_TYPE.get(parsed[0].strip().lower(), Format.ANY)
+
+
 class HttpHeader(object):
 
     """
     HTTP header parser with cache.
+
+    The headers are parsed lazily, at the first access, and the parsed values are
+    immutables (tuples) shared by the requests having the same raw headers. The lists
+    are returned as copies, that can be modified by the caller.
     """
 
     def __init__(self, request):
@@ -99,138 +357,88 @@ class HttpHeader(object):
 
         # HTTP_ACCEPT
         self._accept = None
-        self._accepted_types = None
 
         # HTTP_ACCEPT_LANGUAGE
         self._accept_language = None
-        self._accepted_language_codes = None
 
         # CONTENT_TYPE
         self._content_type = None
-        self._content_format = None
 
-    def _cache_http_accept(self):
-        accept = parse_accept_header(self.request.META.get("HTTP_ACCEPT", ""))
-        self._accept = accept
-        self._accepted_types = [t[0] for t in accept]
+    def _http_accept(self):
+        if self._accept is None:
+            self._accept = cached_accept_header(self.request.META.get("HTTP_ACCEPT", ""))
+        return self._accept
 
     @property
     def accept(self):
         """
-        Returns the HTTP_ACCEPT list of pairs (media_type, q_value).
-        This list is cached the first time.
+        Returns the HTTP_ACCEPT list of (media_type, media_params, q_value).
+        The header is parsed the first time, and a new list is returned at each call.
         """
-        # not cached
-        if not self._accept:
-            self._cache_http_accept()
-        return self._accept
+        return list(self._http_accept()[0])
 
     @property
     def accepted_types(self):
         """
         Sames as :ref:`accept` but returns only the media_type.
-        This list is cached the first time.
+        The header is parsed the first time, and a new list is returned at each call.
         """
-        # not cached
-        if not self._accepted_types:
-            self._cache_http_accept()
-        return self._accepted_types
+        return list(self._http_accept()[1])
 
     @property
     def preferred_type(self):
         """
         Get the preferred media_type as Format enum.
         """
-        # not cached
-        if not self._accepted_types:
-            self._cache_http_accept()
-
-        if not self._accepted_types:
-            return Format.HTML
-
-        if self._accepted_types[0] == Format.JSON.content_type:
-            return Format.JSON
-        elif self._accepted_types[0] == Format.XML.content_type:
-            return Format.XML
-        elif self._accepted_types[0] == Format.HTML.content_type:
-            return Format.HTML
-        elif self._accepted_types[0] == Format.MULTIPART.content_type:
-            return Format.MULTIPART
-        elif self._accepted_types[0] == Format.TEXT.content_type:
-            return Format.TEXT
-        else:
-            return Format.TEXT
+        return self._http_accept()[2]
 
-    def _cache_http_accept_language(self):
-        accept_language = parse_accept_lang_header(self.request.META.get("HTTP_ACCEPT_LANGUAGE", ""))
-        self._accept_language = accept_language
-        self._accepted_language_codes = [t[0] for t in accept_language]
+    def _http_accept_language(self):
+        if self._accept_language is None:
+            self._accept_language = cached_accept_language_header(self.request.META.get("HTTP_ACCEPT_LANGUAGE", ""))
+        return self._accept_language
 
     @property
     def accept_language(self):
         """
-        Returns the HTTP_ACCEPT_LANGUAGE as a list of pairs.
-        This list is cached the first time.
+        Returns the HTTP_ACCEPT_LANGUAGE as a tuple of pairs.
+        This tuple is cached the first time.
         """
-        # not cached
-        if not self._accept_language:
-            self._cache_http_accept_language()
-        return self._accept_language
+        return self._http_accept_language()[0]
 
     @property
     def accepted_language_codes(self):
         """
         Sames as :ref:`accept_language` but returns only the languages codes.
-        This list is cached the first time.
+        The header is parsed the first time, and a new list is returned at each call.
         """
-        # not cached
-        if not self._accepted_laguage_codes:
-            self._cache_http_accept_language()
-        return self._accepted_laguage_codes
+        return list(self._http_accept_language()[1])
 
     @property
     def preferred_language_code(self):
-        # not cached
-        if not self._accepted_language_codes:
-            self._cache_http_accept_language()
-        if len(self._accepted_language_codes) > 0:
-            return self._accepted_language_codes[0]
+        codes = self._http_accept_language()[1]
+        if len(codes) > 0:
+            return codes[0]
         else:
             return 'en_US'
 
-    def _cache_content_type(self):
-        self._content_type = parse_content_type(self.request.META.get("CONTENT_TYPE", ""))
-
-        if self._content_type[0] == Format.JSON.content_type:
-            self._content_format = Format.JSON
-        elif self._content_type[0] == Format.XML.content_type:
-            self._content_format = Format.XML
-        elif self._content_type[0] == Format.HTML.content_type:
-            self._content_format = Format.HTML
-        elif self._content_type[0] == Format.MULTIPART.content_type:
-            self._content_format = Format.MULTIPART
-        elif self._content_type[0] == Format.TEXT.content_type:
-            self._content_format = Format.TEXT
-        else:
-            self._content_format = Format.ANY
+    def _http_content_type(self):
+        if self._content_type is None:
+            self._content_type = cached_content_type(self.request.META.get("CONTENT_TYPE", ""))
+        return self._content_type
 
     @property
     def content_type(self):
         """
         Returns a pair with content type and a tuples of content settings.
         """
-        if not self._content_type:
-            self._cache_content_type()
-        return self._content_type
+        return self._http_content_type()[0]
 
     @property
     def content_format(self):
         """
         Returns a Format for the content type.
         """
-        if not self._content_format:
-            self._cache_content_type()
-        return self._content_format
+        return self._http_content_type()[1]
 
 
 class RestMiddleware(object):
@@ -245,8 +453,17 @@ class RestMiddleware(object):
     :meth:`igdectk.rest.handler.RestHandler.def_auth_request` or by
     :meth:`igdectk.rest.handler.RestHandler.def_admin_request`,
     the decorator can attach a data dict to the request object.
+
+    The middleware is sync and async capable. It runs as a coroutine when the next
+    layer of the handler is a coroutine (ASGI), avoiding a thread switch per request.
     """
 
+    sync_capable = True
+    async_capable = True
+
+    # compatibility with the former thread local storage of the current user and remote address
+    thread_local = CurrentRequestLocal()
+
     TYPES = {
         400: http.HttpResponseBadRequest,
         401: HttpResponseUnauthorized,
@@ -255,18 +472,57 @@ class RestMiddleware(object):
         500: http.HttpResponseServerError,
     }
 
-    thread_local = threading.local()
+    # compiled HTTP error templates, or None, by (application name, code)
+    error_templates = {}
+
+    # classifier function of the exceptions by registered type
+    exception_classifiers = {}
+
+    # classifier function, or None for an internal error, by raised exception type
+    _classifiers_cache = {}
 
     def __init__(self, get_response=None):
         self.get_response = get_response
+        self.is_async = get_response is not None and iscoroutinefunction(get_response)
+
+        if self.is_async:
+            # Django then calls the middleware as a coroutine
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        token = _current_request.set(request)
         self.process_request(request)
 
         try:
             response = self.get_response(request)
+        except UNHANDLED_EXCEPTIONS:
+            raise
         except BaseException as e:
             response = self.process_exception(request, e)
+        finally:
+            _current_request.reset(token)
+
+        return response
+
+    async def __acall__(self, request):
+        """
+        Async version of :meth:`__call__`.
+        """
+        token = _current_request.set(request)
+        self.process_request(request)
+
+        try:
+            response = await self.get_response(request)
+        except UNHANDLED_EXCEPTIONS:
+            raise
+        except BaseException as e:
+            # the error page rendering can use the database
+            response = await sync_to_async(self.process_exception)(request, e)
+        finally:
+            _current_request.reset(token)
 
         return response
 
@@ -285,51 +541,72 @@ class RestMiddleware(object):
         """
         response_type = RestMiddleware.TYPES.get(code, http.HttpResponse)
 
-        result = {
-            "result": "failed",
-            "cause": message,
-            "code": code,
-            "error": error
-        }
-
-        # JSON format
-        if request.format == Format.JSON:
-            data = json.dumps(result, cls=ComplexEncoder)
-
         # HTML format
-        elif request.format == Format.HTML:
+        if request.format == Format.HTML:
             # append a Bootstrap message error
             messages.error(request, 'Http %i: %s' % (code, message))
 
             # render a default error page if it excepts
             try:
-                # get HTTP_TEMPLATE_STRING from the app of the request
-                app_name = resolve(request.path).app_name
-                current_app = apps.get_app_config(app_name)
-                http_template_string = current_app.http_template_string
-
-                data = render_to_string(
-                    http_template_string % (code,),
-                    result,
-                    request=request)
+                template = RestMiddleware.error_template(request, code)
             except Exception:
-                return response_type('Http %i: %s' % (code, message), RequestContext(request))
+                template = None
+
+            if template is None:
+                return response_type('Http %i: %s' % (code, message))
+
+            try:
+                data = template.render({
+                    "result": "failed",
+                    "cause": message,
+                    "code": code,
+                    "error": error
+                }, request)
+            except Exception:
+                return response_type('Http %i: %s' % (code, message))
 
             return response_type(data)
 
-        # XML format
-        elif request.format == Format.XML:
-            data = igdectk.xmlio.dumps(result)
+        data = error_body(request.format, message, code, error)
 
-        # TEXT format
-        elif request.format == Format.TEXT:
-            data = "result: %(result)s\ncause: %(cause)s\ncode: %(code)i" % result
+        return compress_response(
+            request, response_type(data, content_type=request.format.content_type), request.format)
 
-        # ANY others formats
-        else:
-            data = "result: %(result)s\ncause: %(cause)s\ncode: %(code)i" % result
+    @staticmethod
+    def error_template(request, code):
+        """
+        Returns the compiled template of an HTTP error page for the application of the request,
+        or None if the application does not define it.
+
+        The templates are cached per application and per code, excepted in DEBUG mode.
 
-        return response_type(data, content_type=request.format.content_type)
+        :param HttpRequest request: Django request object.
+        :param int code: HTTP code.
+
+        :rtype: Template
+        """
+        # get HTTP_TEMPLATE_STRING from the app of the request
+        resolver_match = getattr(request, 'resolver_match', None)
+        if resolver_match is None:
+            resolver_match = resolve(request.path)
+
+        key = (resolver_match.app_name, code)
+
+        try:
+            return RestMiddleware.error_templates[key]
+        except KeyError:
+            pass
+
+        try:
+            current_app = apps.get_app_config(resolver_match.app_name)
+            template = get_template(current_app.http_template_string % (code,))
+        except (LookupError, AttributeError, TemplateDoesNotExist):
+            template = None
+
+        if not settings.DEBUG:
+            RestMiddleware.error_templates[key] = template
+
+        return template
 
     def process_request(self, request):
         # default request data format to HTML
@@ -340,69 +617,110 @@ class RestMiddleware(object):
 
         request.header = HttpHeader(request)
 
-        # initialize thread local current request information
-        RestMiddleware.thread_local.current_user = request.user
-        RestMiddleware.thread_local.current_remote_addr = request.META.get('REMOTE_ADDR', '')
-
     def process_exception(self, request, exception):
-        if isinstance(exception, ViewExceptionRest):
-            cause, code = exception.args
-            error = "view_exception"
-        elif isinstance(exception, ValueError):
-            cause = exception.args[0]
-            code = 400
-            error = "value_error" if len(exception.args) < 2 else exception.args[1]
-        elif isinstance(exception, SuspiciousOperation):
-            cause = exception.args[0]
-            code = 400
-            error = "suspicious_operation" if len(exception.args) < 2 else exception.args[1]
-        elif isinstance(exception, PermissionDenied):
-            cause = exception.args[0]
-            code = 403
-            error = "permission_denied" if len(exception.args) < 2 else exception.args[1]
-        elif isinstance(exception, http.Http404):
-            cause = exception.args[0]
-            code = 404
-            error = "http404" if len(exception.args) < 2 else exception.args[1]
-        elif isinstance(exception, ObjectDoesNotExist):
-            cause = exception.args[0]
-            code = 404
-            error = "object_does_not_exists" if len(exception.args) < 2 else exception.args[1]
-        elif isinstance(exception, MultipleObjectsReturned):
-            cause = exception.args[0]
-            code = 404
-            error = "multiple_objects_returned" if len(exception.args) < 2 else exception.args[1]
-        elif isinstance(exception, FieldValidationError):
-            cause = exception.args[0]
-            code = 400
-            error = "field_validation_error" if len(exception.args) < 2 else exception.args[1]
-        elif isinstance(exception, ValidationError):
-            cause = exception.messages
-            code = 400
-            error = "field_validation_error" if len(exception.args) < 2 else exception.args[1]
+        classifier = RestMiddleware.get_exception_classifier(type(exception))
+
+        if classifier is not None:
+            cause, code, error = classifier(exception)
         else:
             cause = repr(exception)
             code = 500
             error = "internal_error" if len(exception.args) < 2 else exception.args[1]
 
-            import traceback
-            # write the traceback to the logger (should be redirected to console)
-            logger.error(traceback.format_exc())
+            # write the traceback to the logger (should be redirected to console), from a background thread
+            traceback_logger.log(exception)
 
         return RestMiddleware.format_response(request, cause, code, error)
 
+    @staticmethod
+    def register_exception(exception_type, code=None, error=None, cause=None, classifier=None):
+        """
+        Register how an exception type, and its subclasses, is reported as an error response.
+        The raised exception is classified by the first registered type of its MRO, and the
+        exceptions of the unregistered types are internal errors (500).
+
+        :param type exception_type: Class of the exception.
+        :param int code: HTTP code.
+        :param str error: Error code, unless it is given as the second argument of the exception.
+        :param callable cause: Optional function returning the cause from the exception.
+            By default the first argument of the exception.
+        :param callable classifier: Optional function returning the triplet (cause, code, error)
+            from the exception, in place of code, error and cause.
+        """
+        if classifier is None:
+            def classifier(exception):
+                args = exception.args
+
+                return (
+                    cause(exception) if cause is not None else (args[0] if args else ''),
+                    code,
+                    error if len(args) < 2 else args[1])
+
+        RestMiddleware.exception_classifiers[exception_type] = classifier
+
+        # the registration can change the classification of any subclass
+        RestMiddleware._classifiers_cache.clear()
+
+    @staticmethod
+    def get_exception_classifier(exception_type):
+        """
+        Returns the classifier of an exception type, resolved through its MRO and cached,
+        or None if it is an internal error.
+
+        :param type exception_type: Class of the exception.
+        :rtype: callable
+        """
+        try:
+            return RestMiddleware._classifiers_cache[exception_type]
+        except KeyError:
+            pass
+
+        classifier = None
+
+        for base in exception_type.__mro__:
+            classifier = RestMiddleware.exception_classifiers.get(base)
+            if classifier is not None:
+                break
+
+        RestMiddleware._classifiers_cache[exception_type] = classifier
+        return classifier
+
+    @staticmethod
+    def current_request():
+        """
+        Returns the request processed by the current thread or task, or None.
+        """
+        return _current_request.get()
+
     @staticmethod
     def current_user():
-        tl = RestMiddleware.thread_local
-        if hasattr(tl, 'current_user'):
-            return tl.current_user
+        """
+        Returns the user of the current request, or None. The user is resolved at the first access.
+        """
+        request = _current_request.get()
+        if request is not None:
+            return getattr(request, 'user', None)
         else:
             return None
 
     @staticmethod
     def current_remote_addr():
-        tl = RestMiddleware.thread_local
-        if hasattr(tl, 'current_remote_addr'):
-            return tl.current_remote_addr
+        """
+        Returns the remote address of the current request, or an empty string.
+        """
+        request = _current_request.get()
+        if request is not None:
+            return request.META.get('REMOTE_ADDR', '')
         else:
             return ''
+
+
+RestMiddleware.register_exception(ViewExceptionRest, classifier=lambda e: (e.args[0], e.code, "view_exception"))
+RestMiddleware.register_exception(ValueError, 400, "value_error")
+RestMiddleware.register_exception(ParseError, 400, "parse_error")
+RestMiddleware.register_exception(SuspiciousOperation, 400, "suspicious_operation")
+RestMiddleware.register_exception(PermissionDenied, 403, "permission_denied")
+RestMiddleware.register_exception(http.Http404, 404, "http404")
+RestMiddleware.register_exception(ObjectDoesNotExist, 404, "object_does_not_exists")
+RestMiddleware.register_exception(MultipleObjectsReturned, 404, "multiple_objects_returned")
+RestMiddleware.register_exception(ValidationError, 400, "field_validation_error", cause=lambda e: e.messages)
@@ -0,0 +1,141 @@
+# -*- coding: utf-8; -*-
+#
+# @file router.py
+# @brief URL router for the rest handlers.
+# @author agent (INRA UMR1095)
+# @date 2026-10-18
+# @copyright Copyright (c) 2026 INRA
+# @license MIT (see LICENSE file)
+# @details Single URL resolver indexing the rest handlers by the literal first segment of their regex.
+
+from django.core.exceptions import ImproperlyConfigured
+from django.urls import URLResolver, Resolver404
+from django.urls.resolvers import RegexPattern
+
+# characters having a special meaning into a regular expression
+REGEX_SPECIAL_CHARS = frozenset('.^$*+?{}[]\\|()')
+
+# characters making optional the previous one
+REGEX_QUANTIFIERS = frozenset('*?{')
+
+
+def literal_prefix(regex):
+    """
+    Returns the literal prefix of an anchored regular expression, or None if the
+    regular expression is not anchored at the beginning of the path or contains
+    an alternation.
+
+    :param str regex: Regular expression of the URL.
+
+    :return: The literal part at the beginning of the regex, possibly empty.
+    :rtype: str
+    """
+    # an alternation does not guarantee any prefix
+    if not regex.startswith('^') or '|' in regex:
+        return None
+
+    prefix = []
+    i = 1
+
+    while i < len(regex):
+        c = regex[i]
+
+        if c == '\\':
+            # escaped punctuation is a literal, others escapes are characters classes
+            if i + 1 < len(regex) and not regex[i + 1].isalnum():
+                c = regex[i + 1]
+                i += 1
+            else:
+                break
+        elif c in REGEX_SPECIAL_CHARS:
+            break
+
+        # a quantified character is not a part of the literal prefix
+        if i + 1 < len(regex) and regex[i + 1] in REGEX_QUANTIFIERS:
+            break
+
+        prefix.append(c)
+        i += 1
+
+    return ''.join(prefix)
+
+
+class RestRouter(URLResolver):
+    """
+    URL resolver containing the URL patterns of many rest handlers.
+
+    In place of trying each URL pattern one after another, the patterns are indexed
+    by the first segment of the path when it is a literal into their regex. Only the patterns
+    of this segment, and the patterns having no literal first segment, are tried, in their order
+    of registration. Reverse URLs and names are managed by Django as for an include
+    without namespace.
+
+    It is used by :meth:`igdectk.rest.handler.RestHandler.register_urls` in router mode,
+    and it is appended once into the urlpatterns of each application.
+    """
+
+    def __init__(self):
+        self.patterns = []
+        self._index = None
+        self._generic = None
+
+        super(RestRouter, self).__init__(RegexPattern(r'^'), self.patterns)
+
+    def append(self, url_pattern):
+        """
+        Add a URL pattern at the end of the router.
+
+        The patterns must be added before the first reverse, else an :exc:`ImproperlyConfigured`
+        is raised: the reverse URLs are indexed once by the router and by its parent resolvers,
+        and would miss the pattern.
+        """
+        if self._populated:
+            raise ImproperlyConfigured(
+                "The URL pattern %s is appended into a router already used to reverse URLs" % url_pattern)
+
+        self.patterns.append(url_pattern)
+
+        # index must be built again
+        self._index = None
+        self._generic = None
+
+    def _build_index(self):
+        buckets = {}
+        generic = []
+
+        for order, url_pattern in enumerate(self.patterns):
+            prefix = literal_prefix(url_pattern.pattern.regex.pattern)
+
+            if prefix and '/' in prefix:
+                buckets.setdefault(prefix.split('/', 1)[0], []).append((order, url_pattern))
+            else:
+                generic.append((order, url_pattern))
+
+        # each bucket contains the generic patterns in the order of registration
+        self._index = {
+            segment: [p for o, p in sorted(entries + generic, key=lambda x: x[0])]
+            for segment, entries in buckets.items()}
+
+        self._generic = [p for o, p in generic]
+
+    def resolve(self, path):
+        path = str(path)  # path may be a reverse_lazy object
+
+        if self._index is None:
+            self._build_index()
+
+        if '/' in path:
+            candidates = self._index.get(path.split('/', 1)[0], self._generic)
+        else:
+            candidates = self._generic
+
+        tried = []
+
+        for url_pattern in candidates:
+            sub_match = url_pattern.resolve(path)
+            if sub_match:
+                return sub_match
+
+            tried.append([url_pattern])
+
+        raise Resolver404({'tried': tried, 'path': path})
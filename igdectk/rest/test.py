@@ -0,0 +1,1034 @@
+# -*- coding: utf-8; -*-
+#
+# @file test.py
+# @brief rest sub-package unit tests.
+# @author agent (INRA UMR1095)
+# @date 2026-10-18
+# @copyright Copyright (c) 2026 INRA
+# @license MIT (see LICENSE file)
+# @details The requests are made to the handlers of igdectk.testapp.
+
+import asyncio
+import base64
+import datetime
+import decimal
+import gzip
+import json
+import unittest
+import uuid
+import zlib
+
+from unittest import mock
+
+from xml.etree.ElementTree import ParseError
+
+import validictory
+
+import igdectk.xmlio
+
+from igdectk.testapp import setup
+
+setup()
+
+import django  # noqa
+
+from django.conf.urls import url  # noqa
+from django.contrib.auth.models import Permission, User  # noqa
+from django.core.exceptions import (  # noqa
+    ImproperlyConfigured, ObjectDoesNotExist, PermissionDenied, ValidationError)
+from django.http import Http404, HttpResponse, StreamingHttpResponse  # noqa
+from django.test import Client, RequestFactory, TestCase, override_settings  # noqa
+from django.urls import Resolver404, reverse  # noqa
+
+from igdectk.rest import Format, Method  # noqa
+from igdectk.rest.handler import (  # noqa
+    ASYNC_DJANGO_VERSION, RestHandler, RestRegistrationException, async_condition)
+from igdectk.rest.router import RestRouter, literal_prefix  # noqa
+from igdectk.rest.validator import FastSchema, compile_schema, is_fast_schema  # noqa
+from igdectk.rest.response import (  # noqa
+    ComplexEncoder, HttpResponseRest, JSON_BACKENDS, StdJsonBackend, get_json_backend, iterencode_json)
+from igdectk.rest import batch, restmiddleware  # noqa
+from igdectk.rest.compression import brotli, compress_response, negotiate_encoding  # noqa
+from igdectk.rest.restmiddleware import (  # noqa
+    HttpHeader, RestMiddleware, ViewExceptionRest, _error_body, cached_accept_header, error_body,
+    error_body_template, negotiate_format, parse_accept_header)
+from igdectk.testapp import views  # noqa
+from igdectk.testapp.models import Author, Book  # noqa
+
+JSON = 'application/json'
+XML = 'application/xml'
+
+
+def create_books(count):
+    """
+    Create count books, of two authors, with and without coauthors.
+    """
+    authors = [
+        Author.objects.create(name='First', birth=datetime.date(1950, 1, 2)),
+        Author.objects.create(name='Second é')]
+
+    for i in range(count):
+        book = Book.objects.create(
+            title='Book %i' % i, price=decimal.Decimal('%i.50' % i),
+            published=datetime.datetime(2020, 1, 1 + i % 28, tzinfo=datetime.timezone.utc),
+            available=i % 2 == 0, author=authors[i % 2])
+
+        if i % 3 == 0:
+            book.coauthors.set(authors)
+
+
+class TestDispatch(unittest.TestCase):
+
+    def get(self, query, accept=JSON):
+        response = Client().get('/test/dispatch/' + query, HTTP_ACCEPT=accept)
+
+        if response.status_code != 200:
+            return response.status_code
+        elif response['Content-Type'].startswith(XML):
+            return 'xml'
+
+        return json.loads(response.content)['view']
+
+    def test_conditions(self):
+        self.assertEqual(self.get(''), 'plain')
+        self.assertEqual(self.get('?action=a'), 'a')
+        self.assertEqual(self.get('?action=a&mode=x'), 'ax')
+        self.assertEqual(self.get('?mode=x&action=a'), 'ax')
+        self.assertEqual(self.get('?action=a&mode=y'), 'a')
+        self.assertEqual(self.get('?action=z'), 'plain')
+
+        # mandatory parameter
+        self.assertEqual(self.get('?action=b&q=1'), 'b')
+        self.assertEqual(self.get('?action=b'), 'plain')
+
+    def test_accept(self):
+        self.assertEqual(self.get('?action=c'), 'c')
+        self.assertEqual(self.get('?action=c', XML), 'xml')
+        self.assertEqual(self.get('?action=a', XML), 404)
+
+        # the first registered sub-method is selected
+        self.assertEqual(self.get('?action=c', '*/*'), 'xml')
+        self.assertEqual(self.get('?action=c', JSON + ', ' + XML), 'xml')
+        self.assertEqual(self.get('?action=a', '*/*'), 'a')
+
+    def test_registration(self):
+        self.assertEqual(set(views.RestTestDispatch.dispatch_tables), {'GET'})
+
+        with self.assertRaises(RestRegistrationException):
+            views.RestTestDispatch.def_request(Method.GET, Format.JSON, url__action='a')(views.get_dispatch_a)
+
+
+class TestRouter(unittest.TestCase):
+
+    def test_literal_prefix(self):
+        self.assertEqual(literal_prefix(r'^test/cond/$'), 'test/cond/')
+        self.assertEqual(literal_prefix(r'^test/(?P<id>[0-9]+)/$'), 'test/')
+        self.assertEqual(literal_prefix(r'^test\.json/$'), 'test.json/')
+        self.assertEqual(literal_prefix(r'^tests?/$'), 'test')
+        self.assertEqual(literal_prefix(r'^\d+/$'), '')
+        self.assertIsNone(literal_prefix(r'test/$'))
+        self.assertIsNone(literal_prefix(r'^a/|^b/$'))
+
+    def test_resolve(self):
+        def view(request, **kwargs):
+            return None
+
+        router = RestRouter()
+        router.append(url(r'^item/$', view, name='item'))
+        router.append(url(r'^(?P<name>[a-z]+)/$', view, name='generic'))
+        router.append(url(r'^item/(?P<id>[0-9]+)/$', view, name='item-id'))
+
+        self.assertEqual(router.resolve('item/').url_name, 'item')
+        self.assertEqual(router.resolve('item/12/').url_name, 'item-id')
+        self.assertEqual(router.resolve('item/12/').kwargs, {'id': '12'})
+
+        # in the order of registration
+        self.assertEqual(router.resolve('other/').url_name, 'generic')
+
+        # index built again
+        router.append(url(r'^other/(?P<id>[0-9]+)/$', view, name='other-id'))
+        self.assertEqual(router.resolve('other/12/').url_name, 'other-id')
+
+        for path in ('item/a/', 'other/a/', '12/', ''):
+            with self.assertRaises(Resolver404):
+                router.resolve(path)
+
+    def test_late_append(self):
+        def view(request, **kwargs):
+            return None
+
+        router = RestRouter()
+        router.append(url(r'^item/$', view, name='item'))
+
+        self.assertEqual(router.reverse('item'), 'item/')
+
+        # the reverse URLs are already indexed
+        with self.assertRaises(ImproperlyConfigured):
+            router.append(url(r'^other/$', view, name='other'))
+
+        with self.assertRaises(Resolver404):
+            router.resolve('other/')
+
+    def test_handlers(self):
+        self.assertEqual(reverse('test-dispatch'), '/test/dispatch/')
+
+        client = Client()
+
+        self.assertEqual(client.get('/test/dispatch/', HTTP_ACCEPT=JSON).status_code, 200)
+        self.assertEqual(client.get('/test/undefined/', HTTP_ACCEPT=JSON).status_code, 404)
+        self.assertEqual(client.get('/undefined/', HTTP_ACCEPT=JSON).status_code, 404)
+
+        # undefined method
+        self.assertEqual(client.delete('/test/dispatch/', HTTP_ACCEPT=JSON).status_code, 404)
+
+
+class TestRequestData(unittest.TestCase):
+
+    def setUp(self):
+        self.client = Client()
+
+    def post(self, data, content_type):
+        response = self.client.post('/test/data/', data, content_type=content_type, HTTP_ACCEPT=JSON)
+        return response.status_code, json.loads(response.content)
+
+    def test_decode(self):
+        self.assertEqual(self.post('{"a": [1, 2]}', JSON), (200, {'data': {'a': [1, 2]}}))
+        self.assertEqual(
+            self.post('<root><a>1</a><a>2</a></root>', XML), (200, {'data': {'root': {'a': ['1', '2']}}}))
+        self.assertEqual(self.post('a=1', 'application/x-www-form-urlencoded'), (200, {'data': {'a': '1'}}))
+
+    def test_invalid(self):
+        status, body = self.post('{"a": ', JSON)
+        self.assertEqual((status, body['error']), (400, 'value_error'))
+
+        status, body = self.post('<root><a>1</root>', XML)
+        self.assertEqual((status, body['error']), (400, 'parse_error'))
+
+    def test_xml_too_big(self):
+        data = '<root>%s</root>' % ''.join('<a>%i</a>' % i for i in range(100))
+
+        with override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=len(data)):
+            self.assertEqual(self.post(data, XML)[0], 200)
+
+        with override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=len(data) - 1):
+            status, body = self.post(data, XML)
+            self.assertEqual((status, body['error']), (400, 'suspicious_operation'))
+
+    def test_not_decoded(self):
+        for data, content_type in (('{"a": ', JSON), ('<root><a>1</root>', XML)):
+            response = self.client.post(
+                '/test/data/?mode=ignore', data, content_type=content_type, HTTP_ACCEPT=JSON)
+
+            self.assertEqual(response.status_code, 200)
+
+    def test_decoded_once(self):
+        for data, content_type in (('<root><a>1</root>', XML), ('{"a": ', JSON)):
+            request = RequestFactory().post('/test/data/', data, content_type=content_type)
+            request.header = HttpHeader(request)
+
+            lazy_data = RestHandler._lazy_data(request)
+
+            with self.assertRaises((ParseError, ValueError)) as first:
+                lazy_data['a']
+
+            # the same error, the XML body was consumed by the first access
+            with self.assertRaises((ParseError, ValueError)) as second:
+                lazy_data['a']
+
+            self.assertIs(first.exception, second.exception)
+
+        request = RequestFactory().post('/test/data/', '<root>1</root>', content_type=XML)
+        request.header = HttpHeader(request)
+
+        lazy_data = RestHandler._lazy_data(request)
+        self.assertEqual(lazy_data['root'], '1')
+        self.assertEqual(lazy_data['root'], '1')
+
+
+class TestValidator(unittest.TestCase):
+
+    schemas = [
+        {"type": "object", "properties": {
+            "name": {"type": "string", "minLength": 2, "maxLength": 8},
+            "age": {"type": "integer", "minimum": 0, "maximum": 150, "required": False},
+            "price": {"type": "number", "minimum": 0, "exclusiveMinimum": True, "required": False},
+            "tags": {"type": "array", "items": {"type": "string", "blank": True}, "maxItems": 2, "required": False},
+            "kind": {"type": "string", "enum": ["a", "b"], "required": False},
+            "flag": {"type": "boolean", "required": False},
+            "extra": {"type": "any", "required": False},
+            "none": {"type": "null", "required": False},
+        }},
+        {"type": "array", "minItems": 1, "items": {"type": "object", "properties": {"id": {"type": "integer"}}}},
+    ]
+
+    values = [
+        {"name": "ab"}, {"name": "a"}, {"name": "abcdefghi"}, {"name": ""}, {"name": 1}, {},
+        {"name": "ab", "age": 0}, {"name": "ab", "age": -1}, {"name": "ab", "age": 151}, {"name": "ab", "age": 1.5},
+        {"name": "ab", "age": True}, {"name": "ab", "price": 0}, {"name": "ab", "price": 0.1},
+        {"name": "ab", "tags": ["", "x"]}, {"name": "ab", "tags": ["x", "y", "z"]}, {"name": "ab", "tags": [1]},
+        {"name": "ab", "kind": "a"}, {"name": "ab", "kind": "c"}, {"name": "ab", "flag": 1},
+        {"name": "ab", "extra": [{}]}, {"name": "ab", "none": None}, {"name": "ab", "none": 0},
+        [], [{"id": 1}], [{"id": "1"}], [{}], "ab", None,
+    ]
+
+    def test_fast_schema(self):
+        for schema in self.schemas:
+            self.assertTrue(is_fast_schema(schema))
+
+        self.assertFalse(is_fast_schema({"type": ["string", "null"]}))
+        self.assertFalse(is_fast_schema({"type": "string", "pattern": "^a"}))
+        self.assertFalse(is_fast_schema({"type": "object", "properties": {"a": {"format": "date"}}}))
+
+    def test_same_results(self):
+        for schema in self.schemas + [{"type": "string", "pattern": "^a"}]:
+            fast_validator = compile_schema(FastSchema(schema))
+            validator = compile_schema(schema)
+
+            for value in self.values:
+                try:
+                    validictory.validate(value, schema)
+                    expected = None
+                except ValueError as e:
+                    expected = str(e)
+
+                for validate in (fast_validator, validator):
+                    try:
+                        validate(value)
+                        result = None
+                    except ValueError as e:
+                        result = str(e)
+
+                    self.assertEqual(result, expected, (schema, value))
+
+
+class TestWrapper(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('user')
+        cls.staff = User.objects.create_user('staff', is_staff=True)
+        cls.admin = User.objects.create_superuser('admin', 'admin@localhost', 'admin')
+
+        cls.user.user_permissions.add(Permission.objects.get(codename='add_user'))
+
+    def get(self, query, user=None):
+        client = Client()
+
+        if user is not None:
+            client.force_login(user)
+
+        response = client.get('/test/auth/' + query, HTTP_ACCEPT=JSON)
+        return response.status_code, json.loads(response.content)
+
+    def test_auth(self):
+        self.assertEqual(self.get('?q=1')[0], 401)
+        self.assertEqual(self.get('?q=1', self.user), (200, {'user': 'user', 'q': '1'}))
+
+        # missing parameter
+        self.assertEqual(self.get('', self.user)[0], 404)
+
+        self.assertEqual(self.get('?mode=fallback'), (200, {'user': None}))
+        self.assertEqual(self.get('?mode=fallback', self.user), (200, {'user': 'user'}))
+
+    def test_permissions(self):
+        for mode, granted in (('staff', ('staff', 'admin')), ('perms', ('user', 'admin')), ('admin', ('admin',))):
+            self.assertEqual(self.get('?mode=%s' % mode)[0], 401)
+
+            for user in (self.user, self.staff, self.admin):
+                status, body = self.get('?mode=%s' % mode, user)
+
+                if user.username in granted:
+                    self.assertEqual((status, body), (200, {'user': user.username}))
+                else:
+                    self.assertEqual((status, body['error']), (403, 'permission_denied'))
+
+        self.assertEqual(self.get('?mode=perms', self.staff)[1]['cause'], "Cannot add users")
+
+    def test_content(self):
+        client = Client()
+
+        def post(query, data):
+            response = client.post('/test/auth/' + query, json.dumps(data), content_type=JSON, HTTP_ACCEPT=JSON)
+            return response.status_code, json.loads(response.content)
+
+        self.assertEqual(post('?mode=required', {'name': 'a'}), (200, {'name': 'a'}))
+
+        status, body = post('?mode=required', {})
+        self.assertEqual((status, body['cause']), (400, "Missing parameter name"))
+
+        self.assertEqual(post('', {'name': 'a'}), (200, {'name': 'a'}))
+        self.assertEqual(post('', {'name': 'too long name'})[0], 400)
+        self.assertEqual(post('', {})[0], 400)
+
+
+class TestAsync(unittest.TestCase):
+
+    def setUp(self):
+        self.client = Client()
+
+    @unittest.skipIf(django.VERSION < ASYNC_DJANGO_VERSION, "async views are not supported")
+    def test_async_interceptor(self):
+        self.assertTrue(views.RestTestAsync.is_async())
+        self.assertFalse(views.RestTestDispatch.is_async())
+
+        response = self.client.get('/test/async/?mode=async', HTTP_ACCEPT=JSON)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), {'view': 'async'})
+
+        # sync view of the same handler
+        response = self.client.get('/test/async/', HTTP_ACCEPT=JSON)
+        self.assertEqual(json.loads(response.content), {'view': 'sync'})
+
+        response = self.client.post('/test/async/', HTTP_ACCEPT=JSON)
+        self.assertEqual(response.status_code, 404)
+
+    @unittest.skipIf(django.VERSION >= ASYNC_DJANGO_VERSION, "async views are supported")
+    def test_async_unsupported(self):
+        async def view(request):
+            return HttpResponseRest(request, {})
+
+        with self.assertRaises(RestRegistrationException):
+            views.RestTestAsync.def_request(Method.GET, Format.JSON, url__mode='async')(view)
+
+        self.assertFalse(views.RestTestAsync.is_async())
+
+    def test_unhandled_exceptions(self):
+        request = RequestFactory().get('/')
+
+        for exception in (KeyboardInterrupt, SystemExit, asyncio.CancelledError):
+            def get_response(request):
+                raise exception()
+
+            with self.assertRaises(exception):
+                RestMiddleware(get_response)(request)
+
+        # the others give an error response
+        def get_response(request):
+            request.format = Format.JSON
+            raise ValueError("Invalid")
+
+        self.assertEqual(RestMiddleware(get_response)(request).status_code, 400)
+
+    @unittest.skipIf(restmiddleware.sync_to_async is None, "asgiref is not installed")
+    def test_async_unhandled_exceptions(self):
+        request = RequestFactory().get('/')
+
+        for exception in (KeyboardInterrupt, SystemExit, asyncio.CancelledError):
+            async def get_response(request):
+                raise exception()
+
+            with self.assertRaises(exception):
+                asyncio.run(RestMiddleware(get_response)(request))
+
+        async def get_response(request):
+            request.format = Format.JSON
+            raise ValueError("Invalid")
+
+        self.assertEqual(asyncio.run(RestMiddleware(get_response)(request)).status_code, 400)
+
+
+class TestStreaming(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_books(30)
+
+    def test_iterencode(self):
+        data = {'books': Book.objects.order_by('id'), 'authors': list(Author.objects.all()), 1: [None, 0.5]}
+        expected = json.dumps(data, cls=ComplexEncoder)
+
+        for chunk_size in (1, 100, 65536):
+            chunks = list(iterencode_json(data, chunk_size))
+
+            self.assertEqual(''.join(chunks), expected)
+            self.assertTrue(all(len(chunk) >= chunk_size for chunk in chunks[:-1]))
+
+        self.assertEqual(''.join(iterencode_json(Book.objects.none())), '[]')
+
+    def test_response(self):
+        client = Client()
+
+        response = client.get('/test/books/', HTTP_ACCEPT=JSON)
+        self.assertFalse(response.streaming)
+
+        streamed = client.get('/test/books/?stream=1', HTTP_ACCEPT=JSON)
+        self.assertTrue(streamed.streaming)
+        self.assertEqual(b''.join(streamed.streaming_content), response.content)
+
+        self.assertEqual(len(json.loads(response.content)['books']), 30)
+
+    def test_xml_response(self):
+        client = Client()
+
+        response = client.get('/test/books/', HTTP_ACCEPT=XML)
+        self.assertFalse(response.streaming)
+
+        streamed = client.get('/test/books/?stream=1', HTTP_ACCEPT=XML)
+        self.assertTrue(streamed.streaming)
+        self.assertEqual(b''.join(streamed.streaming_content), response.content)
+
+        self.assertEqual(len(igdectk.xmlio.loads(response.content)['books']['book']), 30)
+
+
+class TestJsonBackend(unittest.TestCase):
+
+    data = {
+        'int': 1, 'float': 0.5, 'str': 'é', 'list': [None, True], 1: 'key',
+        'date': datetime.date(2020, 1, 2), 'decimal': decimal.Decimal('1.10'),
+        'uuid': uuid.UUID(int=1),
+    }
+
+    def test_default(self):
+        self.assertIsInstance(get_json_backend(), StdJsonBackend)
+        self.assertEqual(StdJsonBackend().dumps(self.data), json.dumps(self.data, cls=ComplexEncoder).encode())
+
+    def test_handlers(self):
+        class Point(object):
+            def __init__(self, x, y):
+                self.x, self.y = x, y
+
+        class Point3(Point):
+            pass
+
+        encoder = ComplexEncoder()
+        self.assertEqual(encoder.encode(Point(1, 2)), '{"x": 1, "y": 2}')
+
+        handlers, cache = ComplexEncoder.handlers, ComplexEncoder._cache
+
+        try:
+            ComplexEncoder.register(Point, lambda obj: [obj.x, obj.y])
+            self.assertEqual(encoder.encode([Point(1, 2), Point3(3, 4)]), '[[1, 2], [3, 4]]')
+        finally:
+            ComplexEncoder.handlers, ComplexEncoder._cache = handlers, cache
+
+        with self.assertRaises(TypeError):
+            encoder.encode(object())
+
+    def test_subclass_handlers(self):
+        class UpperEncoder(ComplexEncoder):
+            handlers = [(uuid.UUID, lambda obj: str(obj).upper())]
+
+        value = uuid.UUID(int=10)
+
+        self.assertEqual(ComplexEncoder().encode(value), '"%s"' % value)
+        self.assertEqual(UpperEncoder().encode(value), '"%s"' % str(value).upper())
+        self.assertEqual(ComplexEncoder().encode(value), '"%s"' % value)
+
+        # inherited by the subclasses not overriding the handlers
+        class DerivedEncoder(ComplexEncoder):
+            pass
+
+        self.assertEqual(DerivedEncoder().encode(value), '"%s"' % value)
+
+        handlers, cache = ComplexEncoder.handlers, ComplexEncoder._cache
+
+        try:
+            ComplexEncoder.register(uuid.UUID, lambda obj: obj.int)
+            self.assertEqual(DerivedEncoder().encode(value), '10')
+            self.assertEqual(UpperEncoder().encode(value), '"%s"' % str(value).upper())
+        finally:
+            ComplexEncoder.handlers, ComplexEncoder._cache = handlers, cache
+
+    def test_orjson(self):
+        try:
+            backend = JSON_BACKENDS['orjson']()
+        except ImportError:
+            self.skipTest("orjson is not installed")
+
+        self.assertEqual(json.loads(backend.dumps(self.data)), json.loads(StdJsonBackend().dumps(self.data)))
+
+        # only the integers larger than 64 bits are given to the standard backend
+        self.assertEqual(backend.dumps({'big': 2 ** 64}), b'{"big": 18446744073709551616}')
+
+        with self.assertRaises(TypeError):
+            backend.dumps(object())
+
+        with self.assertRaises(TypeError):
+            backend.dumps({'surrogate': '\ud800'})
+
+
+class TestHttpHeader(unittest.TestCase):
+
+    def header(self, **meta):
+        return HttpHeader(RequestFactory().get('/', **meta))
+
+    def test_parse(self):
+        header = self.header(
+            HTTP_ACCEPT='text/html;level=1;q=0.5, application/json',
+            HTTP_ACCEPT_LANGUAGE='fr-FR, en;q=0.8',
+            CONTENT_TYPE='application/xml; charset=utf-8')
+
+        self.assertEqual(header.accept, [('application/json', (), 1.0), ('text/html', (('level', '1'),), 0.5)])
+        self.assertEqual(header.accepted_types, ['application/json', 'text/html'])
+        self.assertIs(header.preferred_type, Format.JSON)
+
+        self.assertEqual(header.accepted_language_codes, ['fr-fr', 'en'])
+        self.assertEqual(header.preferred_language_code, 'fr-fr')
+
+        self.assertEqual(header.content_type, ('application/xml', (('charset', 'utf-8'),)))
+        self.assertIs(header.content_format, Format.XML)
+
+    def test_defaults(self):
+        header = self.header()
+
+        # an empty media type, as before the negotiation
+        self.assertEqual(header.accepted_types, [''])
+        self.assertIs(header.preferred_type, Format.TEXT)
+        self.assertEqual(header.preferred_language_code, 'en_US')
+
+        self.assertIs(self.header(CONTENT_TYPE='image/png').content_format, Format.ANY)
+
+    def test_shared(self):
+        accept = 'application/json, text/plain;q=0.2'
+
+        first, second = self.header(HTTP_ACCEPT=accept), self.header(HTTP_ACCEPT=accept)
+
+        # parsed at the first access only
+        hits = cached_accept_header.cache_info().hits
+        self.assertEqual(first.accept, second.accept)
+        self.assertEqual(cached_accept_header.cache_info().hits, hits + 1)
+
+        first.accept
+        self.assertEqual(cached_accept_header.cache_info().hits, hits + 1)
+
+        # the shared values are not modified through the returned lists
+        first.accepted_types.append('text/html')
+        self.assertEqual(first.accepted_types, ['application/json', 'text/plain'])
+        self.assertEqual(second.accepted_types, ['application/json', 'text/plain'])
+
+
+class TestNegotiation(unittest.TestCase):
+
+    def negotiate(self, accept):
+        return negotiate_format(tuple(parse_accept_header(accept)))
+
+    def test_media_types(self):
+        self.assertIs(negotiate_format(()), Format.HTML)
+
+        for fmt in (Format.JSON, Format.XML, Format.HTML, Format.TEXT):
+            self.assertIs(self.negotiate(fmt.content_type), fmt)
+
+        self.assertIs(self.negotiate('text/plain'), Format.TEXT)
+        self.assertIs(self.negotiate('APPLICATION/JSON'), Format.JSON)
+        self.assertIs(self.negotiate('image/png'), Format.TEXT)
+
+    def test_qualities(self):
+        self.assertIs(self.negotiate('application/xml;q=0.9, application/json'), Format.JSON)
+        self.assertIs(self.negotiate('application/json;q=0.5, application/xml;q=0.8'), Format.XML)
+
+        # the first of the equal qualities
+        self.assertIs(self.negotiate('text/html, application/json'), Format.HTML)
+        self.assertIs(self.negotiate('application/json, text/html'), Format.JSON)
+
+        # not acceptable
+        self.assertIs(self.negotiate('application/json;q=0'), Format.TEXT)
+
+    def test_media_ranges(self):
+        self.assertIs(self.negotiate('*/*'), Format.TEXT)
+        self.assertIs(self.negotiate('application/*'), Format.JSON)
+        self.assertIs(self.negotiate('*/*;q=0.5, application/xml'), Format.XML)
+
+        # the most specific media range gives the quality
+        self.assertIs(self.negotiate('application/*, application/json;q=0'), Format.XML)
+        self.assertIs(self.negotiate('*/*, text/*;q=0, application/json;q=0.5'), Format.XML)
+
+
+class TestErrorBody(unittest.TestCase):
+
+    def test_error_body(self):
+        messages = ('Missing parameter a', 'Quote " and <tag> é', ['first', 'second'])
+
+        for fmt in (Format.JSON, Format.XML, Format.TEXT):
+            for message in messages:
+                self.assertEqual(error_body(fmt, message, 400, 'view_exception'),
+                                 _error_body(fmt, message, 400, 'view_exception'))
+
+    def test_template(self):
+        error_body_template.cache_clear()
+
+        for i in range(10):
+            body = error_body(Format.JSON, 'Missing parameter %i' % i, 400, 'view_exception')
+            self.assertEqual(json.loads(body), {
+                'result': 'failed', 'cause': 'Missing parameter %i' % i, 'code': 400, 'error': 'view_exception'})
+
+        # a single template for the distinct messages
+        self.assertEqual(error_body_template.cache_info().currsize, 1)
+
+    def test_response(self):
+        response = Client().put('/test/dispatch/', HTTP_ACCEPT=JSON)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(json.loads(response.content), {
+            'result': 'failed', 'cause': 'Undefined view for /test/dispatch/ PUT', 'code': 404,
+            'error': 'view_exception'})
+
+
+class TestExceptions(unittest.TestCase):
+
+    class Gone(Exception):
+        pass
+
+    class Expired(Gone):
+        pass
+
+    def setUp(self):
+        self.classifiers = dict(RestMiddleware.exception_classifiers)
+
+    def tearDown(self):
+        RestMiddleware.exception_classifiers = self.classifiers
+        RestMiddleware._classifiers_cache.clear()
+
+    def process(self, exception):
+        request = RequestFactory().get('/')
+        request.format = Format.JSON
+
+        with mock.patch.object(restmiddleware.traceback_logger, 'log') as log:
+            response = RestMiddleware().process_exception(request, exception)
+
+        body = json.loads(response.content)
+        self.assertEqual(body['code'], response.status_code)
+
+        return response.status_code, body['error'], body['cause'], log.called
+
+    def test_registered(self):
+        self.assertEqual(self.process(ViewExceptionRest("Missing", 400)), (400, 'view_exception', "Missing", False))
+        self.assertEqual(self.process(ValueError("Invalid")), (400, 'value_error', "Invalid", False))
+        self.assertEqual(self.process(PermissionDenied()), (403, 'permission_denied', '', False))
+        self.assertEqual(self.process(Http404("None")), (404, 'http404', "None", False))
+
+        status, error, cause, logged = self.process(ValidationError(["a", "b"]))
+        self.assertEqual((status, cause), (400, ["a", "b"]))
+
+        # subclass of a registered type
+        self.assertEqual(
+            self.process(User.DoesNotExist("No user")), (404, 'object_does_not_exists', "No user", False))
+        self.assertEqual(self.process(json.JSONDecodeError("Bad", "", 0))[:2], (400, 'value_error'))
+
+        # error code as second argument
+        self.assertEqual(self.process(ValueError("Invalid", "bad_value")), (400, 'bad_value', "Invalid", False))
+
+    def test_internal(self):
+        self.assertEqual(self.process(KeyError('k')), (500, 'internal_error', "KeyError('k')", True))
+        self.assertEqual(self.process(self.Expired()), (500, 'internal_error', "Expired()", True))
+
+    def test_register(self):
+        self.assertIsNone(RestMiddleware.get_exception_classifier(self.Expired))
+
+        # the cached classification of the subclasses is invalidated
+        RestMiddleware.register_exception(self.Gone, 404, "gone")
+        self.assertEqual(self.process(self.Expired("Expired")), (404, 'gone', "Expired", False))
+
+        RestMiddleware.register_exception(self.Expired, classifier=lambda e: ("Too late", 400, "expired"))
+        self.assertEqual(self.process(self.Expired("Expired")), (400, 'expired', "Too late", False))
+        self.assertEqual(self.process(self.Gone("Gone")), (404, 'gone', "Gone", False))
+
+        self.assertIs(
+            RestMiddleware.get_exception_classifier(ObjectDoesNotExist),
+            RestMiddleware.get_exception_classifier(User.DoesNotExist))
+
+
+class TestCurrentRequest(unittest.TestCase):
+
+    def test_current_request(self):
+        response = Client().get('/test/context/', HTTP_ACCEPT=JSON, REMOTE_ADDR='10.0.0.1')
+
+        self.assertEqual(json.loads(response.content), {
+            'request': True,
+            'user': 'AnonymousUser',
+            'remote_addr': '10.0.0.1',
+            'thread_local': ['AnonymousUser', '10.0.0.1'],
+        })
+
+    def test_no_request(self):
+        self.assertIsNone(RestMiddleware.current_request())
+        self.assertIsNone(RestMiddleware.current_user())
+        self.assertEqual(RestMiddleware.current_remote_addr(), '')
+
+        self.assertFalse(hasattr(RestMiddleware.thread_local, 'current_user'))
+        self.assertFalse(hasattr(RestMiddleware.thread_local, 'current_remote_addr'))
+
+
+class TestCondition(unittest.TestCase):
+
+    def setUp(self):
+        self.client = Client()
+        del views.cond_calls[:]
+
+    def test_not_modified(self):
+        response = self.client.get('/test/cond/', HTTP_ACCEPT=JSON)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], '"v1"')
+
+        response = self.client.get('/test/cond/', HTTP_ACCEPT=JSON, HTTP_IF_NONE_MATCH='"v1"')
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get('/test/cond/?v=2', HTTP_ACCEPT=JSON, HTTP_IF_NONE_MATCH='"v1"')
+        self.assertEqual(response.status_code, 200)
+
+        # the view is not called for the 304
+        self.assertEqual(views.cond_calls, ['1', '2'])
+
+    def test_no_results(self):
+        response = self.client.get('/test/cond/?mode=empty', HTTP_ACCEPT=JSON)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(json.loads(response.content)['cause'], "No results for /test/cond/ GET")
+
+    @unittest.skipIf(restmiddleware.sync_to_async is None, "asgiref is not installed")
+    def test_async_no_results(self):
+        async def view(request):
+            return None
+
+        request = RequestFactory().get('/test/cond/')
+
+        with self.assertRaises(ViewExceptionRest) as context:
+            asyncio.run(async_condition(views.cond_etag)(view)(request))
+
+        self.assertEqual(context.exception.code, 404)
+
+    def test_compressed_etag(self):
+        identity = self.client.get('/test/cond/', HTTP_ACCEPT=JSON)
+
+        response = self.client.get('/test/cond/', HTTP_ACCEPT=JSON, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), identity.content)
+
+        # not the same bytes as the identity response
+        self.assertEqual(response['ETag'], 'W/"v1"')
+
+        for etag in ('W/"v1"', '"v1"'):
+            response = self.client.get(
+                '/test/cond/', HTTP_ACCEPT=JSON, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response['ETag'], 'W/"v1"')
+
+
+class TestCompression(unittest.TestCase):
+
+    def setUp(self):
+        self.client = Client()
+        self.content = json.dumps([{'id': i, 'name': "name %i" % i} for i in range(200)]).encode('utf-8')
+
+    def request(self, accept_encoding):
+        return RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+
+    def test_negotiate(self):
+        self.assertIsNone(negotiate_encoding(''))
+        self.assertIsNone(negotiate_encoding('identity'))
+        self.assertIsNone(negotiate_encoding('deflate, compress'))
+        self.assertIsNone(negotiate_encoding('gzip;q=0'))
+        self.assertIsNone(negotiate_encoding('*;q=0'))
+        self.assertIsNone(negotiate_encoding('gzip;q=invalid'))
+
+        self.assertEqual(negotiate_encoding('gzip'), 'gzip')
+        self.assertEqual(negotiate_encoding('GZIP ; q=0.5, identity'), 'gzip')
+        self.assertEqual(negotiate_encoding('*;q=0, gzip'), 'gzip')
+
+        # brotli preferred only when installed
+        expected = 'br' if brotli is not None else 'gzip'
+        self.assertEqual(negotiate_encoding('gzip, deflate, br'), expected)
+        self.assertEqual(negotiate_encoding('*'), expected)
+        self.assertEqual(negotiate_encoding('gzip;q=0.8, br;q=0.9'), expected)
+        self.assertEqual(negotiate_encoding('gzip, br;q=0.5'), 'gzip')
+        self.assertEqual(negotiate_encoding('br, gzip;q=0.5'), expected)
+
+    def test_compress(self):
+        response = compress_response(self.request('gzip'), HttpResponse(self.content), Format.JSON)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(response.content), self.content)
+
+        # the same content gives the same compressed content
+        other = compress_response(self.request('gzip'), HttpResponse(self.content), Format.JSON)
+        self.assertEqual(other.content, response.content)
+
+    def test_not_compressed(self):
+        # identity
+        response = compress_response(self.request('identity'), HttpResponse(self.content), Format.JSON)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response.content, self.content)
+
+        # too small
+        response = compress_response(self.request('gzip'), HttpResponse(b'{}'), Format.JSON)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, b'{}')
+
+        # not a compressed format
+        response = compress_response(self.request('gzip'), HttpResponse(self.content), Format.HTML)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertFalse(response.has_header('Vary'))
+
+        # already encoded
+        response = HttpResponse(self.content)
+        response['Content-Encoding'] = 'deflate'
+        response = compress_response(self.request('gzip'), response, Format.JSON)
+        self.assertEqual(response['Content-Encoding'], 'deflate')
+        self.assertEqual(response.content, self.content)
+
+    def test_streaming(self):
+        chunks = [self.content[i:i + 100] for i in range(0, len(self.content), 100)]
+
+        response = compress_response(self.request('gzip'), StreamingHttpResponse(chunks), Format.XML)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), self.content)
+
+        # even small
+        response = compress_response(self.request('gzip'), StreamingHttpResponse([b'{}']), Format.JSON)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(zlib.decompress(b''.join(response.streaming_content), 16 + zlib.MAX_WBITS), b'{}')
+
+    @unittest.skipIf(brotli is None, "brotli is not installed")
+    def test_brotli(self):
+        response = compress_response(self.request('br'), HttpResponse(self.content), Format.JSON)
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), self.content)
+
+        response = compress_response(self.request('br'), StreamingHttpResponse([self.content]), Format.JSON)
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(b''.join(response.streaming_content)), self.content)
+
+        identity = self.client.get('/test/cond/', HTTP_ACCEPT=JSON)
+        response = self.client.get('/test/cond/', HTTP_ACCEPT=JSON, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), identity.content)
+
+    def test_client(self):
+        identity = self.client.get('/test/cond/', HTTP_ACCEPT=JSON)
+        self.assertFalse(identity.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', identity['Vary'])
+
+        response = self.client.get('/test/cond/', HTTP_ACCEPT=JSON, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), identity.content)
+
+        # errors are not compressed
+        response = self.client.get('/test/undefined/', HTTP_ACCEPT=JSON, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+
+class TestBatch(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('user')
+
+    def setUp(self):
+        self.client = Client()
+
+    def batch(self, data):
+        response = self.client.post('/batch/', json.dumps(data), content_type=JSON, HTTP_ACCEPT=JSON)
+        return response.status_code, json.loads(response.content)
+
+    def results(self, data):
+        status, body = self.batch(data)
+        self.assertEqual(status, 200)
+
+        return [(response['status'], response['body']) for response in body['responses']]
+
+    def test_batch(self):
+        status, body = self.batch([
+            {'method': 'GET', 'path': '/test/dispatch/', 'query': {'action': 'a'}},
+            {'method': 'GET', 'path': '/test/dispatch/', 'query': 'action=c', 'accept': XML},
+            {'method': 'POST', 'path': '/test/data/', 'body': {'a': [1, 2]}},
+        ])
+        self.assertEqual(status, 200)
+
+        responses = body['responses']
+        self.assertEqual([response['status'] for response in responses], [200, 200, 200])
+        self.assertEqual([response['content_type'] for response in responses], [JSON, XML, JSON])
+        self.assertEqual(
+            [response['body'] for response in responses],
+            [{'view': 'a'}, '<view name="c"/>', {'data': {'a': [1, 2]}}])
+
+        # empty batch
+        self.assertEqual(self.batch({'requests': []}), (200, {'responses': []}))
+
+    def test_errors(self):
+        results = self.results([
+            {'method': 'GET', 'path': '/undefined/'},
+            {'method': 'GET', 'path': '/batch/'},
+            {'method': 'DELETE', 'path': '/test/dispatch/'},
+            {'method': 'GET', 'path': '/test/auth/', 'query': 'q=1'},
+            {'method': 'POST', 'path': '/test/auth/', 'body': {'name': 'too long name'}},
+            {'method': 'GET', 'path': '/test/dispatch/'},
+        ])
+
+        # each sub-request has its own error
+        self.assertEqual(
+            [(status, body.get('error')) for status, body in results],
+            [(404, 'view_exception'), (404, 'view_exception'), (404, 'view_exception'),
+             (401, 'view_exception'), (400, 'value_error'), (200, None)])
+
+        self.assertEqual(results[0][1]['cause'], "Undefined handler for /undefined/")
+        self.assertEqual(results[1][1]['cause'], "Undefined handler for /batch/")
+        self.assertEqual(results[5][1], {'view': 'plain'})
+
+    def test_html_errors(self):
+        response = self.client.post('/batch/', json.dumps([
+            {'method': 'GET', 'path': '/undefined/', 'accept': 'text/html'},
+            {'method': 'DELETE', 'path': '/test/dispatch/', 'accept': 'text/html'},
+        ]), content_type=JSON, HTTP_ACCEPT=JSON)
+
+        responses = json.loads(response.content)['responses']
+        self.assertEqual([r['content_type'] for r in responses], [JSON, JSON])
+        self.assertEqual([(r['status'], r['body']['error']) for r in responses], [(404, 'view_exception')] * 2)
+
+        # not added to the messages of the batch request
+        self.assertNotIn('messages', response.cookies)
+
+    def test_binary(self):
+        status, body = self.batch([
+            {'method': 'GET', 'path': '/test/dispatch/', 'query': 'action=binary', 'accept': '*/*'}])
+        self.assertEqual(status, 200)
+
+        response = body['responses'][0]
+        self.assertEqual((response['status'], response['body_encoding']), (200, 'base64'))
+        self.assertEqual(base64.b64decode(response['body']), bytes(range(256)))
+
+    def test_user(self):
+        self.client.force_login(self.user)
+
+        self.assertEqual(
+            self.results([{'method': 'GET', 'path': '/test/auth/', 'query': {'q': '1'}}]),
+            [(200, {'user': 'user', 'q': '1'})])
+
+    def test_parallel(self):
+        subs = [{'method': 'GET', 'path': '/test/dispatch/', 'query': {'action': action}} for action in 'aca' * 4]
+        subs.append({'method': 'GET', 'path': '/undefined/'})
+
+        results = self.results({'requests': subs, 'parallel': True})
+
+        # in the same order as sequentially
+        self.assertEqual(results, self.results({'requests': subs}))
+        self.assertEqual([body.get('view') for status, body in results[:3]], ['a', 'c', 'a'])
+        self.assertEqual(results[-1][0], 404)
+
+    def test_invalid(self):
+        response = self.client.get('/batch/', HTTP_ACCEPT=JSON)
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post('/batch/', '{', content_type=JSON, HTTP_ACCEPT=JSON)
+        self.assertEqual(response.status_code, 400)
+
+        for data in ({'requests': 'a'}, [{'method': 'GET'}], [{'method': 'UNDEFINED', 'path': '/'}],
+                     [{'method': 'GET', 'path': '/', 'query': 1}], [{'method': 'GET', 'path': '/', 'query': None}]):
+            status, body = self.batch(data)
+            self.assertEqual(status, 400)
+
+        # validated by the fast path
+        self.assertTrue(is_fast_schema(batch.SUB_REQUEST_SCHEMA))
+
+        self.assertEqual(self.batch({})[1]['cause'], "Batch must be a list of requests")
+
+        with override_settings(REST_BATCH_MAX_REQUESTS=1):
+            status, body = self.batch([{'method': 'GET', 'path': '/test/dispatch/'}] * 2)
+            self.assertEqual((status, body['cause']), (400, "Too many requests into the batch"))
+
+
+if __name__ == '__main__':
+    unittest.main()
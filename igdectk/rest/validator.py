@@ -0,0 +1,206 @@
+# -*- coding: utf-8; -*-
+#
+# @file validator.py
+# @brief Precompiled validators of the rest request content.
+# @author agent (INRA UMR1095)
+# @date 2026-10-18
+# @copyright Copyright (c) 2026 INRA
+# @license MIT (see LICENSE file)
+# @details The schemas given as content to the rest handlers decorators are compiled once,
+# at decoration time, into a validator function.
+
+from collections.abc import Container, Mapping
+from decimal import Decimal
+
+from validictory.validator import SchemaValidator, FieldValidationError
+
+
+class FastSchema(dict):
+    """
+    Validictory schema for which the fast validation path is wanted.
+
+    When the schema only uses the supported subset (type, properties, items, required, blank,
+    enum, minimum, maximum, exclusiveMinimum, exclusiveMaximum, minLength, maxLength,
+    minItems, maxItems, title and description) it is compiled into specialized Python functions,
+    with the validictory default options (required by default, not blank by default).
+    Otherwise the validictory validator is used.
+
+    The fast path only checks the validity of the data. When they are invalid, validictory
+    is used to report the error.
+
+    Usage::
+
+        @RestHandler.def_request(Method.POST, Format.JSON, content=FastSchema({
+            "type": "object",
+            "properties": {"name": {"type": "string", "maxLength": 64}}
+        }))
+    """
+
+    pass
+
+
+# keywords supported by the fast validation path
+FAST_KEYWORDS = frozenset((
+    'type', 'properties', 'items', 'required', 'blank', 'enum',
+    'minimum', 'maximum', 'exclusiveMinimum', 'exclusiveMaximum',
+    'minLength', 'maxLength', 'minItems', 'maxItems', 'title', 'description'))
+
+# type checkers, same as the validictory ones, as (exact types, instance of types, function)
+TYPES_CHECKS = {
+    'string': (None, (str,), None),
+    'integer': (frozenset((int,)), None, None),
+    'number': (frozenset((int, float, Decimal)), None, None),
+    'boolean': (frozenset((bool,)), None, None),
+    'object': (None, None, lambda value: isinstance(value, Mapping) or (
+        hasattr(value, 'keys') and hasattr(value, 'items'))),
+    'array': (None, (list, tuple), None),
+    'null': (frozenset((type(None),)), None, None),
+    'any': (None, None, None),
+}
+
+# shared validictory validator (default options), stateless when failing fast
+_schema_validator = SchemaValidator()
+
+
+def is_fast_schema(schema):
+    """
+    Check if a schema, and all of its sub-schemas, uses only the keywords supported by the fast path.
+
+    :param dict schema: Validictory schema.
+    :rtype: boolean
+    """
+    if not isinstance(schema, dict) or not FAST_KEYWORDS.issuperset(schema):
+        return False
+
+    # union of types (list) are not supported
+    if 'type' in schema and (not isinstance(schema['type'], str) or schema['type'] not in TYPES_CHECKS):
+        return False
+
+    if 'enum' in schema and (callable(schema['enum']) or not isinstance(schema['enum'], Container)):
+        return False
+
+    if 'properties' in schema:
+        if not isinstance(schema['properties'], dict):
+            return False
+
+        for sub_schema in schema['properties'].values():
+            if not is_fast_schema(sub_schema):
+                return False
+
+    if 'items' in schema and not is_fast_schema(schema['items']):
+        return False
+
+    return True
+
+
+def _compile_node(schema):
+    """
+    Compile a fast schema into a predicate of the validity of a value.
+    Returns a pair with the required flag of the value and the function(value) returning a boolean.
+    """
+    required = schema.get('required', True)
+    blank = schema.get('blank', False)
+
+    exact_types, instance_types, type_check = TYPES_CHECKS[schema['type']] if 'type' in schema else (None, None, None)
+
+    enum = schema.get('enum')
+
+    minimum = schema.get('minimum')
+    exclusive_minimum = schema.get('exclusiveMinimum', False)
+    maximum = schema.get('maximum')
+    exclusive_maximum = schema.get('exclusiveMaximum', False)
+    bounded = minimum is not None or maximum is not None
+
+    # minLength and minItems, maxLength and maxItems are the same validation
+    min_lengths = [schema[k] for k in ('minLength', 'minItems') if k in schema]
+    min_length = max(min_lengths) if min_lengths else None
+    max_lengths = [schema[k] for k in ('maxLength', 'maxItems') if k in schema]
+    max_length = min(max_lengths) if max_lengths else None
+    sized = min_length is not None or max_length is not None
+
+    properties = None
+    if 'properties' in schema:
+        properties = [(name,) + _compile_node(sub_schema) for name, sub_schema in schema['properties'].items()]
+
+    items = _compile_node(schema['items'])[1] if 'items' in schema else None
+
+    def check(value):
+        if exact_types is not None and type(value) not in exact_types:
+            return False
+
+        if instance_types is not None and not isinstance(value, instance_types):
+            return False
+
+        if type_check is not None and not type_check(value):
+            return False
+
+        if not blank and value == '':
+            return False
+
+        if enum is not None and value is not None and value not in enum and not (value == '' and blank):
+            return False
+
+        if bounded and type(value) in (int, float):
+            if minimum is not None and (value <= minimum if exclusive_minimum else value < minimum):
+                return False
+
+            if maximum is not None and (value >= maximum if exclusive_maximum else value > maximum):
+                return False
+
+        if sized and isinstance(value, (str, list, tuple)):
+            if min_length is not None and len(value) < min_length:
+                return False
+
+            if max_length is not None and len(value) > max_length:
+                return False
+
+        if properties is not None and isinstance(value, dict):
+            for name, sub_required, sub_check in properties:
+                if name in value:
+                    if not sub_check(value[name]):
+                        return False
+                elif sub_required:
+                    return False
+
+        if items is not None and isinstance(value, (list, tuple)):
+            for item in value:
+                if not items(item):
+                    return False
+
+        return True
+
+    return required, check
+
+
+def compile_schema(schema):
+    """
+    Compile a validictory schema into a validator function.
+
+    A :class:`FastSchema` using only the supported subset of keywords is compiled into
+    specialized Python functions. Any others schemas are not compiled: the returned function
+    only binds the schema to a shared validictory validator, that interprets the schema at
+    each call, and only saves the creation of a validator per request.
+
+    :param dict schema: Validictory schema.
+
+    :return: A function taking the data to validate, and raising a
+        :exc:`validictory.ValidationError` (a ValueError) on failure.
+    :rtype: callable
+    """
+    def validator(data):
+        _schema_validator.validate(data, schema)
+
+    if isinstance(schema, FastSchema) and is_fast_schema(schema):
+        check = _compile_node(schema)[1]
+
+        def fast_validator(data):
+            # the detailed error is given by validictory, only for invalid data
+            if not check(data):
+                validator(data)
+
+                # not reported as invalid by validictory
+                raise FieldValidationError("does not match the schema", 'data', data, '<obj>')
+
+        return fast_validator
+
+    return validator
@@ -0,0 +1,71 @@
+# -*- coding: utf-8; -*-
+#
+# @file __init__.py
+# @brief Django application used by the unit tests of the igdectk sub-packages.
+# @author agent (INRA UMR1095)
+# @date 2026-10-18
+# @copyright Copyright (c) 2026 INRA
+# @license MIT (see LICENSE file)
+# @details The tests modules call setup() before importing the modules depending on Django.
+
+from importlib import import_module
+
+# settings of the test project, with an in memory database
+TEST_SETTINGS = {
+    'SECRET_KEY': 'igdectk-test',
+    'DEBUG': False,
+    'ALLOWED_HOSTS': ['testserver'],
+    'INSTALLED_APPS': [
+        'django.contrib.contenttypes',
+        'django.contrib.auth',
+        'django.contrib.sessions',
+        'django.contrib.messages',
+        'igdectk.testapp.apps.TestAppConfig',
+    ],
+    'MIDDLEWARE': [
+        'django.contrib.sessions.middleware.SessionMiddleware',
+        'django.contrib.auth.middleware.AuthenticationMiddleware',
+        'django.contrib.messages.middleware.MessageMiddleware',
+        'igdectk.rest.restmiddleware.RestMiddleware',
+    ],
+    'ROOT_URLCONF': 'igdectk.testapp.urls',
+    'DATABASES': {'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}},
+    'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    'TEMPLATES': [{
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'APP_DIRS': True,
+        'OPTIONS': {'context_processors': ['django.contrib.messages.context_processors.messages']},
+    }],
+    'USE_TZ': True,
+}
+
+
+def setup():
+    """
+    Configure Django with the test application and create its database, once per process.
+    Does nothing when the settings are already configured.
+    """
+    from django.conf import settings
+
+    if settings.configured:
+        return
+
+    settings.configure(**TEST_SETTINGS)
+
+    import logging
+
+    import django
+    from django.apps import apps
+    from django.core.management import call_command
+
+    # the settings table does not exist yet when the application is started
+    logging.getLogger(__name__).setLevel(logging.ERROR)
+    django.setup()
+
+    call_command('migrate', run_syncdb=True, verbosity=0)
+
+    # the tables did not exist when the application was started
+    apps.get_app_config('testapp').ready()
+
+    # the rest handlers are registered by the urls module, that must be imported before the views
+    import_module(settings.ROOT_URLCONF)
@@ -0,0 +1,16 @@
+# -*- coding: utf-8; -*-
+#
+# @file apps.py
+# @brief Test application configuration.
+# @author agent (INRA UMR1095)
+# @date 2026-10-18
+# @copyright Copyright (c) 2026 INRA
+# @license MIT (see LICENSE file)
+# @details
+
+from igdectk.common.apphelpers import ApplicationMain
+
+
+class TestAppConfig(ApplicationMain):
+    name = 'igdectk.testapp'
+    label = 'testapp'
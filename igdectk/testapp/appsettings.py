@@ -0,0 +1,18 @@
+# -*- coding: utf-8; -*-
+#
+# @file appsettings.py
+# @brief Test application settings.
+# @author agent (INRA UMR1095)
+# @date 2026-10-18
+# @copyright Copyright (c) 2026 INRA
+# @license MIT (see LICENSE file)
+# @details
+
+APP_VERBOSE_NAME = "igdectk test application"
+
+APP_DB_DEFAULT_SETTINGS = {
+    "page_size": 20,
+    "columns": ["name", "title"],
+}
+
+APP_VERSION = (1, 0)
@@ -0,0 +1,33 @@
+# -*- coding: utf-8; -*-
+#
+# @file models.py
+# @brief Test application models.
+# @author agent (INRA UMR1095)
+# @date 2026-10-18
+# @copyright Copyright (c) 2026 INRA
+# @license MIT (see LICENSE file)
+# @details
+
+from django.db import models
+
+
+class Settings(models.Model):
+
+    param_name = models.CharField(max_length=127, unique=True)
+    value = models.CharField(max_length=1024)
+
+
+class Author(models.Model):
+
+    name = models.CharField(max_length=64)
+    birth = models.DateField(null=True)
+
+
+class Book(models.Model):
+
+    title = models.CharField(max_length=128)
+    price = models.DecimalField(max_digits=6, decimal_places=2)
+    published = models.DateTimeField()
+    available = models.BooleanField(default=True)
+    author = models.ForeignKey(Author, on_delete=models.CASCADE)
+    coauthors = models.ManyToManyField(Author, related_name='coauthored')
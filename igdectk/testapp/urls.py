@@ -0,0 +1,22 @@
+# -*- coding: utf-8; -*-
+#
+# @file urls.py
+# @brief Test application urls.
+# @author agent (INRA UMR1095)
+# @date 2026-10-18
+# @copyright Copyright (c) 2026 INRA
+# @license MIT (see LICENSE file)
+# @details
+
+from django.conf.urls import url
+
+from igdectk.rest.batch import batch_view
+from igdectk.rest.handler import RestHandler
+
+urlpatterns = [
+    url(r'^batch/$', batch_view, name='batch'),
+]
+
+from . import views  # noqa
+
+RestHandler.register_urls(router=True)
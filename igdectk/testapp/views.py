@@ -0,0 +1,213 @@
+# -*- coding: utf-8; -*-
+#
+# @file views.py
+# @brief Test application rest handlers.
+# @author agent (INRA UMR1095)
+# @date 2026-10-18
+# @copyright Copyright (c) 2026 INRA
+# @license MIT (see LICENSE file)
+# @details
+
+import django
+
+from django.http import HttpResponse
+
+from igdectk.rest import Format, Method
+from igdectk.rest.handler import ASYNC_DJANGO_VERSION, RestHandler
+from igdectk.rest.response import HttpResponseRest
+from igdectk.rest.restmiddleware import RestMiddleware
+from igdectk.rest.validator import FastSchema
+
+from .models import Book
+
+
+class RestTest(RestHandler):
+    regex = r'^test/$'
+    name = 'test'
+    app_name = 'testapp'
+
+
+class RestTestDispatch(RestTest):
+    regex = r'^dispatch/$'
+    suffix = 'dispatch'
+
+
+@RestTestDispatch.def_request(Method.GET, Format.JSON, url__action='a', url__mode='x')
+def get_dispatch_ax(request):
+    return HttpResponseRest(request, {'view': 'ax'})
+
+
+@RestTestDispatch.def_request(Method.GET, Format.JSON, url__action='a')
+def get_dispatch_a(request):
+    return HttpResponseRest(request, {'view': 'a'})
+
+
+@RestTestDispatch.def_request(Method.GET, Format.JSON, parameters=('q',), url__action='b')
+def get_dispatch_b(request):
+    return HttpResponseRest(request, {'view': 'b'})
+
+
+@RestTestDispatch.def_request(Method.GET, Format.XML, url__action='c')
+def get_dispatch_c_xml(request):
+    return HttpResponseRest(request, {'view': {'name': 'c'}})
+
+
+@RestTestDispatch.def_request(Method.GET, Format.JSON, url__action='c')
+def get_dispatch_c(request):
+    return HttpResponseRest(request, {'view': 'c'})
+
+
+@RestTestDispatch.def_request(Method.GET, Format.ANY, url__action='binary')
+def get_dispatch_binary(request):
+    return HttpResponse(bytes(range(256)), content_type='application/octet-stream')
+
+
+@RestTestDispatch.def_request(Method.GET, Format.JSON)
+def get_dispatch(request):
+    return HttpResponseRest(request, {'view': 'plain'})
+
+
+class RestTestData(RestTest):
+    regex = r'^data/$'
+    suffix = 'data'
+
+
+@RestTestData.def_request(Method.POST, Format.JSON, url__mode='ignore')
+def post_ignored_data(request):
+    return HttpResponseRest(request, {'data': None})
+
+
+@RestTestData.def_request(Method.POST, Format.JSON)
+def post_data(request):
+    return HttpResponseRest(request, {'data': request.data})
+
+
+class RestTestAuth(RestTest):
+    regex = r'^auth/$'
+    suffix = 'auth'
+
+
+def auth_fallback(request):
+    return HttpResponseRest(request, {'user': None})
+
+
+@RestTestAuth.def_auth_request(Method.GET, Format.JSON, fallback=auth_fallback, url__mode='fallback')
+def get_auth_fallback(request):
+    return HttpResponseRest(request, {'user': request.user.username})
+
+
+@RestTestAuth.def_auth_request(Method.GET, Format.JSON, staff=True, url__mode='staff')
+def get_auth_staff(request):
+    return HttpResponseRest(request, {'user': request.user.username})
+
+
+@RestTestAuth.def_auth_request(Method.GET, Format.JSON, perms={'auth.add_user': "Cannot add users"}, url__mode='perms')
+def get_auth_perms(request):
+    return HttpResponseRest(request, {'user': request.user.username})
+
+
+@RestTestAuth.def_admin_request(Method.GET, Format.JSON, url__mode='admin')
+def get_auth_admin(request):
+    return HttpResponseRest(request, {'user': request.user.username})
+
+
+@RestTestAuth.def_auth_request(Method.GET, Format.JSON, parameters=('q',))
+def get_auth(request):
+    return HttpResponseRest(request, {'user': request.user.username, 'q': request.GET['q']})
+
+
+@RestTestAuth.def_request(Method.POST, Format.JSON, content=('name',), url__mode='required')
+def post_auth_required(request):
+    return HttpResponseRest(request, {'name': request.data['name']})
+
+
+@RestTestAuth.def_request(Method.POST, Format.JSON, content=FastSchema({
+    "type": "object",
+    "properties": {"name": {"type": "string", "maxLength": 8}}
+}))
+def post_auth_schema(request):
+    return HttpResponseRest(request, {'name': request.data['name']})
+
+
+class RestTestAsync(RestTest):
+    regex = r'^async/$'
+    suffix = 'async'
+
+
+# the first registered sub-method matching the request is selected
+if django.VERSION >= ASYNC_DJANGO_VERSION:
+    @RestTestAsync.def_request(Method.GET, Format.JSON, url__mode='async')
+    async def get_async(request):
+        return HttpResponseRest(request, {'view': 'async'})
+
+
+@RestTestAsync.def_request(Method.GET, Format.JSON)
+def get_sync(request):
+    return HttpResponseRest(request, {'view': 'sync'})
+
+
+class RestTestBooks(RestTest):
+    regex = r'^books/$'
+    suffix = 'books'
+
+
+@RestTestBooks.def_request(Method.GET, Format.JSON, url__stream='1')
+def get_books_stream(request):
+    return HttpResponseRest(request, {'books': Book.objects.order_by('id')}, streaming=True)
+
+
+@RestTestBooks.def_request(Method.GET, Format.JSON)
+def get_books(request):
+    return HttpResponseRest(request, {'books': Book.objects.order_by('id')})
+
+
+@RestTestBooks.def_request(Method.GET, Format.XML, url__stream='1')
+def get_books_xml_stream(request):
+    return HttpResponseRest(request, {'books': {'book': Book.objects.order_by('id')}}, streaming=True)
+
+
+@RestTestBooks.def_request(Method.GET, Format.XML)
+def get_books_xml(request):
+    return HttpResponseRest(request, {'books': {'book': Book.objects.order_by('id')}})
+
+
+class RestTestContext(RestTest):
+    regex = r'^context/$'
+    suffix = 'context'
+
+
+@RestTestContext.def_request(Method.GET, Format.JSON)
+def get_context(request):
+    return HttpResponseRest(request, {
+        'request': RestMiddleware.current_request() is request,
+        'user': str(RestMiddleware.current_user()),
+        'remote_addr': RestMiddleware.current_remote_addr(),
+        'thread_local': [
+            str(RestMiddleware.thread_local.current_user), RestMiddleware.thread_local.current_remote_addr],
+    })
+
+
+class RestTestCond(RestTest):
+    regex = r'^cond/$'
+    suffix = 'cond'
+
+
+# number of calls of the conditional view
+cond_calls = []
+
+
+def cond_etag(request):
+    return 'v%s' % request.GET.get('v', '1')
+
+
+@RestTestCond.def_request(Method.GET, Format.JSON, etag=cond_etag, url__mode='empty')
+def get_cond_empty(request):
+    return None
+
+
+@RestTestCond.def_request(Method.GET, Format.JSON, etag=cond_etag)
+def get_cond(request):
+    cond_calls.append(request.GET.get('v', '1'))
+
+    # large enough to be compressed
+    return HttpResponseRest(request, {'items': ['item %i' % i for i in range(200)]})
@@ -19,8 +19,22 @@ def dumps(obj):
     return Encoder().encode(obj)
 
 
+def iterdumps(obj):
+    """
+    Helper to dumps a Python object to an XML string, as a generator of chunks of string.
+    """
+    return Encoder().iterencode(obj)
+
+
 def loads(data):
     """
     Helper to loads an XML string into a Python object.
     """
     return Decoder().decode(data)
+
+
+def load(fp):
+    """
+    Helper to loads an XML file-like object into a Python object, parsing it incrementally.
+    """
+    return Decoder().decode_stream(fp)
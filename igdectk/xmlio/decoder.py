@@ -8,13 +8,17 @@
 # @license MIT (see LICENSE file)
 # @details
 
-import xml.etree.cElementTree as etree
+import xml.etree.ElementTree as etree
 
 
 class Decoder:
 
     """
     Simplest XML to object decoder.
+
+    The attributes and the children of a node are the items of a dict. Many children with
+    the same tag are grouped into a list, and a node without children but with a text
+    is decoded as its text.
     """
 
     def __init__(self):
@@ -29,6 +33,48 @@ class Decoder:
         self.obj = {tree.tag: self._node(tree)}
         return self.obj
 
+    def decode_stream(self, fileobj):
+        """
+        Same as :meth:`decode` but incrementally parsing a file-like object (having a read method).
+        The elements are released once decoded, so the XML document is never fully in memory.
+        """
+        # stack of (element, content, children values by tag) of the opened nodes
+        stack = []
+        root = None
+
+        for event, elem in etree.iterparse(fileobj, events=('start', 'end')):
+            if event == 'start':
+                stack.append((elem, dict(elem.items()), {}))
+                continue
+
+            node, content, groups = stack.pop()
+
+            if not groups and node.text:
+                value = node.text
+            else:
+                value = self._group(content, groups)
+
+            if stack:
+                # release the decoded node from its parent
+                parent = stack[-1]
+                parent[2].setdefault(node.tag, []).append(value)
+                del parent[0][:]
+            else:
+                root = {node.tag: value}
+
+            node.clear()
+
+        self.obj = root
+        return self.obj
+
+    @staticmethod
+    def _group(content, groups):
+        # a list only for many children with the same tag, in order of first occurrence
+        for tag, values in groups.items():
+            content[tag] = values if len(values) > 1 else values[0]
+
+        return content
+
     def _node(self, node):
         content = {}
 
@@ -36,24 +82,13 @@ class Decoder:
         for item in node.items():
             content[item[0]] = item[1]
 
-        done = set()
+        # children grouped by tag in a single pass
+        groups = {}
 
-        # children
-        for child in node.getchildren():
-            siblings = node.findall(child.tag)
+        for child in node:
+            groups.setdefault(child.tag, []).append(self._node(child))
 
-            if len(siblings) > 1:
-                done.add(child.tag)
-                elts = []
+        if not groups and node.text:
+            return node.text
 
-                for s in siblings:
-                    elts.append(self._node(s))
-
-                content[child.tag] = elts
-            elif child.tag not in done:
-                content[child.tag] = self._node(child)
-
-        if not node.getchildren() and node.text:
-            content = node.text
-
-        return content
+        return self._group(content, groups)
@@ -13,12 +13,18 @@ import uuid
 
 from datetime import date, datetime
 
-from django.core import serializers
 from django.db.models.query import QuerySet
-from django.utils import six
 from django.db.models import Model
 from django.utils.functional import Promise
 
+from igdectk.common.serialization import model_to_python, queryset_to_python
+
+# size of the chunks yielded by the streaming encoder, in characters
+CHUNK_SIZE = 65536
+
+# number of model objects fetched at once when streaming a QuerySet
+QUERYSET_CHUNK_SIZE = 2000
+
 
 class Encoder(object):
 
@@ -31,10 +37,11 @@ class Encoder(object):
         self.data = ""  # where we store the processed XML string
 
     def _Value2Xml(self, name, obj):
+        # models are serialized as the python serializer does, a QuerySet as a list
         if isinstance(obj, QuerySet):
-            result = serializers.serialize('xml', obj)
+            return self._List2Xml(name, queryset_to_python(obj))
         elif isinstance(obj, Model):
-            result = serializers.serialize('xml', [obj])[0]
+            return self._Dict2Xml(name, model_to_python(obj))
         elif isinstance(obj, date):
             result = obj.isoformat()
         elif isinstance(obj, datetime):
@@ -42,7 +49,7 @@ class Encoder(object):
         elif isinstance(obj, decimal.Decimal):
             result = str(obj)
         elif isinstance(obj, Promise):
-            result = six.text_type(obj)
+            result = str(obj)
         elif isinstance(obj, uuid.UUID):
             result = str(obj)
         elif hasattr(obj, "__dict__"):
@@ -52,48 +59,137 @@ class Encoder(object):
 
         return "<%(n)s>%(r)s</%(n)s>" % {'n': name, 'r': result}
 
-    def _List2Xml(self, name, obj):
-        result = ""
+    def _iter_value(self, name, obj):
+        if isinstance(obj, QuerySet):
+            # as a list of models, fetched by chunks
+            for model in obj.iterator(chunk_size=QUERYSET_CHUNK_SIZE):
+                yield from self._iter_dict(name, model_to_python(model))
+        else:
+            yield self._Value2Xml(name, obj)
+
+    def _split_dict(self, obj):
+        """
+        Returns the attributes string of a dict (its simple values), and the list of its others
+        items (its children nodes).
+        """
+        attrs = ""
+        children = []
+
+        for key, value in obj.items():
+            if isinstance(value, dict) or isinstance(value, list) or isinstance(value, tuple):
+                children.append((key, value))
+            elif isinstance(value, str) or isinstance(value, int) or isinstance(value, float):
+                attrs += ' %s="%s"' % (key, str(value))
+            else:
+                children.append((key, value))
+
+        return attrs, children
 
+    def _iter_list(self, name, obj):
         for value in obj:
             if isinstance(value, dict):
-                result += self._Dict2Xml(name, value)
+                yield from self._iter_dict(name, value)
             elif isinstance(value, list) or isinstance(value, tuple):
-                result += self._List2Xml(name, value)
+                yield from self._iter_list(name, value)
             else:
-                result += self._Value2Xml(name, value)
+                yield from self._iter_value(name, value)
 
-        return result
-
-    def _Dict2Xml(self, name, obj):
+    def _iter_dict(self, name, obj):
         """
-        processes Python data structure into XML string
-        needs name if obj is a List
+        Yield the XML string parts of a Python data structure.
+        The name is needed if obj is a List.
         """
-        result = ""
-        attrs = ""
-        simple = True
+        attrs, children = self._split_dict(obj)
 
-        for key, value in obj.items():
+        if name:
+            if not children:
+                yield "<%s%s/>" % (name, attrs)
+                return
+
+            yield "<%s%s>" % (name, attrs)
+
+        for key, value in children:
             if isinstance(value, dict):
-                simple = False
-                result += self._Dict2Xml(key, value)
+                yield from self._iter_dict(key, value)
             elif isinstance(value, list) or isinstance(value, tuple):
-                simple = False
-                result += self._List2Xml(key, value)
-            elif isinstance(value, str) or isinstance(value, int) or isinstance(value, float):
-                attrs += ' %s="%s"' % (key, str(value))
+                yield from self._iter_list(key, value)
             else:
-                simple = False
-                result += self._Value2Xml(key, value)
+                yield from self._iter_value(key, value)
 
         if name:
-            if simple:
-                return "<%s%s/>" % (name, attrs)
+            yield "</%s>" % name
+
+    def _write_list(self, parts, name, obj):
+        for value in obj:
+            if isinstance(value, dict):
+                self._write_dict(parts, name, value)
+            elif isinstance(value, list) or isinstance(value, tuple):
+                self._write_list(parts, name, value)
             else:
-                return "<%s%s>%s</%s>" % (name, attrs, result, name)
+                parts.append(self._Value2Xml(name, value))
+
+    def _write_dict(self, parts, name, obj):
+        """
+        Same as :meth:`_iter_dict` but appending the parts to a list, faster when
+        the whole document is wanted.
+        """
+        attrs, children = self._split_dict(obj)
+
+        if name:
+            if not children:
+                parts.append("<%s%s/>" % (name, attrs))
+                return
+
+            parts.append("<%s%s>" % (name, attrs))
+
+        for key, value in children:
+            if isinstance(value, dict):
+                self._write_dict(parts, key, value)
+            elif isinstance(value, list) or isinstance(value, tuple):
+                self._write_list(parts, key, value)
+            else:
+                parts.append(self._Value2Xml(key, value))
+
+        if name:
+            parts.append("</%s>" % name)
+
+    def _List2Xml(self, name, obj):
+        parts = []
+        self._write_list(parts, name, obj)
+        return "".join(parts)
+
+    def _Dict2Xml(self, name, obj):
+        """
+        processes Python data structure into XML string
+        needs name if obj is a List
+        """
+        parts = []
+        self._write_dict(parts, name, obj)
+        return "".join(parts)
+
+    def iterencode(self, obj, chunk_size=CHUNK_SIZE):
+        """
+        Encode a Python data structure into XML as a generator of strings, of about chunk_size
+        characters. The output is the same as :meth:`encode`, and the QuerySets are fetched
+        by chunks of rows, so the memory usage does not depends on the size of the document.
+        """
+        if not isinstance(obj, dict):
+            raise ValueError("Root object must be a dict")
+
+        buffer = []
+        size = 0
+
+        for part in self._iter_dict(None, obj):
+            buffer.append(part)
+            size += len(part)
+
+            if size >= chunk_size:
+                yield "".join(buffer)
+                buffer = []
+                size = 0
 
-        return result
+        if buffer:
+            yield "".join(buffer)
 
     def encode(self, obj, root_node=None):
         if isinstance(obj, dict):
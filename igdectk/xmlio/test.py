@@ -8,6 +8,7 @@
 # @license MIT (see LICENSE file)
 # @details
 
+import io
 import unittest
 
 from .decoder import Decoder
@@ -78,6 +79,25 @@ class TestXmlDecoder(unittest.TestCase):
         result = decoder.decode(xml2)
         self.assertEqual(result, xml2_obj)
 
+    def test_decoder_stream_xml1(self):
+        decoder = Decoder()
+        result = decoder.decode_stream(io.BytesIO(xml1.encode('utf-8')))
+        self.assertEqual(result, xml1_obj)
+
+    def test_decoder_stream_xml2(self):
+        decoder = Decoder()
+        result = decoder.decode_stream(io.BytesIO(xml2.encode('utf-8')))
+        self.assertEqual(result, xml2_obj)
+
+    def test_decoder_wide(self):
+        # many siblings are grouped into a list, keeping the order of the first occurrence of each tag
+        xml = "<root><a>0</a><b>x</b>%s<c/></root>" % "".join("<a>%i</a>" % i for i in range(1, 10000))
+        expected = {'root': {'a': [str(i) for i in range(10000)], 'b': 'x', 'c': {}}}
+
+        for result in (Decoder().decode(xml), Decoder().decode_stream(io.BytesIO(xml.encode('utf-8')))):
+            self.assertEqual(result, expected)
+            self.assertEqual(list(result['root'].keys()), ['a', 'b', 'c'])
+
     def test_encoder_xml1(self):
         # the XML element are never in the same order because of dict (into Encoder)
         # we decode the encoded and compare object
@@ -94,5 +114,21 @@ class TestXmlDecoder(unittest.TestCase):
         result = decoder.decode(encoder.encode(xml2_obj))
         self.assertEqual(result, xml2_obj)
 
+    def test_encoder_stream(self):
+        wide_obj = {'root': {'a': [str(i) for i in range(10000)], 'b': 'x', 'c': {'d': [{'e': '1'}, {}]}}}
+
+        for obj in (xml1_obj, xml2_obj, wide_obj):
+            expected = Encoder().encode(obj)
+
+            for chunk_size in (1, 100, 65536):
+                chunks = list(Encoder().iterencode(obj, chunk_size))
+
+                self.assertEqual(''.join(chunks), expected)
+                self.assertTrue(all(len(chunk) >= chunk_size for chunk in chunks[:-1]))
+
+        with self.assertRaises(ValueError):
+            list(Encoder().iterencode(['root']))
+
+
 if __name__ == '__main__':
     unittest.main()
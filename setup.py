@@ -113,6 +113,11 @@ setup(
     # for example:
     # $ pip install -e .[dev,test]
     extras_require={
+        'async': ['asgiref'],
+        'brotli': ['brotli'],
+        'numpy': ['numpy'],
+        'orjson': ['orjson'],
+        'test': ['asgiref', 'brotli', 'numpy', 'orjson'],
     },
 
     # If there are data files included in your packages that need to be